@@ -0,0 +1,45 @@
+import statistics
+
+from app.descriptive_statistics import (
+    calculate_descriptive_statistics,
+    to_masked_array,
+)
+
+
+class TestDescriptiveStatistics:
+    def test_should_calculate_statistics_of_each_group_ignoring_missing_values(self):
+        values = to_masked_array([[1, 2, None, 3, 4], [10, 20]])
+
+        result = calculate_descriptive_statistics(values)
+
+        assert result["max"] == [4, 20]
+        assert result["min"] == [1, 10]
+        assert result["avg"] == [2.5, 15]
+        assert result["stdv"] == [statistics.stdev([1, 2, 3, 4]), 0]
+        assert result["p25"] == [1.75, 12.5]
+        assert result["p50"] == [2.5, 15]
+        assert result["p90"] == [3.7, 19]
+
+    def test_should_keep_integer_type_of_max_and_min_when_every_value_is_integer(self):
+        values = to_masked_array([[1, 2, 3]])
+
+        result = calculate_descriptive_statistics(values)
+
+        assert type(result["max"][0]) is int
+        assert type(result["min"][0]) is int
+
+    def test_should_return_none_statistics_for_groups_without_values(self):
+        values = to_masked_array([[None, None], [], [5.5]])
+
+        result = calculate_descriptive_statistics(values)
+
+        assert all(result[name][:2] == [None, None] for name in result)
+        assert result["max"][2] == 5.5
+        assert result["stdv"][2] == 0
+
+    def test_should_return_none_statistics_when_no_group_has_values(self):
+        values = to_masked_array([[], []])
+
+        result = calculate_descriptive_statistics(values)
+
+        assert all(statistics == [None, None] for statistics in result.values())
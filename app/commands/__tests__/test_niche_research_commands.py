@@ -5,8 +5,10 @@ import pytest
 from typer import Exit
 
 from app.commands.niche_research_commands import (
+    expand_keywords,
     perform,
     perform_from_file,
+    refresh_candidate_index,
     update_niches_amazon_commission_rates,
 )
 from app.domain import NicheResearch
@@ -34,6 +36,12 @@ class TestNicheResearchCommands:
             [call("cat toys"), call("dog toys"), call("fish food")]
         )
 
+    def test_should_expand_keywords_of_niche_when_providing_niche(
+        self, niche_research: NicheResearch
+    ):
+        expand_keywords("cat toys", 2, 8, 1000)
+        niche_research.expand_keywords.assert_called_with("cat toys", 2, 8, 1000)
+
     def test_should_raise_exception_when_providing_non_existing_file(self):
         with pytest.raises(Exit):
             perform_from_file("non_existing_file.txt")
@@ -43,3 +51,7 @@ class TestNicheResearchCommands:
     ):
         update_niches_amazon_commission_rates(True)
         niche_research.update_niches_amazon_commission_rates.assert_called_with(True)
+
+    def test_should_refresh_candidate_index(self, niche_research: NicheResearch):
+        refresh_candidate_index()
+        niche_research.refresh_candidate_index.assert_called_once()
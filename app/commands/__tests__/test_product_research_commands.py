@@ -1,7 +1,11 @@
 import inject
 import pytest
 
-from app.commands.product_research_commands import fetch_amazon_products
+from app.commands.product_research_commands import (
+    create_observation_partitions,
+    fetch_amazon_products,
+    fetch_amazon_products_for_candidates,
+)
 from app.domain import ProductResearch
 
 
@@ -14,5 +18,21 @@ class TestProductResearchCommands:
     def test_should_fetch_amazon_products_when_providing_niche(
         self, product_research: ProductResearch
     ):
-        fetch_amazon_products("cat toys")
-        product_research.fetch_amazon_products_for_niche.assert_called_with("cat toys")
+        fetch_amazon_products("cat toys", 3)
+        product_research.fetch_amazon_products_for_niche.assert_called_with(
+            "cat toys", 3
+        )
+
+    def test_should_fetch_amazon_products_for_candidates_with_given_thresholds(
+        self, product_research: ProductResearch
+    ):
+        fetch_amazon_products_for_candidates(1000, 20, 30, 2, 4, 16)
+        product_research.fetch_amazon_products_for_candidates.assert_called_with(
+            1000, 20, 30, 2, 4, 16
+        )
+
+    def test_should_create_observation_partitions_for_given_months_ahead(
+        self, product_research: ProductResearch
+    ):
+        create_observation_partitions(6)
+        product_research.create_observation_partitions.assert_called_with(6)
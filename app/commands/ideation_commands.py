@@ -1,7 +1,10 @@
+from datetime import datetime
+from typing import Annotated, Optional
 import inject
-from typer import Typer
+from typer import Option, Typer
 
 from app.domain import Ideation
+from exporters import SnapshotFormatEnum
 
 ideation_typer = Typer()
 
@@ -12,14 +15,84 @@ def start_gsa_data_collector():
     start_gsa_data_collector()
 
 @ideation_typer.command("generate_gsa_snapshot")
-def generate_gsa_snapshot():
+def generate_gsa_snapshot_command(
+    output: Annotated[
+        Optional[str],
+        Option(
+            help="The path of the snapshot file. Defaults to 'gsa_snapshot' with the format extension."
+        ),
+    ] = None,
+    format: Annotated[
+        SnapshotFormatEnum, Option(help="The format of the snapshot file.")
+    ] = SnapshotFormatEnum.CSV,
+    full_refresh: Annotated[
+        bool,
+        Option(
+            help="Recalculate the snapshot rows of every niche, instead of only those whose data changed."
+        ),
+    ] = False,
+    jobs: Annotated[
+        int,
+        Option(
+            help="If greater than zero, calculate the statistics in Python with this many worker processes, instead of in the database."
+        ),
+    ] = 0,
+    minimum_volume: Annotated[
+        int,
+        Option(
+            "--min-volume",
+            help="The minimum volume at least one keyword of a candidate niche should have.",
+        ),
+    ] = 700,
+    maximum_da: Annotated[
+        int,
+        Option(
+            "--max-da",
+            help="The maximum DA for at least one website in the top 10 SERP results of that keyword.",
+        ),
+    ] = 30,
+):
     """Generate a snapshot using the data collected for the GSA strategy."""
-    generate_gsa_snapshot()
+    generate_gsa_snapshot(
+        output or f"gsa_snapshot.{format.value}",
+        format,
+        full_refresh,
+        jobs,
+        minimum_volume,
+        maximum_da,
+    )
+
+@ideation_typer.command("reparse")
+def reparse_command(
+    jobs: Annotated[
+        int, Option(help="The number of worker processes parsing the responses.")
+    ] = 4,
+    since: Annotated[
+        Optional[datetime],
+        Option(help="Only parse the responses received from this moment on."),
+    ] = None,
+):
+    """Rebuild keyword reports and Amazon products from the archived raw responses."""
+    reparse(jobs, since)
 
 @inject.autoparams()
 def start_gsa_data_collector(ideation: Ideation):
     ideation.start_gsa_data_collector()
 
-@inject.autoparams()
-def generate_gsa_snapshot(ideation: Ideation):
-    ideation.generate_gsa_snapshot()
\ No newline at end of file
+@inject.params(ideation=Ideation)
+def generate_gsa_snapshot(
+    output: str,
+    format: SnapshotFormatEnum,
+    full_refresh: bool,
+    jobs: int,
+    minimum_volume: int,
+    maximum_da: int,
+    ideation: Ideation,
+):
+    ideation.generate_gsa_snapshot(
+        output, format, full_refresh, jobs, minimum_volume, maximum_da
+    )
+
+@inject.params(ideation=Ideation)
+def reparse(jobs: int, since: Optional[datetime], ideation: Ideation):
+    ideation.reparse(jobs, since)
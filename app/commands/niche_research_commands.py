@@ -1,7 +1,7 @@
 from typing import Annotated, Optional
 import inject
 from monitoring import Logger, LogTypeEnum
-from typer import Argument, Typer, Exit
+from typer import Argument, Option, Typer, Exit
 
 from app.domain import NicheResearch
 
@@ -37,6 +37,28 @@ def perform_from_gpt_ideas_command():
     perform_from_gpt_ideas()
 
 
+@niche_research_typer.command("expand_keywords")
+def expand_keywords_command(
+    niche: Annotated[str, Argument(help="The niche to expand into long-tail keywords.")],
+    depth: Annotated[
+        int,
+        Option(help="The number of levels to expand the suggestions."),
+    ] = 1,
+    workers: Annotated[
+        int,
+        Option(help="The number of suggestion queries running at once."),
+    ] = 16,
+    limit: Annotated[
+        int,
+        Option(help="The number of keywords after which the expansion stops."),
+    ] = 5000,
+):
+    """
+    Expand a niche into long-tail keywords through Google suggestions, and save them as its suggested keywords.
+    """
+    expand_keywords(niche, depth, workers, limit)
+
+
 @niche_research_typer.command("update_niches_amazon_commission_rates")
 def update_niches_amazon_commission_rates_command(
     force: Annotated[
@@ -52,6 +74,14 @@ def update_niches_amazon_commission_rates_command(
     update_niches_amazon_commission_rates(force)
 
 
+@niche_research_typer.command("refresh_candidate_index")
+def refresh_candidate_index_command():
+    """
+    Rebuild the niche candidate index from the latest state of every keyword.
+    """
+    refresh_candidate_index()
+
+
 @inject.params(niche_research=NicheResearch)
 def perform(niche: str, niche_research: NicheResearch):
     niche_research.fetch_data(niche)
@@ -75,6 +105,13 @@ def perform_from_file(filepath: str, niche_research: NicheResearch, logger: Logg
         niche_research.fetch_data(niche)
 
 
+@inject.params(niche_research=NicheResearch)
+def expand_keywords(
+    niche: str, depth: int, workers: int, limit: int, niche_research: NicheResearch
+):
+    niche_research.expand_keywords(niche, depth, workers, limit)
+
+
 @inject.params(niche_research=NicheResearch)
 def update_niches_amazon_commission_rates(force: bool, niche_research: NicheResearch):
     niche_research.update_niches_amazon_commission_rates(force)
@@ -83,3 +120,8 @@ def update_niches_amazon_commission_rates(force: bool, niche_research: NicheRese
 @inject.params(niche_research=NicheResearch)
 def perform_from_gpt_ideas(niche_research: NicheResearch):
     niche_research.fetch_data_from_gpt_ideas()
+
+
+@inject.params(niche_research=NicheResearch)
+def refresh_candidate_index(niche_research: NicheResearch):
+    niche_research.refresh_candidate_index()
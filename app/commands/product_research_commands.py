@@ -1,6 +1,6 @@
 import inject
-from typing import Annotated
-from typer import Argument, Typer
+from typing import Annotated, Optional
+from typer import Argument, Option, Typer
 
 from app.domain import ProductResearch
 
@@ -9,20 +9,95 @@ product_research_typer = Typer()
 
 @product_research_typer.command("fetch_amazon_products")
 def fetch_amazon_products_command(
-    niche: Annotated[str, Argument(help="The main niche to perform research on.")]
+    niche: Annotated[str, Argument(help="The main niche to perform research on.")],
+    pages: Annotated[
+        int,
+        Option(
+            "--pages",
+            help="The number of Amazon search result pages to fetch products from.",
+        ),
+    ] = 1,
 ):
     """Perform product research for the given niche."""
-    fetch_amazon_products(niche)
+    fetch_amazon_products(niche, pages)
 
 @product_research_typer.command("fetch_amazon_products_for_candidates")
-def fetch_amazon_products_for_candidates_command():
-    """Perform product research for all niche candidates."""
-    fetch_amazon_products_for_candidates()
+def fetch_amazon_products_for_candidates_command(
+    minimum_volume: Annotated[
+        int,
+        Option(
+            "--min-volume",
+            help="The minimum volume at least one keyword of a candidate niche should have.",
+        ),
+    ] = 700,
+    maximum_da: Annotated[
+        int,
+        Option(
+            "--max-da",
+            help="The maximum DA for at least one website in the top 10 SERP results of that keyword.",
+        ),
+    ] = 30,
+    max_age_days: Annotated[
+        Optional[int],
+        Option(
+            "--max-age-days",
+            help="Fetch again the candidates whose products were all seen more than this many days ago.",
+        ),
+    ] = None,
+    pages: Annotated[
+        int,
+        Option(
+            "--pages",
+            help="The number of Amazon search result pages to fetch products from.",
+        ),
+    ] = 1,
+    jobs: Annotated[
+        int,
+        Option(
+            help="If greater than zero, parse the pages with this many worker processes, while fetching them concurrently.",
+        ),
+    ] = 0,
+    fetchers: Annotated[
+        int,
+        Option(help="The number of threads fetching pages, when parsing with worker processes."),
+    ] = 8,
+):
+    """Perform product research for all niche candidates lacking products."""
+    fetch_amazon_products_for_candidates(
+        minimum_volume, maximum_da, max_age_days, pages, jobs, fetchers
+    )
+
+@product_research_typer.command("create_observation_partitions")
+def create_observation_partitions_command(
+    months_ahead: Annotated[
+        int,
+        Option(
+            "--months-ahead",
+            help="The number of months after the current one to create partitions for.",
+        ),
+    ] = 12,
+):
+    """Create the monthly partitions of the Amazon product observation history ahead of time."""
+    create_observation_partitions(months_ahead)
 
 @inject.params(product_research=ProductResearch)
-def fetch_amazon_products(niche: str, product_research: ProductResearch):
-    product_research.fetch_amazon_products_for_niche(niche)
+def fetch_amazon_products(niche: str, pages: int, product_research: ProductResearch):
+    product_research.fetch_amazon_products_for_niche(niche, pages)
+
+@inject.params(product_research=ProductResearch)
+def fetch_amazon_products_for_candidates(
+    minimum_volume: int,
+    maximum_da: int,
+    max_age_days: Optional[int],
+    pages: int,
+    jobs: int,
+    fetchers: int,
+    product_research: ProductResearch,
+):
+    product_research.fetch_amazon_products_for_candidates(
+        minimum_volume, maximum_da, max_age_days, pages, jobs, fetchers
+    )
 
 @inject.params(product_research=ProductResearch)
-def fetch_amazon_products_for_candidates(product_research: ProductResearch):
-    product_research.fetch_amazon_products_for_candidates()
\ No newline at end of file
+def create_observation_partitions(months_ahead: int, product_research: ProductResearch):
+    product_research.create_observation_partitions(months_ahead)
@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+Number = Union[int, float]
+
+DESCRIPTIVE_STATISTICS = ["max", "min", "avg", "stdv", "p25", "p50", "p90"]
+PERCENTILES = {"p25": 0.25, "p50": 0.50, "p90": 0.90}
+
+
+def to_masked_array(groups: Sequence[Sequence[Optional[Number]]]) -> np.ma.MaskedArray:
+    """
+    Packs groups of values of different lengths into a 2-D masked array, one row per group.
+    Missing values (None) and the padding of shorter groups are masked out.
+    The array is integer when every present value is an integer, so that max and min keep their type.
+
+    Args:
+        groups (Sequence[Sequence[Optional[Number]]]): The values of each group.
+
+    Returns:
+        np.ma.MaskedArray: A (groups x values) masked array.
+    """
+    width = max((len(group) for group in groups), default=0)
+    present = [v for group in groups for v in group if v is not None]
+    dtype = np.int64 if all(isinstance(v, int) for v in present) else np.float64
+
+    data = np.zeros((len(groups), width), dtype=dtype)
+    mask = np.ones((len(groups), width), dtype=bool)
+    for i, group in enumerate(groups):
+        for j, value in enumerate(group):
+            if value is not None:
+                data[i, j] = value
+                mask[i, j] = False
+
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+def calculate_descriptive_statistics(
+    values: np.ma.MaskedArray,
+) -> Dict[str, List[Optional[Number]]]:
+    """
+    Calculates the descriptive statistics of every row of a 2-D masked array at once.
+    The sample standard deviation is only calculated for rows with more than two values, being 0 otherwise.
+    Percentiles are linearly interpolated, like PostgreSQL's percentile_cont.
+    Every statistic of a row without values is None.
+
+    Args:
+        values (np.ma.MaskedArray): A (groups x values) masked array, as built by to_masked_array.
+
+    Returns:
+        Dict[str, List[Optional[Number]]]: For each of DESCRIPTIVE_STATISTICS, the value of every row.
+    """
+    count = values.count(axis=1)
+    empty = count == 0
+    if not values.shape[1]:
+        return {name: [None] * len(count) for name in DESCRIPTIVE_STATISTICS}
+
+    statistics = {
+        "max": values.max(axis=1),
+        "min": values.min(axis=1),
+        "avg": values.mean(axis=1),
+        "stdv": np.where(count > 2, values.std(axis=1, ddof=1).filled(0), 0.0),
+    }
+
+    # Masked values are sorted to the end of each row, then each percentile is
+    # interpolated between its two closest ranks among the present values
+    ordered = np.sort(values.astype(np.float64).filled(np.inf), axis=1)
+    last_rank = np.maximum(count - 1, 0)
+    for name, fraction in PERCENTILES.items():
+        position = fraction * last_rank
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        lower_values = np.take_along_axis(ordered, lower[:, None], axis=1)[:, 0]
+        upper_values = np.take_along_axis(ordered, upper[:, None], axis=1)[:, 0]
+        with np.errstate(invalid="ignore"):
+            statistics[name] = lower_values + (upper_values - lower_values) * (
+                position - lower
+            )
+
+    return {
+        name: np.ma.MaskedArray(np.ma.getdata(statistic), mask=empty).tolist()
+        for name, statistic in statistics.items()
+    }
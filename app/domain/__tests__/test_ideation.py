@@ -0,0 +1,112 @@
+from datetime import datetime
+import pytest
+from unittest.mock import MagicMock, Mock, patch
+
+from app.domain import Ideation
+from exporters import SnapshotFormatEnum
+
+
+class TestIdeation:
+    @pytest.fixture
+    def ideation(self):
+        ideation = Ideation(Mock(), Mock(), Mock(), Mock(), Mock())
+        ideation.niches_repository.get_niches_source_watermarks.return_value = {
+            1: datetime(2024, 1, 1),
+            2: datetime(2024, 1, 2),
+            3: None,
+        }
+        ideation.niche_snapshots_repository.get_snapshotted_watermarks.return_value = {
+            1: datetime(2024, 1, 1),
+            2: datetime(2024, 1, 1),
+        }
+        ideation.niche_snapshots_repository.get_snapshot_rows.return_value = []
+        return ideation
+
+    @pytest.fixture
+    def create_snapshot_writer(self):
+        with patch("app.domain.ideation.create_snapshot_writer") as create_snapshot_writer:
+            yield create_snapshot_writer
+
+    def test_should_recalculate_only_niches_whose_source_data_changed_when_generating_snapshot(
+        self, ideation: Ideation, create_snapshot_writer: MagicMock
+    ):
+        ideation.generate_gsa_snapshot()
+
+        ideation.niches_repository.get_candidates_snapshot_rows.assert_called_once_with(
+            700, 30, [2, 3]
+        )
+        ideation.niche_snapshots_repository.replace_niche_snapshots.assert_called_once_with(
+            700,
+            30,
+            {2: datetime(2024, 1, 2), 3: None},
+            ideation.niches_repository.get_candidates_snapshot_rows.return_value,
+        )
+
+    def test_should_calculate_statistics_in_worker_processes_when_generating_snapshot_with_jobs(
+        self, ideation: Ideation, create_snapshot_writer: MagicMock
+    ):
+        with patch(
+            "app.domain.ideation.calculate_candidates_snapshot_rows"
+        ) as calculate_candidates_snapshot_rows:
+            ideation.generate_gsa_snapshot(jobs=4)
+
+        calculate_candidates_snapshot_rows.assert_called_once_with([2, 3], 700, 30, 4)
+        ideation.niches_repository.get_candidates_snapshot_rows.assert_not_called()
+        ideation.niche_snapshots_repository.replace_niche_snapshots.assert_called_once_with(
+            700,
+            30,
+            {2: datetime(2024, 1, 2), 3: None},
+            calculate_candidates_snapshot_rows.return_value,
+        )
+
+    def test_should_recalculate_every_niche_when_generating_snapshot_with_full_refresh(
+        self, ideation: Ideation, create_snapshot_writer: MagicMock
+    ):
+        ideation.generate_gsa_snapshot(full_refresh=True)
+
+        ideation.niches_repository.get_candidates_snapshot_rows.assert_called_once_with(
+            700, 30, [1, 2, 3]
+        )
+
+    def test_should_use_given_thresholds_when_generating_snapshot(
+        self, ideation: Ideation, create_snapshot_writer: MagicMock
+    ):
+        ideation.generate_gsa_snapshot(minimum_volume=1000, maximum_da=20)
+
+        ideation.niche_snapshots_repository.get_snapshotted_watermarks.assert_called_once_with(
+            1000, 20
+        )
+        ideation.niches_repository.get_candidates_snapshot_rows.assert_called_once_with(
+            1000, 20, [2, 3]
+        )
+        ideation.niche_snapshots_repository.get_snapshot_rows.assert_called_once_with(
+            1000, 20
+        )
+
+    def test_should_not_recalculate_anything_when_no_source_data_changed(
+        self, ideation: Ideation, create_snapshot_writer: MagicMock
+    ):
+        ideation.niches_repository.get_niches_source_watermarks.return_value = {
+            1: datetime(2024, 1, 1),
+        }
+
+        ideation.generate_gsa_snapshot()
+
+        ideation.niches_repository.get_candidates_snapshot_rows.assert_not_called()
+        ideation.niche_snapshots_repository.replace_niche_snapshots.assert_not_called()
+
+    def test_should_write_every_stored_row_when_generating_snapshot(
+        self, ideation: Ideation, create_snapshot_writer: MagicMock
+    ):
+        ideation.niche_snapshots_repository.get_snapshot_rows.return_value = [
+            {"niche": "a"},
+            {"niche": "b"},
+        ]
+
+        ideation.generate_gsa_snapshot("snapshot.parquet", SnapshotFormatEnum.PARQUET)
+
+        create_snapshot_writer.assert_called_once_with(
+            SnapshotFormatEnum.PARQUET, "snapshot.parquet"
+        )
+        writer = create_snapshot_writer.return_value.__enter__.return_value
+        assert writer.write_row.call_count == 2
@@ -1,22 +1,51 @@
+import json
+from pathlib import Path
+import inject
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
+from sqlmodel import delete, func, select
 
 from app.domain import NicheResearch
 from app.interfaces.dtos.niche_amazon_commission import NicheAmazonCommission
+from app.repositories import KeywordsRepository, NichesRepository
+from config import Config
+from database.connection import DatabaseConnection
+from database.models import (
+    Keyword,
+    KeywordTypeEnum,
+    MetricsReport,
+    Niche,
+    NicheKeyword,
+    SERPAnalysis,
+    SERPAnalysisItem,
+    SuggestionSet,
+    SuggestionSetKeyword,
+)
+from integrations.constants import ArchiveProviderEnum
+from integrations.response_archive import ResponseArchive
+
+UBERSUGGEST_WEBFIXTURES = (
+    Path(__file__).resolve().parents[3]
+    / "integrations"
+    / "ubersuggest_api"
+    / "__tests__"
+    / "webfixtures"
+)
 
 
 @pytest.fixture
 def niche_research():
-    return NicheResearch(Mock(), Mock(), Mock(), Mock(), Mock())
+    return NicheResearch(MagicMock(), MagicMock(), Mock(), Mock(), Mock())
 
 
 class TestNicheResearchFetchData:
     def test_should_not_fetch_data_if_niche_has_keywords(
         self, niche_research: NicheResearch
     ):
-        # Make sure the niche has keywords
+        # Make sure the niche has its primary keyword
         niche_research.niches_repository.find_or_insert_niche.return_value.keywords = [
-            "keyword1"
+            Mock(type=KeywordTypeEnum.SUGGESTION),
+            Mock(type=KeywordTypeEnum.PRIMARY),
         ]
 
         # Act
@@ -26,6 +55,21 @@ class TestNicheResearchFetchData:
         niche_research.ubersuggest_api_client.get_keyword_report.assert_not_called()
         niche_research.keywords_repository.upsert_keyword_report.assert_not_called()
 
+    def test_should_fetch_data_if_niche_only_has_suggested_keywords(
+        self, niche_research: NicheResearch
+    ):
+        # Make sure the niche was only expanded
+        niche_research.niches_repository.find_or_insert_niche.return_value.keywords = [
+            Mock(type=KeywordTypeEnum.SUGGESTION)
+        ]
+
+        # Act
+        niche_research.fetch_data("Test Niche")
+
+        # Assert
+        niche_research.ubersuggest_api_client.get_keyword_report.assert_called_once()
+        niche_research.keywords_repository.upsert_keyword_report.assert_called_once()
+
     def test_should_format_niche_name_when_fetching_new_niche(
         self, niche_research: NicheResearch
     ):
@@ -59,6 +103,31 @@ class TestNicheResearchFetchData:
             {"data": "report"}, 123
         )
 
+    def test_should_only_write_report_in_a_unit_of_work_after_fetching_it(
+        self, niche_research: NicheResearch
+    ):
+        # Record the order of the calls
+        calls = []
+        unit_of_work = niche_research.keywords_repository.unit_of_work.return_value
+        unit_of_work.__enter__.side_effect = lambda *_: calls.append("begin")
+        unit_of_work.__exit__.side_effect = lambda *_: calls.append("end")
+        niche_research.niches_repository.find_or_insert_niche.side_effect = (
+            lambda *_: calls.append("read") or Mock(id=123, keywords=[])
+        )
+        niche_research.ubersuggest_api_client.get_keyword_report.side_effect = (
+            lambda *_: calls.append("fetch")
+        )
+        niche_research.keywords_repository.upsert_keyword_report.side_effect = (
+            lambda *_: calls.append("write")
+        )
+
+        # Act
+        niche_research.fetch_data("Test Niche")
+
+        # Assert
+        assert calls == ["read", "fetch", "begin", "write", "end"]
+        niche_research.niches_repository.unit_of_work.assert_not_called()
+
 
 class TestNicheResearchUpdateNichesAmazonCommissionRates:
     def test_should_only_use_niches_with_no_commission_if_force_flag_is_false(
@@ -181,3 +250,138 @@ class TestNicheResearchUpdateNichesAmazonCommissionRates:
         niche_research.niches_repository.update_niches_amazon_commission_rates.assert_called_once_with(
             commissions_fetched
         )
+
+    def test_should_only_write_commissions_in_a_unit_of_work_after_fetching_them(
+        self, niche_research: NicheResearch
+    ):
+        # Record the order of the calls
+        calls = []
+        unit_of_work = niche_research.niches_repository.unit_of_work.return_value
+        unit_of_work.__enter__.side_effect = lambda *_: calls.append("begin")
+        unit_of_work.__exit__.side_effect = lambda *_: calls.append("end")
+        niche_research.niches_repository.get_all_niches_names.side_effect = (
+            lambda: calls.append("read") or ["Cat toys"]
+        )
+        niche_research.openai_api_client.get_amazon_commission_rate_for_niches = Mock(
+            side_effect=lambda *_: calls.append("fetch") or []
+        )
+        niche_research.niches_repository.update_niches_amazon_commission_rates.side_effect = (
+            lambda *_: calls.append("write")
+        )
+
+        # Act
+        niche_research.update_niches_amazon_commission_rates(force=True)
+
+        # Assert
+        assert calls == ["read", "fetch", "begin", "write", "end"]
+
+
+class TestNicheResearchReparseKeywordReports:
+    def test_should_save_reparsed_report_for_niche_of_its_primary_keyword(
+        self, niche_research: NicheResearch
+    ):
+        # Setup mocks
+        entry = Mock(request="best cat toys")
+        niche_research.response_archive = Mock()
+        niche_research.response_archive.get_responses.return_value = [entry]
+        niche_research.niches_repository.find_or_insert_niche.return_value.id = 1
+        niche_research.keywords_repository.has_keyword_report.return_value = False
+
+        # Act
+        with patch(
+            "app.domain.niche_research.parse_archived_responses",
+            return_value=[(entry, "report", None)],
+        ):
+            niche_research.reparse_keyword_reports(jobs=2)
+
+        # Assert
+        niche_research.niches_repository.find_or_insert_niche.assert_called_once_with(
+            "cat toys"
+        )
+        niche_research.keywords_repository.upsert_keyword_report.assert_called_once_with(
+            "report", 1
+        )
+
+    def test_should_not_duplicate_reports_when_reparsing_twice(self, tmp_path):
+        # Archive a keyword report
+        response_archive = ResponseArchive(
+            Config(_env_file=".env.test", RESPONSE_ARCHIVE_DIR=str(tmp_path))
+        )
+        responses = {
+            name: json.loads((UBERSUGGEST_WEBFIXTURES / f"{file}.json").read_text())
+            for name, file in [
+                ("keyword_info", "keyword_info"),
+                ("matching_keywords", "match_keywords"),
+                ("serp_analysis", "serp_analysis"),
+                ("domain_counts", "domain_counts"),
+            ]
+        }
+        response_archive.store(
+            ArchiveProviderEnum.UBERSUGGEST_KEYWORD_REPORT,
+            "best cat toys",
+            json.dumps({**responses, "language": "en", "loc_id": 2840}).encode(),
+        )
+        niche_research = NicheResearch(
+            NichesRepository(),
+            KeywordsRepository(),
+            Mock(),
+            Mock(),
+            Mock(),
+            response_archive,
+        )
+        database_connection = inject.instance(DatabaseConnection)
+
+        def count_rows():
+            with database_connection.session() as session:
+                return [
+                    session.exec(select(func.count()).select_from(model)).one()
+                    for model in [MetricsReport, SERPAnalysis, SuggestionSet]
+                ]
+
+        try:
+            # Reparse the archive twice
+            niche_research.reparse_keyword_reports(jobs=1)
+            counts = count_rows()
+            niche_research.reparse_keyword_reports(jobs=1)
+
+            # Assert
+            assert counts[0] > 0 and counts[1:] == [1, 1]
+            assert count_rows() == counts
+        finally:
+            with database_connection.session() as session:
+                session.exec(delete(SERPAnalysisItem))
+                session.exec(delete(SERPAnalysis))
+                session.exec(delete(SuggestionSetKeyword))
+                session.exec(delete(SuggestionSet))
+                session.exec(delete(MetricsReport))
+                session.exec(delete(NicheKeyword))
+                session.exec(delete(Keyword))
+                session.exec(delete(Niche))
+                session.commit()
+
+
+class TestNicheResearchExpandKeywords:
+    def test_should_save_expanded_keywords_as_suggestions_of_niche(
+        self, niche_research: NicheResearch
+    ):
+        # Setup mocks
+        niche_research.niches_repository.find_or_insert_niche.return_value.id = 123
+        niche_research.keywords_repository.bulk_insert_suggestion_keywords.return_value = 2
+
+        # Act
+        with patch(
+            "app.domain.niche_research.expand_suggestions",
+            return_value=["cat toys for indoor cats", "cat toys interactive"],
+        ) as expand_suggestions:
+            niche_research.expand_keywords("Cat Toys", depth=2)
+
+        # Assert
+        assert expand_suggestions.call_args.args[0] == "cat toys"
+        assert expand_suggestions.call_args.args[3:] == (2, 16, 5000)
+        niche_research.keywords_repository.bulk_insert_suggestion_keywords.assert_called_once_with(
+            "cat toys",
+            ["cat toys for indoor cats", "cat toys interactive"],
+            123,
+            "en",
+            2840,
+        )
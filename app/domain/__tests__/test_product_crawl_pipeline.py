@@ -0,0 +1,106 @@
+from typing import List
+import pytest
+from unittest.mock import Mock
+
+from app.domain.product_crawl_pipeline import crawl_products
+from app.exceptions import DataFetchError, DataFormatError
+
+
+def parse_pages(htmls: List[str]) -> List[str]:
+    if "broken" in htmls:
+        raise DataFormatError("Failed to extract data from HTML")
+    return [html.upper() for html in htmls]
+
+
+class TestProductCrawlPipeline:
+    def test_should_write_parsed_pages_of_every_niche_in_batches(self):
+        # Setup mocks
+        write = Mock()
+        niches = [f"niche {i}" for i in range(5)]
+
+        # Act
+        crawl_products(
+            niches,
+            lambda niche: [niche],
+            parse_pages,
+            write,
+            Mock(),
+            fetch_workers=2,
+            parse_jobs=2,
+            queue_size=2,
+            batch_size=2,
+        )
+
+        # Assert
+        batches = [call.args[0] for call in write.call_args_list]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert sorted(item for batch in batches for item in batch) == [
+            (niche, [niche.upper()]) for niche in niches
+        ]
+
+    def test_should_report_and_skip_niches_that_fail_parsing(self):
+        # Setup mocks
+        write = Mock()
+        on_error = Mock()
+
+        # Act
+        crawl_products(
+            ["ok", "broken"],
+            lambda niche: [niche],
+            parse_pages,
+            write,
+            on_error,
+            fetch_workers=1,
+            parse_jobs=1,
+        )
+
+        # Assert
+        write.assert_called_once_with([("ok", ["OK"])])
+        niche, error = on_error.call_args.args
+        assert niche == "broken"
+        assert isinstance(error, DataFormatError)
+
+    def test_should_report_and_skip_blocked_niches_while_others_go_through(self):
+        # Setup mocks
+        def fetch(niche: str):
+            if niche == "blocked":
+                raise DataFetchError("Blocked by Amazon")
+            return [niche]
+
+        write = Mock()
+        on_error = Mock()
+
+        # Act
+        crawl_products(
+            ["ok", "blocked", "also ok"],
+            fetch,
+            parse_pages,
+            write,
+            on_error,
+            fetch_workers=2,
+            parse_jobs=1,
+        )
+
+        # Assert
+        written = sorted(item for call in write.call_args_list for item in call.args[0])
+        assert written == [("also ok", ["ALSO OK"]), ("ok", ["OK"])]
+        niche, error = on_error.call_args.args
+        assert niche == "blocked"
+        assert isinstance(error, DataFetchError)
+
+    def test_should_raise_unexpected_fetch_errors(self):
+        # Setup mocks
+        fetch = Mock(side_effect=ConnectionError("Connection refused"))
+
+        # Act & Assert
+        with pytest.raises(ConnectionError):
+            crawl_products(
+                [f"niche {i}" for i in range(50)],
+                fetch,
+                parse_pages,
+                Mock(),
+                Mock(),
+                fetch_workers=4,
+                parse_jobs=1,
+                queue_size=1,
+            )
@@ -1,19 +1,22 @@
+from datetime import datetime
 import pytest
 from unittest.mock import MagicMock, Mock, patch
 
 from app.domain import ProductResearch
+from app.exceptions import DataFetchError
+from monitoring import LogTypeEnum
 
 
 class TestProductResearch:
     @pytest.fixture
     def product_research(self):
-        return ProductResearch(Mock(), Mock(), Mock(), Mock())
+        return ProductResearch(MagicMock(), MagicMock(), Mock(), Mock())
 
     def test_should_format_niche_name_when_fetching_new_niche(
         self, product_research: ProductResearch
     ):
         # Setup mocks
-        product_research.amazon_search_client.get_products_for_keyword.return_value = []
+        product_research.amazon_search_client.get_products_for_keywords.return_value = []
 
         with patch(
             "app.domain.product_research.format_niche_name"
@@ -25,21 +28,81 @@ class TestProductResearch:
         self, product_research: ProductResearch
     ):
         # Setup mocks
-        product_research.amazon_search_client.get_products_for_keyword.return_value = []
+        product_research.niches_repository.find_or_insert_niche.return_value.name = (
+            "test niche"
+        )
+        product_research.amazon_search_client.get_products_for_keywords.return_value = []
 
         # Act
         product_research.fetch_amazon_products_for_niche("Test Niche")
 
         # Assert
-        product_research.amazon_search_client.get_products_for_keyword.assert_called_once_with(
-            "test niche"
+        product_research.amazon_search_client.get_products_for_keywords.assert_called_once_with(
+            ["test niche"], 1, "test niche"
+        )
+
+    def test_should_only_write_products_in_a_unit_of_work_after_searching_them(
+        self, product_research: ProductResearch
+    ):
+        # Record the order of the calls
+        calls = []
+        unit_of_work = (
+            product_research.amazon_products_repository.unit_of_work.return_value
+        )
+        unit_of_work.__enter__.side_effect = lambda *_: calls.append("begin")
+        unit_of_work.__exit__.side_effect = lambda *_: calls.append("end")
+        db_niche = Mock(id=123)
+        db_niche.name = "test niche"
+        product_research.niches_repository.find_or_insert_niche.side_effect = (
+            lambda *_: calls.append("read") or db_niche
+        )
+        product_research.amazon_search_client.get_products_for_keywords.side_effect = (
+            lambda *_: calls.append("fetch") or []
+        )
+        product_research.amazon_products_repository.bulk_upsert_amazon_products.side_effect = (
+            lambda *_: calls.append("write")
+        )
+
+        # Act
+        product_research.fetch_amazon_products_for_niche("Test Niche")
+
+        # Assert
+        assert calls == ["read", "fetch", "begin", "write", "end"]
+        product_research.niches_repository.unit_of_work.assert_not_called()
+
+    def test_should_search_every_variant_and_top_suggested_keyword_of_niche_once(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        db_niche = Mock(id=123)
+        db_niche.name = "cat toys"
+        product_research.niches_repository.find_or_insert_niche.return_value = db_niche
+        product_research.niches_repository.get_top_suggested_keywords.return_value = [
+            "best cat toys",
+            "interactive cat toys",
+        ]
+        product_research.amazon_search_client.get_products_for_keywords.return_value = []
+        product_research.config = Mock(
+            AMAZON_SEARCH_VARIANTS="{niche}, best {niche}",
+            AMAZON_SEARCH_TOP_SUGGESTIONS=2,
+        )
+
+        # Act
+        product_research.fetch_amazon_products_for_niche("cat toys", 2)
+
+        # Assert
+        product_research.niches_repository.get_top_suggested_keywords.assert_called_once_with(
+            123, 2
+        )
+        product_research.amazon_search_client.get_products_for_keywords.assert_called_once_with(
+            ["cat toys", "best cat toys", "interactive cat toys"], 2, "cat toys"
         )
 
-    def test_should_upsert_snapshot_for_each_product_from_search(
+    def test_should_bulk_upsert_every_product_from_search(
         self, product_research: ProductResearch
     ):
         # Setup mocks
-        product_research.amazon_search_client.get_products_for_keyword.return_value = [
+        product_research.amazon_search_client.get_products_for_keywords.return_value = [
             {"asin": "ASIN1"},
             {"asin": "ASIN2"},
         ]
@@ -47,14 +110,166 @@ class TestProductResearch:
             MagicMock()
         )
         product_research.niches_repository.find_or_insert_niche.return_value.id = 123
+        product_research.niches_repository.find_or_insert_niche.return_value.name = (
+            "test niche"
+        )
 
         # Act
         product_research.fetch_amazon_products_for_niche("Test Niche")
 
         # Assert
-        product_research.amazon_products_repository.upsert_amazon_product.assert_any_call(
-            {"asin": "ASIN1"}, 123
+        product_research.amazon_products_repository.bulk_upsert_amazon_products.assert_called_once_with(
+            [{"asin": "ASIN1"}, {"asin": "ASIN2"}], 123
+        )
+
+    def test_should_select_candidates_seen_within_max_age_when_fetching_for_candidates(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        product_research.niches_repository.get_niche_candidates_lacking_products.return_value = (
+            []
+        )
+
+        # Act
+        with patch("app.domain.product_research.datetime") as datetime_mock:
+            datetime_mock.now.return_value = datetime(2024, 1, 31)
+            product_research.fetch_amazon_products_for_candidates(1000, 20, 30)
+
+        # Assert
+        product_research.niches_repository.get_niche_candidates_lacking_products.assert_called_once_with(
+            1000, 20, datetime(2024, 1, 1)
         )
-        product_research.amazon_products_repository.upsert_amazon_product.assert_any_call(
-            {"asin": "ASIN2"}, 123
+
+    def test_should_fetch_products_only_for_candidates_lacking_products(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        niche = MagicMock()
+        niche.name = "test niche"
+        product_research.niches_repository.get_niche_candidates_lacking_products.return_value = [
+            niche
+        ]
+        product_research.niches_repository.find_or_insert_niche.return_value = niche
+        product_research.amazon_search_client.get_products_for_keywords.return_value = []
+
+        # Act
+        product_research.fetch_amazon_products_for_candidates()
+
+        # Assert
+        product_research.niches_repository.get_niche_candidates_lacking_products.assert_called_once_with(
+            700, 30, None
+        )
+        product_research.amazon_search_client.get_products_for_keywords.assert_called_once_with(
+            ["test niche"], 1, "test niche"
+        )
+        product_research.amazon_products_repository.get_amazon_products_for_niche.assert_not_called()
+
+    def test_should_keep_fetching_other_candidates_when_one_is_blocked(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        niches = [MagicMock(), MagicMock()]
+        niches[0].name = "blocked niche"
+        niches[1].name = "test niche"
+        product_research.niches_repository.get_niche_candidates_lacking_products.return_value = (
+            niches
+        )
+        product_research.niches_repository.find_or_insert_niche.side_effect = niches
+        product_research.amazon_search_client.get_products_for_keywords.side_effect = [
+            DataFetchError("Blocked by Amazon"),
+            [{"asin": "ASIN1"}],
+        ]
+
+        # Act
+        product_research.fetch_amazon_products_for_candidates()
+
+        # Assert
+        product_research.amazon_products_repository.bulk_upsert_amazon_products.assert_called_once_with(
+            [{"asin": "ASIN1"}], niches[1].id
+        )
+        errors = [
+            c.args[0]
+            for c in product_research.logger.notify.call_args_list
+            if c.args[1] == LogTypeEnum.ERROR
+        ]
+        assert len(errors) == 1 and "blocked niche" in errors[0]
+
+    def test_should_crawl_candidates_through_pipeline_when_given_jobs(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        niche = MagicMock()
+        niche.name = "test niche"
+        niche.id = 123
+        product_research.niches_repository.get_niche_candidates_lacking_products.return_value = [
+            niche
+        ]
+        product_research.amazon_search_client.fetch_search_pages_for_keywords.return_value = [
+            "<html></html>"
+        ]
+
+        # Act
+        with patch("app.domain.product_research.crawl_products") as crawl_products:
+            product_research.fetch_amazon_products_for_candidates(jobs=2, fetchers=4)
+            niches, fetch, _, write, _, fetch_workers, parse_jobs = (
+                crawl_products.call_args.args
+            )
+            fetch(niche)
+            write([(niche, [{"asin": "ASIN1"}])])
+
+        # Assert
+        assert niches == [niche]
+        assert (fetch_workers, parse_jobs) == (4, 2)
+        product_research.amazon_search_client.fetch_search_pages_for_keywords.assert_called_once_with(
+            ["test niche"], 1, "test niche"
+        )
+        product_research.amazon_products_repository.bulk_upsert_amazon_products.assert_called_once_with(
+            [{"asin": "ASIN1"}], 123
+        )
+        product_research.amazon_search_client.get_products_for_keywords.assert_not_called()
+
+    def test_should_upsert_reparsed_products_for_niche_of_each_archived_page(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        entries = [Mock(request="cat toys"), Mock(request="dog toys")]
+        product_research.response_archive = Mock()
+        product_research.response_archive.get_responses.return_value = entries
+        product_research.niches_repository.find_or_insert_niche.side_effect = [
+            Mock(id=1),
+            Mock(id=2),
+        ]
+
+        # Act
+        with patch(
+            "app.domain.product_research.parse_archived_responses",
+            return_value=[
+                (entries[0], [{"asin": "ASIN1"}], None),
+                (entries[1], None, "Failed to extract data from HTML"),
+            ],
+        ):
+            product_research.reparse_amazon_products(jobs=2)
+
+        # Assert
+        product_research.niches_repository.find_or_insert_niche.assert_called_once_with(
+            "cat toys"
+        )
+        product_research.amazon_products_repository.bulk_upsert_amazon_products.assert_called_once_with(
+            [{"asin": "ASIN1"}], 1, record_observations=False
+        )
+
+    def test_should_create_observation_partitions_for_given_months_ahead(
+        self, product_research: ProductResearch
+    ):
+        # Setup mocks
+        product_research.amazon_products_repository.create_observations_partitions.return_value = [
+            "amazon_product_observations_2027_11"
+        ]
+
+        # Act
+        product_research.create_observation_partitions(13)
+
+        # Assert
+        product_research.amazon_products_repository.create_observations_partitions.assert_called_once_with(
+            13
         )
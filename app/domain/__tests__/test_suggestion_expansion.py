@@ -0,0 +1,83 @@
+from unittest.mock import Mock
+
+from app.domain.suggestion_expansion import (
+    EXPANSION_CHARACTERS,
+    QUESTION_PREFIXES,
+    expand_suggestions,
+)
+from app.exceptions import DataFetchError
+
+
+class TestSuggestionExpansion:
+    def test_should_query_seed_with_every_character_and_question_prefix_on_first_level(
+        self,
+    ):
+        # Setup mocks
+        get_suggestions = Mock(return_value=[])
+
+        # Act
+        expand_suggestions("cat toys", get_suggestions, Mock())
+
+        # Assert
+        queries = {c.args[0] for c in get_suggestions.call_args_list}
+        assert len(queries) == 1 + len(EXPANSION_CHARACTERS) + len(QUESTION_PREFIXES)
+        assert {"cat toys", "cat toys a", "cat toys 9", "how cat toys"} <= queries
+
+    def test_should_keep_each_keyword_once_in_order_found_without_seed(self):
+        # Setup mocks
+        suggestions = {
+            "cat toys": ["Cat Toys", "cat toys  for kittens"],
+            "cat toys f": ["cat toys for kittens", "cat toys feather"],
+        }
+
+        # Act
+        keywords = expand_suggestions(
+            "Cat Toys", lambda query: suggestions.get(query, []), Mock(), workers=4
+        )
+
+        # Assert
+        assert keywords == ["cat toys for kittens", "cat toys feather"]
+
+    def test_should_expand_keywords_found_on_previous_level_up_to_depth(self):
+        # Setup mocks
+        suggestions = {
+            "cat toys": ["cat toys for kittens"],
+            "cat toys for kittens": ["cat toys for kittens under 5"],
+            "cat toys for kittens under 5": ["cat toys for kittens under 5 dollars"],
+        }
+
+        # Act
+        keywords = expand_suggestions(
+            "cat toys", lambda query: suggestions.get(query, []), Mock(), depth=2
+        )
+
+        # Assert
+        assert keywords == ["cat toys for kittens", "cat toys for kittens under 5"]
+
+    def test_should_stop_expanding_when_limit_is_reached(self):
+        # Setup mocks
+        get_suggestions = lambda query: [f"{query} {i}" for i in range(10)]
+
+        # Act
+        keywords = expand_suggestions("cat toys", get_suggestions, Mock(), limit=15)
+
+        # Assert
+        assert len(keywords) == 15
+
+    def test_should_report_failed_queries_and_keep_expanding(self):
+        # Setup mocks
+        def get_suggestions(query: str):
+            if query == "cat toys a":
+                raise DataFetchError("Failed to get suggestions")
+            return ["cat toys ball"] if query == "cat toys b" else []
+
+        on_error = Mock()
+
+        # Act
+        keywords = expand_suggestions("cat toys", get_suggestions, on_error)
+
+        # Assert
+        assert keywords == ["cat toys ball"]
+        query, error = on_error.call_args.args
+        assert query == "cat toys a"
+        assert isinstance(error, DataFetchError)
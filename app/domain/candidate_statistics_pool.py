@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, Optional
+import inject
+
+from app.descriptive_statistics import DESCRIPTIVE_STATISTICS
+from app.repositories import LoadingProfileEnum, NichesRepository
+from app.repositories.niches_repository import (
+    AMAZON_PRODUCTS_STATISTICS_KEYS,
+    SERP_ANALYSIS_ITEMS_STATISTICS_KEYS,
+)
+from config import Config
+from database.connection import DatabaseConnection
+
+PRODUCTS_STATISTICS = list(AMAZON_PRODUCTS_STATISTICS_KEYS)
+KEYWORD_STATISTICS = list(SERP_ANALYSIS_ITEMS_STATISTICS_KEYS)
+
+# Same columns, in the same order, as NichesRepository.get_candidates_snapshot_rows
+SNAPSHOT_COLUMNS = [
+    "niche",
+    "amazon_commission_rate",
+    *[f"{s}_{d}" for s in PRODUCTS_STATISTICS for d in DESCRIPTIVE_STATISTICS],
+    "keyword",
+    "volume",
+    "domains_with_DA_under_30",
+    "da_top_1",
+    "da_top_2",
+    "da_top_3",
+    *[f"{s}_{d}" for s in KEYWORD_STATISTICS for d in DESCRIPTIVE_STATISTICS],
+]
+
+# Repository of the worker process, with its own database connection
+worker_niches_repository: Optional[NichesRepository] = None
+
+
+def calculate_candidates_snapshot_rows(
+    niche_ids: List[int],
+    minimum_volume: int,
+    maximum_da: int,
+    jobs: int,
+    shard_size: int = 50,
+) -> Iterator[dict]:
+    """
+    Calculates the snapshot rows of the niche candidates in Python, sharding the niches across a pool of processes.
+    Each worker process opens its own database connection and returns its rows as compact tuples,
+    which are merged back in the order of the niche IDs.
+
+    Args:
+        niche_ids (List[int]): The IDs of the niches to consider.
+        minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+        maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+        jobs (int): The number of worker processes.
+        shard_size (int, optional): The number of niches handled per task. Default is 50.
+
+    Yields:
+        dict: A flat row with the niche, products and keyword statistics.
+    """
+    niche_ids = sorted(niche_ids)
+    shards = [
+        niche_ids[i : i + shard_size] for i in range(0, len(niche_ids), shard_size)
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(inject.instance(Config),),
+    ) as executor:
+        for rows in executor.map(
+            calculate_shard_rows, shards, repeat(minimum_volume), repeat(maximum_da)
+        ):
+            for row in rows:
+                yield dict(zip(SNAPSHOT_COLUMNS, row))
+
+
+def init_worker(config: Config) -> None:
+    """
+    Initializes a worker process with a repository over a new database connection,
+    as connections can't be shared with the parent process.
+
+    Args:
+        config (Config): The configuration of the parent process.
+    """
+    global worker_niches_repository
+    worker_niches_repository = NichesRepository(DatabaseConnection(config))
+
+
+def calculate_shard_rows(
+    niche_ids: List[int], minimum_volume: int, maximum_da: int
+) -> List[tuple]:
+    """
+    Calculates the snapshot rows of the candidates among a shard of niches. Runs in a worker process.
+
+    Args:
+        niche_ids (List[int]): The IDs of the niches in the shard.
+        minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+        maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+
+    Returns:
+        List[tuple]: The snapshot rows, with values in the order of SNAPSHOT_COLUMNS.
+    """
+    rows = []
+    candidates = worker_niches_repository.get_niche_candidates(
+        minimum_volume, maximum_da, niche_ids, LoadingProfileEnum.SNAPSHOT
+    )
+    for candidate in candidates:
+        rows += format_candidate_statistics_rows(
+            worker_niches_repository.get_statistics_for_candidate(candidate)
+        )
+    return rows
+
+
+def format_candidate_statistics_rows(data: dict) -> List[tuple]:
+    """
+    Formats the statistics of a candidate into one row per keyword.
+
+    Args:
+        data (dict): The statistics returned by NichesRepository.get_statistics_for_candidate.
+
+    Returns:
+        List[tuple]: The snapshot rows, with values in the order of SNAPSHOT_COLUMNS.
+    """
+    niche_values = (
+        data["niche"],
+        data["amazon_commission_rate"],
+        *[data[s][d] for s in PRODUCTS_STATISTICS for d in DESCRIPTIVE_STATISTICS],
+    )
+    return [
+        niche_values
+        + (
+            kw_data["keyword"],
+            kw_data["volume"],
+            kw_data["domains_with_DA_under_30"],
+            kw_data["da_top_1"],
+            kw_data["da_top_2"],
+            kw_data["da_top_3"],
+            *[kw_data[s][d] for s in KEYWORD_STATISTICS for d in DESCRIPTIVE_STATISTICS],
+        )
+        for kw_data in data["keywords"]
+    ]
@@ -1,10 +1,12 @@
-from typing import List
+from datetime import datetime
+from typing import Optional
 import inject
 
 from app.domain import NicheResearch, ProductResearch
-from app.repositories import NichesRepository
-from database.connection import DatabaseConnection
-from database.models import Keyword
+from app.domain.candidate_statistics_pool import calculate_candidates_snapshot_rows
+from app.repositories import NichesRepository, NicheSnapshotsRepository
+from exporters import SnapshotFormatEnum, create_snapshot_writer
+from monitoring import Logger, LogTypeEnum
 
 
 class Ideation:
@@ -18,10 +20,14 @@ class Ideation:
         niche_research: NicheResearch,
         product_research: ProductResearch,
         niches_repository: NichesRepository,
+        niche_snapshots_repository: NicheSnapshotsRepository,
+        logger: Logger,
     ):
         self.niche_research = niche_research
         self.product_research = product_research
         self.niches_repository = niches_repository
+        self.niche_snapshots_repository = niche_snapshots_repository
+        self.logger = logger
 
     def start_gsa_data_collector(self) -> None:
         """
@@ -30,32 +36,80 @@ class Ideation:
         while True:
             self.__collect_data_for_gsa()
 
-    def generate_gsa_snapshot(self) -> None:
+    def generate_gsa_snapshot(
+        self,
+        output: str = "gsa_snapshot.csv",
+        format: SnapshotFormatEnum = SnapshotFormatEnum.CSV,
+        full_refresh: bool = False,
+        jobs: int = 0,
+        minimum_volume: int = 700,
+        maximum_da: int = 30,
+    ) -> None:
         """
         Generates a snapshot using the data collected for the GSA strategy.
+        Snapshot rows are stored per niche, and only the niches whose source data
+        changed since they were last computed are recalculated.
+
+        Args:
+            output (str): The path of the snapshot file.
+            format (SnapshotFormatEnum): The format of the snapshot file.
+            full_refresh (bool): If true, recalculates the snapshot rows of every niche.
+            jobs (int): If greater than zero, the statistics are calculated in Python
+                by this many worker processes, instead of by the database.
+            minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+            maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
         """
-        # Get candidates
-        candidates = self.niches_repository.get_niche_candidates(700, 30)
+        # Find the niches whose source data changed since their stored snapshot
+        watermarks = self.niches_repository.get_niches_source_watermarks()
+        if not full_refresh:
+            snapshotted_watermarks = (
+                self.niche_snapshots_repository.get_snapshotted_watermarks(
+                    minimum_volume, maximum_da
+                )
+            )
+            watermarks = {
+                niche_id: watermark
+                for niche_id, watermark in watermarks.items()
+                if niche_id not in snapshotted_watermarks
+                or snapshotted_watermarks[niche_id] != watermark
+            }
 
-        candidates_metrics = []
+        self.logger.notify(
+            f"Recalculating snapshot rows for {len(watermarks)} niches",
+            LogTypeEnum.INFO,
+        )
 
-        # For each candidate, get data and calculate metrics
-        for candidate in candidates:
-            candidate_metrics = self.niches_repository.get_statistics_for_candidate(candidate)
-            candidates_metrics.append(candidate_metrics)
+        # Candidates and their metrics are streamed row by row into the stored snapshots
+        if watermarks:
+            if jobs > 0:
+                rows = calculate_candidates_snapshot_rows(
+                    list(watermarks.keys()), minimum_volume, maximum_da, jobs
+                )
+            else:
+                rows = self.niches_repository.get_candidates_snapshot_rows(
+                    minimum_volume, maximum_da, list(watermarks.keys())
+                )
+            self.niche_snapshots_repository.replace_niche_snapshots(
+                minimum_volume, maximum_da, watermarks, rows
+            )
 
-        rows = []
-        for cm in candidates_metrics:
-            rows += self.__format_candidate_snapshot_rows(cm)
+        rows = self.niche_snapshots_repository.get_snapshot_rows(
+            minimum_volume, maximum_da
+        )
+        with create_snapshot_writer(format, output) as writer:
+            for row in rows:
+                writer.write_row(row)
 
-        # Export to csv
-        with open("gsa_snapshot.csv", "w") as file:
-            # Write header
-            file.write(",".join(rows[0].keys()) + "\n")
+    def reparse(self, jobs: int, since: Optional[datetime] = None) -> None:
+        """
+        Rebuilds the keyword reports and the Amazon products from the archived raw responses, without network calls.
 
-            # Write rows
-            for row in rows:
-                file.write(",".join([str(value) for value in row.values()]) + "\n")
+        Args:
+            jobs (int): The number of worker processes parsing the responses.
+            since (Optional[datetime]): If provided, only responses received from this moment on are parsed.
+        """
+        self.niche_research.reparse_keyword_reports(jobs, since)
+        self.product_research.reparse_amazon_products(jobs, since)
 
     def __collect_data_for_gsa(self) -> None:
         """
@@ -64,64 +118,3 @@ class Ideation:
         self.niche_research.fetch_data_from_gpt_ideas()
         self.niche_research.update_niches_amazon_commission_rates(force=False)
         self.product_research.fetch_amazon_products_for_candidates()
-
-    def __format_candidate_snapshot_rows(self, data: dict) -> List[dict]:
-        """
-        Formats the data for the candidate snapshot.
-        
-        Args:
-            data (dict): The data to format.
-
-        Returns:
-            List[dict]: The formatted data.
-        """
-        rows = []
-        for kw_data in data["keywords"]:
-            row = {
-                "niche": data["niche"],
-                "amazon_commission_rate": data["amazon_commission_rate"],
-                "amazon_products_price_max": data["amazon_products_price"]["max"],
-                "amazon_products_price_min": data["amazon_products_price"]["min"],
-                "amazon_products_price_avg": data["amazon_products_price"]["avg"],
-                "amazon_products_price_stdv": data["amazon_products_price"]["stdv"],
-                "amazon_products_reviews_max": data["amazon_products_reviews"]["max"],
-                "amazon_products_reviews_min": data["amazon_products_reviews"]["min"],
-                "amazon_products_reviews_avg": data["amazon_products_reviews"]["avg"],
-                "amazon_products_reviews_stdv": data["amazon_products_reviews"]["stdv"],
-                "amazon_products_ratings_max": data["amazon_products_ratings"]["max"],
-                "amazon_products_ratings_min": data["amazon_products_ratings"]["min"],
-                "amazon_products_ratings_avg": data["amazon_products_ratings"]["avg"],
-                "amazon_products_ratings_stdv": data["amazon_products_ratings"]["stdv"],
-                "amazon_products_bought_max": data["amazon_products_bought"]["max"],
-                "amazon_products_bought_min": data["amazon_products_bought"]["min"],
-                "amazon_products_bought_avg": data["amazon_products_bought"]["avg"],
-                "amazon_products_bought_stdv": data["amazon_products_bought"]["stdv"],
-                "keyword": kw_data["keyword"],
-                "volume": kw_data["volume"],
-                "domains_with_DA_under_30": kw_data["domains_with_DA_under_30"],
-                "da_top_1": kw_data["da_top_1"],
-                "da_top_2": kw_data["da_top_2"],
-                "da_top_3": kw_data["da_top_3"],
-                "da_max": kw_data["da"]["max"],
-                "da_min": kw_data["da"]["min"],
-                "da_avg": kw_data["da"]["avg"],
-                "da_stdv": kw_data["da"]["stdv"],
-                "backlinks_max": kw_data["backlinks"]["max"],
-                "backlinks_min": kw_data["backlinks"]["min"],
-                "backlinks_avg": kw_data["backlinks"]["avg"],
-                "backlinks_stdv": kw_data["backlinks"]["stdv"],
-                "referring_domains_max": kw_data["referring_domains"]["max"],
-                "referring_domains_min": kw_data["referring_domains"]["min"],
-                "referring_domains_avg": kw_data["referring_domains"]["avg"],
-                "referring_domains_stdv": kw_data["referring_domains"]["stdv"],
-                "nofollow_backlinks_max": kw_data["nofollow_backlinks"]["max"],
-                "nofollow_backlinks_min": kw_data["nofollow_backlinks"]["min"],
-                "nofollow_backlinks_avg": kw_data["nofollow_backlinks"]["avg"],
-                "nofollow_backlinks_stdv": kw_data["nofollow_backlinks"]["stdv"],
-                "dofollow_backlinks_max": kw_data["dofollow_backlinks"]["max"],
-                "dofollow_backlinks_min": kw_data["dofollow_backlinks"]["min"],
-                "dofollow_backlinks_avg": kw_data["dofollow_backlinks"]["avg"],
-                "dofollow_backlinks_stdv": kw_data["dofollow_backlinks"]["stdv"],
-            }
-            rows.append(row)
-        return rows
\ No newline at end of file
@@ -1,10 +1,25 @@
+from datetime import datetime
+from typing import Optional
 import inject
 
 from monitoring import Logger, LogTypeEnum
 from app.exceptions import NoDataFromSourceException
+from app.domain.response_reparse_pool import parse_archived_responses
+from app.domain.suggestion_expansion import expand_suggestions
 from app.domain.utils import format_niche_name
 from app.repositories import KeywordsRepository, NichesRepository
-from integrations import UbersuggestAPIClient, OpenAIApiClient
+from database.models import KeywordTypeEnum
+from integrations import GoogleSuggestClient, UbersuggestAPIClient, OpenAIApiClient
+from integrations.constants import ArchiveProviderEnum
+from integrations.response_archive import ResponseArchive
+from integrations.ubersuggest_api.constants import (
+    DEFAULT_MARKET_LANGUAGE,
+    DEFAULT_MARKET_LOCATION_ID,
+)
+from integrations.ubersuggest_api.formatters import format_archived_keyword_report
+
+# The primary keyword of a niche is the niche name with this prefix
+PRIMARY_KEYWORD_PREFIX = "best "
 
 
 class NicheResearch:
@@ -20,12 +35,16 @@ class NicheResearch:
         uberssugest_api_client: UbersuggestAPIClient,
         openai_api_client: OpenAIApiClient,
         logger: Logger,
+        response_archive: ResponseArchive,
+        google_suggest_client: GoogleSuggestClient,
     ):
         self.niches_repository = niches_repository
         self.keywords_repository = keywords_repository
         self.ubersuggest_api_client = uberssugest_api_client
         self.openai_api_client = openai_api_client
         self.logger = logger
+        self.response_archive = response_archive
+        self.google_suggest_client = google_suggest_client
 
     def fetch_data(self, niche: str) -> None:
         """
@@ -37,9 +56,11 @@ class NicheResearch:
         # Prepare niche name
         niche = format_niche_name(niche)
 
-        # If the niche already has keywords, the method returns early without fetching any data
+        # If the niche already has its primary keyword, the method returns early without fetching any data
         db_niche = self.niches_repository.find_or_insert_niche(niche)
-        if len(db_niche.keywords) > 0:
+        if any(
+            keyword.type == KeywordTypeEnum.PRIMARY for keyword in db_niche.keywords
+        ):
             self.logger.notify(
                 f"Data for niche '{niche}' already exists.",
                 LogTypeEnum.DEBUG,
@@ -47,7 +68,7 @@ class NicheResearch:
             return
 
         # Define primary keyword
-        primary_kw = "best " + niche
+        primary_kw = PRIMARY_KEYWORD_PREFIX + niche
 
         # Fetch report for primary keyword
         self.logger.notify(
@@ -72,13 +93,68 @@ class NicheResearch:
             LogTypeEnum.INFO,
         )
 
-        self.keywords_repository.upsert_keyword_report(primary_kw_report, db_niche.id)
+        # Only the write runs in a transaction, so no connection is held during the request
+        with self.keywords_repository.unit_of_work():
+            self.keywords_repository.upsert_keyword_report(
+                primary_kw_report, db_niche.id
+            )
 
         self.logger.notify(
             f"Finished fetching data for '{niche}'",
             LogTypeEnum.SUCCESS,
         )
 
+    def expand_keywords(
+        self, niche: str, depth: int = 1, workers: int = 16, limit: int = 5000
+    ) -> None:
+        """
+        Expands a niche into long-tail keywords through Google suggestions, without spending Ubersuggest quota,
+        and saves them as suggested keywords of the niche.
+
+        Args:
+            niche (str): The niche to expand.
+            depth (int): The number of levels to expand the suggestions. Default is 1.
+            workers (int): The number of suggestion queries running at once. Default is 16.
+            limit (int): The number of keywords after which the expansion stops. Default is 5000.
+        """
+        # Prepare niche name
+        niche = format_niche_name(niche)
+
+        db_niche = self.niches_repository.find_or_insert_niche(niche)
+
+        self.logger.notify(
+            f"Expanding suggestions for niche '{niche}' up to depth {depth}",
+            LogTypeEnum.INFO,
+        )
+        keywords = expand_suggestions(
+            niche,
+            self.google_suggest_client.get_suggestions,
+            lambda query, e: self.logger.notify(
+                f"Error while getting suggestions for '{query}': {str(e)}",
+                LogTypeEnum.WARNING,
+            ),
+            depth,
+            workers,
+            limit,
+        )
+
+        self.logger.notify(
+            f"Saving {len(keywords)} suggested keywords in the database",
+            LogTypeEnum.INFO,
+        )
+        inserted = self.keywords_repository.bulk_insert_suggestion_keywords(
+            niche,
+            keywords,
+            db_niche.id,
+            DEFAULT_MARKET_LANGUAGE,
+            DEFAULT_MARKET_LOCATION_ID,
+        )
+
+        self.logger.notify(
+            f"Finished expanding '{niche}': {len(keywords)} suggested keywords, {inserted} new",
+            LogTypeEnum.SUCCESS,
+        )
+
     def update_niches_amazon_commission_rates(self, force: bool) -> None:
         """
         Update the Amazon commission rates for niches in the database.
@@ -129,7 +205,11 @@ class NicheResearch:
             LogTypeEnum.INFO,
         )
 
-        self.niches_repository.update_niches_amazon_commission_rates(commission_rates)
+        # Only the write runs in a transaction, so no connection is held during the requests
+        with self.niches_repository.unit_of_work():
+            self.niches_repository.update_niches_amazon_commission_rates(
+                commission_rates
+            )
 
         self.logger.notify(
             f"Finished updating Amazon commission rates for niches.",
@@ -149,3 +229,65 @@ class NicheResearch:
 
         for niche in niche_ideas:
             self.fetch_data(niche)
+
+    def refresh_candidate_index(self) -> None:
+        """
+        Rebuilds the niche candidate index from the latest state of every keyword.
+        """
+        self.logger.notify(
+            "Refreshing niche candidate index",
+            LogTypeEnum.INFO,
+        )
+
+        self.niches_repository.refresh_niche_candidate_index()
+
+        self.logger.notify(
+            "Finished refreshing niche candidate index",
+            LogTypeEnum.SUCCESS,
+        )
+
+    def reparse_keyword_reports(
+        self, jobs: int, since: Optional[datetime] = None
+    ) -> None:
+        """
+        Replays the archived keyword reports into the database, parsing them in parallel without network calls.
+        Each report is saved again for the niche of its primary keyword, as a report from the moment it was fetched.
+        Reports already in the database are skipped, so reparsing the same archive twice doesn't duplicate them.
+
+        Args:
+            jobs (int): The number of worker processes parsing the reports.
+            since (Optional[datetime]): If provided, only reports fetched from this moment on are parsed.
+        """
+        entries = self.response_archive.get_responses(
+            ArchiveProviderEnum.UBERSUGGEST_KEYWORD_REPORT, since
+        )
+
+        self.logger.notify(
+            f"Reparsing {len(entries)} archived keyword reports",
+            LogTypeEnum.INFO,
+        )
+
+        skipped = 0
+        for entry, report, error in parse_archived_responses(
+            entries, format_archived_keyword_report, jobs
+        ):
+            if error:
+                self.logger.notify(
+                    f"Error while reparsing report for keyword '{entry.request}': {error}",
+                    LogTypeEnum.ERROR,
+                )
+                continue
+
+            if self.keywords_repository.has_keyword_report(report):
+                skipped += 1
+                continue
+
+            niche = entry.request.removeprefix(PRIMARY_KEYWORD_PREFIX)
+            db_niche = self.niches_repository.find_or_insert_niche(niche)
+            with self.keywords_repository.unit_of_work():
+                self.keywords_repository.upsert_keyword_report(report, db_niche.id)
+
+        self.logger.notify(
+            f"Finished reparsing archived keyword reports, {skipped} already saved",
+            LogTypeEnum.SUCCESS,
+        )
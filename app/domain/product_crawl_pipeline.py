@@ -0,0 +1,157 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from queue import Empty, Full, Queue
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.exceptions import DataFetchError, DataFormatError
+
+# Marks, in the pages queue, that a fetcher has no more niches to fetch
+FETCHER_DONE = object()
+
+
+def crawl_products(
+    niches: List[Any],
+    fetch: Callable[[Any], List[str]],
+    parse: Callable[[List[str]], List[Any]],
+    write: Callable[[List[Tuple[Any, List[Any]]]], None],
+    on_error: Callable[[Any, Exception], None],
+    fetch_workers: int,
+    parse_jobs: int,
+    queue_size: int = 16,
+    batch_size: int = 20,
+) -> None:
+    """
+    Crawls the products of many niches through a pipeline of three stages:
+    fetcher threads download the result pages of each niche, a pool of processes parses them,
+    and the parsed products are written in batches by the calling thread.
+    The stages are connected by bounded buffers, so a slow stage holds back the previous ones
+    instead of piling pages up in memory.
+
+    A niche whose pages can't be fetched, such as when blocked, or can't be parsed
+    is reported to on_error and skipped, while any other error stops the whole crawl and is raised.
+
+    Args:
+        niches (List[Any]): The niches to crawl.
+        fetch (Callable[[Any], List[str]]): A function fetching the HTML of the result pages of a niche. Runs in a fetcher thread.
+        parse (Callable[[List[str]], List[Any]]): A picklable function parsing the result pages of a niche into products.
+            Runs in a worker process.
+        write (Callable[[List[Tuple[Any, List[Any]]]], None]): A function writing a batch of niches with their products.
+        on_error (Callable[[Any, Exception], None]): A function called with each niche skipped and the error that caused it.
+        fetch_workers (int): The number of fetcher threads.
+        parse_jobs (int): The number of worker processes parsing pages.
+        queue_size (int, optional): The number of fetched niches waiting to be parsed at most. Default is 16.
+        batch_size (int, optional): The number of niches written at once. Default is 20.
+    """
+    niches_queue: Queue = Queue()
+    for niche in niches:
+        niches_queue.put(niche)
+    pages_queue: Queue = Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    fetchers = [
+        threading.Thread(
+            target=fetch_niches, args=(niches_queue, pages_queue, fetch, stop)
+        )
+        for _ in range(fetch_workers)
+    ]
+    for fetcher in fetchers:
+        fetcher.start()
+
+    try:
+        with ProcessPoolExecutor(max_workers=parse_jobs) as parsers:
+            parsing: Dict[Future, Any] = {}
+            batch: List[Tuple[Any, List[Any]]] = []
+            running_fetchers = fetch_workers
+
+            while running_fetchers or parsing:
+                # Wait for a parse to finish when enough pages are being parsed, or no more pages will come
+                if len(parsing) >= parse_jobs * 2 or (not running_fetchers and parsing):
+                    done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        niche = parsing.pop(future)
+                        try:
+                            batch.append((niche, future.result()))
+                        except DataFormatError as e:
+                            on_error(niche, e)
+                            continue
+                        if len(batch) == batch_size:
+                            write(batch)
+                            batch = []
+                    continue
+
+                item = pages_queue.get()
+                if item is FETCHER_DONE:
+                    running_fetchers -= 1
+                    continue
+
+                niche, htmls, error = item
+                if isinstance(error, DataFetchError):
+                    on_error(niche, error)
+                    continue
+                if error:
+                    raise error
+                parsing[parsers.submit(parse, htmls)] = niche
+
+            if batch:
+                write(batch)
+    finally:
+        stop.set()
+        for fetcher in fetchers:
+            fetcher.join()
+
+
+def fetch_niches(
+    niches_queue: Queue,
+    pages_queue: Queue,
+    fetch: Callable[[Any], List[str]],
+    stop: threading.Event,
+) -> None:
+    """
+    Fetches the result pages of niches until there are no more niches, or the crawl stops. Runs in a fetcher thread.
+    Blocks while the pages queue is full, which holds fetching back until parsing catches up.
+
+    Args:
+        niches_queue (Queue): The niches left to fetch.
+        pages_queue (Queue): Where each niche is put with its pages, or the error that prevented fetching them.
+        fetch (Callable[[Any], List[str]]): A function fetching the HTML of the result pages of a niche.
+        stop (threading.Event): Set when the crawl stops.
+    """
+    while not stop.is_set():
+        try:
+            niche = niches_queue.get_nowait()
+        except Empty:
+            break
+
+        try:
+            item = (niche, fetch(niche), None)
+        except Exception as e:
+            item = (niche, None, e)
+
+        if not put_unless_stopped(pages_queue, item, stop):
+            return
+
+    put_unless_stopped(pages_queue, FETCHER_DONE, stop)
+
+
+def put_unless_stopped(
+    queue: Queue, item: Any, stop: threading.Event, timeout: float = 0.1
+) -> bool:
+    """
+    Puts an item into a bounded queue, waiting for room unless the crawl stops.
+
+    Args:
+        queue (Queue): The queue.
+        item (Any): The item to put.
+        stop (threading.Event): Set when the crawl stops.
+        timeout (float, optional): How often, in seconds, the stop event is checked while waiting. Default is 0.1.
+
+    Returns:
+        bool: True if the item was put, False if the crawl stopped first.
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=timeout)
+            return True
+        except Full:
+            continue
+    return False
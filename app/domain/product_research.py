@@ -1,10 +1,23 @@
+from datetime import datetime, timedelta
+from functools import partial
+from typing import List, Optional, Tuple
 import inject
 
+from app.domain.product_crawl_pipeline import crawl_products
+from app.domain.response_reparse_pool import parse_archived_responses
 from app.domain.utils import format_niche_name
-from app.exceptions import DataFormatError
+from app.exceptions import DataFetchError, DataFormatError
+from config import Config
 from monitoring import Logger, LogTypeEnum
 from integrations import AmazonSearchClient
+from integrations.amazon_search.formatters import (
+    format_archived_search,
+    format_search_pages,
+)
+from integrations.constants import ArchiveProviderEnum
+from integrations.response_archive import ResponseArchive
 from app.repositories import AmazonProductsRepository, NichesRepository
+from database.models import Niche
 
 
 class ProductResearch:
@@ -19,18 +32,25 @@ class ProductResearch:
         niches_repository: NichesRepository,
         amazon_search_client: AmazonSearchClient,
         logger: Logger,
+        response_archive: ResponseArchive,
+        config: Config,
     ):
         self.amazon_products_repository = amazon_products_repository
         self.niches_repository = niches_repository
         self.amazon_search_client = amazon_search_client
         self.logger = logger
+        self.response_archive = response_archive
+        self.config = config
 
-    def fetch_amazon_products_for_niche(self, niche: str) -> None:
+    def fetch_amazon_products_for_niche(self, niche: str, pages: int = 1) -> None:
         """
         Fetches Amazon products related to the specified niche.
+        Amazon is searched for every keyword of the niche search plan at once,
+        and the products found are merged, each ASIN kept once, before being saved together.
 
         Args:
             niche (str): The niche to fetch products for.
+            pages (int): The number of search result pages to fetch products from. Default is 1.
         """
 
         # Prepare niche name
@@ -39,49 +59,199 @@ class ProductResearch:
         db_niche = self.niches_repository.find_or_insert_niche(niche)
 
         # Live search on amazon
+        keywords = self.__get_search_plan(db_niche)
         self.logger.notify(
-            f"Live search products on Amazon for niche '{niche}'",
+            f"Live search products on Amazon for niche '{niche}' with {len(keywords)} keywords",
             LogTypeEnum.INFO,
         )
-        snapshots = self.amazon_search_client.get_products_for_keyword(niche)
+        snapshots = self.amazon_search_client.get_products_for_keywords(
+            keywords, pages, niche
+        )
 
         # Upsert the snapshots
         self.logger.notify(
             f"Saving data in the database",
             LogTypeEnum.INFO,
         )
-        for snapshot in snapshots:
-            self.amazon_products_repository.upsert_amazon_product(snapshot, db_niche.id)
+        # Only the write runs in a transaction, so no connection is held during the search
+        with self.amazon_products_repository.unit_of_work():
+            self.amazon_products_repository.bulk_upsert_amazon_products(
+                snapshots, db_niche.id
+            )
 
         self.logger.notify(
             f"Finished fetching amazon products for '{niche}'",
             LogTypeEnum.SUCCESS,
         )
 
-    def fetch_amazon_products_for_candidates(self) -> None:
+    def fetch_amazon_products_for_candidates(
+        self,
+        minimum_volume: int = 700,
+        maximum_da: int = 30,
+        max_age_days: Optional[int] = None,
+        pages: int = 1,
+        jobs: int = 0,
+        fetchers: int = 8,
+    ) -> None:
         """
-        Fetches Amazon products for all niche candidates.
+        Fetches Amazon products for the niche candidates that have none yet.
+        Given jobs, the candidates are crawled through a pipeline, where fetcher threads download the pages,
+        worker processes parse them, and the products are saved in batches.
+
+        Args:
+            minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+            maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+            max_age_days (Optional[int]): If provided, candidates whose products were all seen more than
+                this many days ago are fetched again.
+            pages (int): The number of search result pages to fetch products from. Default is 1.
+            jobs (int): If greater than zero, parse the pages with this many worker processes,
+                while fetching them with the given fetcher threads. Default is 0.
+            fetchers (int): The number of fetcher threads, when parsing with worker processes. Default is 8.
         """
 
         self.logger.notify(
-            "Calculating niche candidates",
+            "Calculating niche candidates lacking products",
             LogTypeEnum.INFO,
         )
 
-        niches = self.niches_repository.get_niche_candidates(700, 30)
+        seen_since = (
+            datetime.now() - timedelta(days=max_age_days)
+            if max_age_days is not None
+            else None
+        )
+        niches = self.niches_repository.get_niche_candidates_lacking_products(
+            minimum_volume, maximum_da, seen_since
+        )
+
+        if jobs > 0:
+            self.logger.notify(
+                f"Crawling products for {len(niches)} niches with {fetchers} fetchers and {jobs} parsers",
+                LogTypeEnum.INFO,
+            )
+            crawl_products(
+                niches,
+                lambda niche: self.amazon_search_client.fetch_search_pages_for_keywords(
+                    self.__get_search_plan(niche), pages, niche.name
+                ),
+                partial(format_search_pages, parser=self.config.AMAZON_SEARCH_PARSER),
+                self.__save_products_batch,
+                lambda niche, e: self.logger.notify(
+                    f"Error while fetching products for niche '{niche.name}': {str(e)}",
+                    LogTypeEnum.ERROR,
+                ),
+                fetchers,
+                jobs,
+            )
+            return
 
         for niche in niches:
-            if self.amazon_products_repository.get_amazon_products_for_niche(niche.id):
+            try:
+                self.fetch_amazon_products_for_niche(niche.name, pages)
+            except (DataFetchError, DataFormatError) as e:
                 self.logger.notify(
-                    f"Skipping niche '{niche.name}' because it already has products fetched",
-                    LogTypeEnum.DEBUG,
+                    f"Error while fetching products for niche '{niche.name}': {str(e)}",
+                    LogTypeEnum.ERROR,
                 )
-                continue
 
-            try:
-                self.fetch_amazon_products_for_niche(niche.name)
-            except DataFormatError as e:
+    def reparse_amazon_products(
+        self, jobs: int, since: Optional[datetime] = None
+    ) -> None:
+        """
+        Rebuilds the Amazon products from the archived search pages, parsing them in parallel without network calls.
+        Products are seen at the moment their page was received. They are not appended to the observation history again.
+
+        Args:
+            jobs (int): The number of worker processes parsing the pages.
+            since (Optional[datetime]): If provided, only pages received from this moment on are parsed.
+        """
+        entries = self.response_archive.get_responses(
+            ArchiveProviderEnum.AMAZON_SEARCH, since
+        )
+
+        self.logger.notify(
+            f"Reparsing {len(entries)} archived Amazon search pages",
+            LogTypeEnum.INFO,
+        )
+
+        parse = partial(format_archived_search, parser=self.config.AMAZON_SEARCH_PARSER)
+        for entry, snapshots, error in parse_archived_responses(entries, parse, jobs):
+            if error:
                 self.logger.notify(
-                    f"Error while fetching products for niche '{niche.name}': {str(e)}",
+                    f"Error while reparsing products for niche '{entry.request}': {error}",
                     LogTypeEnum.ERROR,
                 )
+                continue
+
+            db_niche = self.niches_repository.find_or_insert_niche(entry.request)
+            self.amazon_products_repository.bulk_upsert_amazon_products(
+                snapshots, db_niche.id, record_observations=False
+            )
+
+        self.logger.notify(
+            f"Finished reparsing archived Amazon search pages",
+            LogTypeEnum.SUCCESS,
+        )
+
+    def create_observation_partitions(self, months_ahead: int = 12) -> None:
+        """
+        Creates the monthly partitions of the Amazon product observation history ahead of time,
+        moving into their own partition any observations that landed in the default one.
+        Meant to run periodically, such as monthly, so products are never written to the default partition.
+
+        Args:
+            months_ahead (int): The number of months after the current one to create partitions for. Default is 12.
+        """
+        self.logger.notify(
+            f"Creating observation partitions for the next {months_ahead} months",
+            LogTypeEnum.INFO,
+        )
+
+        created = self.amazon_products_repository.create_observations_partitions(
+            months_ahead
+        )
+
+        self.logger.notify(
+            f"Finished creating observation partitions: {len(created)} created",
+            LogTypeEnum.SUCCESS,
+        )
+
+    def __get_search_plan(self, niche: Niche) -> List[str]:
+        """
+        Builds the keywords to search Amazon for a niche: every AMAZON_SEARCH_VARIANTS with the niche name,
+        then the AMAZON_SEARCH_TOP_SUGGESTIONS suggested keywords of the niche with the highest volume.
+        A keyword repeated in the plan is searched once.
+
+        Args:
+            niche (Niche): The niche.
+
+        Returns:
+            List[str]: The keywords to search for, in order.
+        """
+        keywords = [
+            variant.strip().format(niche=niche.name)
+            for variant in self.config.AMAZON_SEARCH_VARIANTS.split(",")
+            if variant.strip()
+        ]
+        if self.config.AMAZON_SEARCH_TOP_SUGGESTIONS > 0:
+            keywords += self.niches_repository.get_top_suggested_keywords(
+                niche.id, self.config.AMAZON_SEARCH_TOP_SUGGESTIONS
+            )
+        return list(dict.fromkeys(keywords))
+
+    def __save_products_batch(self, batch: List[Tuple[Niche, List]]) -> None:
+        """
+        Saves the products of a batch of niches in a single transaction.
+
+        Args:
+            batch (List[Tuple[Niche, List]]): Each niche with its product snapshots.
+        """
+        with self.amazon_products_repository.unit_of_work():
+            for niche, snapshots in batch:
+                self.amazon_products_repository.bulk_upsert_amazon_products(
+                    snapshots, niche.id
+                )
+
+        self.logger.notify(
+            f"Saved products for {len(batch)} niches",
+            LogTypeEnum.INFO,
+        )
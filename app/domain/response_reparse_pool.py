@@ -0,0 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from app.interfaces.dtos.archived_response import ArchivedResponse
+
+
+def parse_archived_responses(
+    entries: List[ArchivedResponse],
+    parse: Callable[[ArchivedResponse], Any],
+    jobs: int,
+    chunk_size: int = 8,
+) -> Iterator[Tuple[ArchivedResponse, Any, Optional[str]]]:
+    """
+    Parses archived responses across a pool of processes, without any network call.
+    Each worker reads and decompresses the responses it parses, and the results are yielded back in the order of the entries.
+    A response that fails to parse does not stop the others.
+
+    Args:
+        entries (List[ArchivedResponse]): The index entries of the responses to parse.
+        parse (Callable[[ArchivedResponse], Any]): A picklable function parsing a single archived response.
+        jobs (int): The number of worker processes.
+        chunk_size (int, optional): The number of responses handled per task. Default is 8.
+
+    Yields:
+        Tuple[ArchivedResponse, Any, Optional[str]]: Each entry, with its parsed result, or the error that prevented it.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(
+            partial(parse_safely, parse), entries, chunksize=chunk_size
+        )
+        for entry, (result, error) in zip(entries, results):
+            yield entry, result, error
+
+
+def parse_safely(
+    parse: Callable[[ArchivedResponse], Any], entry: ArchivedResponse
+) -> Tuple[Any, Optional[str]]:
+    """
+    Parses an archived response in a worker process, returning the error instead of raising it.
+
+    Args:
+        parse (Callable[[ArchivedResponse], Any]): The function parsing the response.
+        entry (ArchivedResponse): The index entry of the response.
+
+    Returns:
+        Tuple[Any, Optional[str]]: The parsed result and None, or None and the error message.
+    """
+    try:
+        return parse(entry), None
+    except Exception as e:
+        return None, str(e)
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import string
+from typing import Callable, List
+
+# Appended to a keyword to get the suggestions starting with each letter and digit after it
+EXPANSION_CHARACTERS = string.ascii_lowercase + string.digits
+# Prepended to the seed to get the questions people ask about it
+QUESTION_PREFIXES = [
+    "how",
+    "what",
+    "which",
+    "why",
+    "where",
+    "when",
+    "who",
+    "can",
+    "is",
+    "are",
+    "does",
+]
+
+
+def expand_suggestions(
+    seed: str,
+    get_suggestions: Callable[[str], List[str]],
+    on_error: Callable[[str, Exception], None],
+    depth: int = 1,
+    workers: int = 16,
+    limit: int = 5000,
+) -> List[str]:
+    """
+    Expands a seed into long-tail keywords by querying suggestions breadth-first.
+    The first level queries the seed followed by every letter and digit, and preceded by every question prefix.
+    Each next level queries the new keywords of the previous one followed by every letter and digit.
+    The queries of a level run concurrently, and a keyword suggested more than once is kept once.
+
+    Args:
+        seed (str): The keyword to expand, such as a niche name.
+        get_suggestions (Callable[[str], List[str]]): A function getting the suggestions for a query. Runs in a worker thread.
+        on_error (Callable[[str, Exception], None]): A function called with each query that failed and its error.
+        depth (int, optional): The number of levels to expand. Default is 1.
+        workers (int, optional): The number of queries running at once. Default is 16.
+        limit (int, optional): The number of keywords after which the expansion stops. Default is 5000.
+
+    Returns:
+        List[str]: The keywords found, normalized, in the order they were found, without the seed.
+    """
+    seed = normalize_keyword(seed)
+    seen = {seed}
+    queried = set()
+    keywords = []
+    frontier = [seed]
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for level in range(depth):
+            queries = [
+                query
+                for keyword in frontier
+                for query in build_expansion_queries(keyword, questions=level == 0)
+                if query not in queried
+            ]
+            queried.update(queries)
+
+            frontier = []
+            results = executor.map(
+                partial(get_suggestions_safely, get_suggestions, on_error), queries
+            )
+            for suggestions in results:
+                for suggestion in map(normalize_keyword, suggestions):
+                    if not suggestion or suggestion in seen:
+                        continue
+                    seen.add(suggestion)
+                    keywords.append(suggestion)
+                    frontier.append(suggestion)
+                    if len(keywords) >= limit:
+                        return keywords
+
+            if not frontier:
+                break
+    finally:
+        # Queries not started yet are no longer needed once the limit is reached
+        executor.shutdown(cancel_futures=True)
+
+    return keywords
+
+
+def build_expansion_queries(keyword: str, questions: bool = False) -> List[str]:
+    """
+    Builds the queries expanding a keyword: the keyword itself, then followed by every letter and digit.
+
+    Args:
+        keyword (str): The keyword to expand.
+        questions (bool, optional): If True, the keyword preceded by every question prefix is queried too. Default is False.
+
+    Returns:
+        List[str]: The queries.
+    """
+    queries = [keyword] + [f"{keyword} {c}" for c in EXPANSION_CHARACTERS]
+    if questions:
+        queries += [f"{prefix} {keyword}" for prefix in QUESTION_PREFIXES]
+    return queries
+
+
+def get_suggestions_safely(
+    get_suggestions: Callable[[str], List[str]],
+    on_error: Callable[[str, Exception], None],
+    query: str,
+) -> List[str]:
+    """
+    Gets the suggestions for a query, reporting the error instead of raising it, so a failed query doesn't stop the others.
+
+    Args:
+        get_suggestions (Callable[[str], List[str]]): The function getting the suggestions.
+        on_error (Callable[[str, Exception], None]): The function called with the query and the error, if it fails.
+        query (str): The query.
+
+    Returns:
+        List[str]: The suggestions, or an empty list if the query failed.
+    """
+    try:
+        return get_suggestions(query)
+    except Exception as e:
+        on_error(query, e)
+        return []
+
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Normalizes a keyword, so the same keyword written differently is kept once.
+
+    Args:
+        keyword (str): The keyword.
+
+    Returns:
+        str: The keyword in lowercase, with single spaces between words.
+    """
+    return " ".join(keyword.lower().split())
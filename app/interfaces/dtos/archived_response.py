@@ -0,0 +1,10 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class ArchivedResponse(BaseModel):
+    provider: str
+    request: str
+    timestamp: datetime
+    sha256: str
+    path: str
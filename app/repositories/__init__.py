@@ -1,3 +1,5 @@
 from .keywords_repository import KeywordsRepository
 from .niches_repository import NichesRepository
-from .amazon_products_repository import AmazonProductsRepository
\ No newline at end of file
+from .amazon_products_repository import AmazonProductsRepository
+from .niche_snapshots_repository import NicheSnapshotsRepository
+from .loading_profiles import LoadingProfileEnum
@@ -1,10 +1,14 @@
 from datetime import datetime
 import inject
 import pytest
-from sqlmodel import select, delete
+from sqlmodel import select, delete, text
 
+from app.exceptions import NotFoundError
 from app.interfaces.dtos.amazon_product_snapshot import AmazonProductSnapshot
-from app.repositories.amazon_products_repository import AmazonProductsRepository
+from app.repositories.amazon_products_repository import (
+    AmazonProductsRepository,
+    add_months,
+)
 from database.connection import DatabaseConnection
 from database.models import AmazonProduct, NicheAmazonProduct, Niche
 
@@ -227,3 +231,208 @@ class TestAmazonProductsRepository:
 
             # Assert
             assert len(product.niches) == 1
+
+    def test_should_bulk_upsert_amazon_products_and_associate_them_with_niche(
+        self,
+        database_connection: DatabaseConnection,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+        niche: Niche,
+    ):
+        # Arrange
+        amazon_products_repository.upsert_amazon_product(
+            amazon_product_snapshot, niche.id
+        )
+        updated_snapshot = amazon_product_snapshot.model_copy(
+            update={"title": "Updated Title", "reviews": 999}
+        )
+        new_snapshot = amazon_product_snapshot.model_copy(update={"asin": "NEWASIN"})
+
+        # Act
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [updated_snapshot, new_snapshot, new_snapshot], niche.id
+        )
+
+        # Assert
+        with database_connection.session() as session:
+            products = session.exec(
+                select(AmazonProduct).order_by(AmazonProduct.asin)
+            ).all()
+            associations = session.exec(select(NicheAmazonProduct)).all()
+
+            assert [p.asin for p in products] == sorted(
+                [amazon_product_snapshot.asin, "NEWASIN"]
+            )
+            updated = next(p for p in products if p.asin != "NEWASIN")
+            assert updated.title == "Updated Title"
+            assert updated.reviews == 999
+            assert len(associations) == 2
+            assert all(a.niche_id == niche.id for a in associations)
+
+    def test_should_raise_not_found_error_when_bulk_upserting_for_non_existing_niche(
+        self,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+    ):
+        # Act & Assert
+        with pytest.raises(NotFoundError):
+            amazon_products_repository.bulk_upsert_amazon_products(
+                [amazon_product_snapshot], 999999
+            )
+
+    def test_should_append_every_upsert_to_the_observation_history(
+        self,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+        niche: Niche,
+    ):
+        # Arrange
+        next_month_snapshot = amazon_product_snapshot.model_copy(
+            update={"price_usd": 80.0, "rating": None, "seen_at": datetime(2021, 2, 3)}
+        )
+
+        # Act
+        amazon_products_repository.upsert_amazon_product(
+            amazon_product_snapshot, niche.id
+        )
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [next_month_snapshot], niche.id
+        )
+
+        # Assert
+        observations = amazon_products_repository.get_amazon_product_observations(
+            amazon_product_snapshot.asin
+        )
+        assert [(o.price_usd, o.rating, o.seen_at) for o in observations] == [
+            (100.0, 4.5, datetime(2021, 1, 1)),
+            (80.0, None, datetime(2021, 2, 3)),
+        ]
+        assert (
+            amazon_products_repository.find_amazon_product(
+                amazon_product_snapshot.asin
+            ).price_usd
+            == 80.0
+        )
+
+    def test_should_return_only_observations_seen_since_the_given_moment(
+        self,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+        niche: Niche,
+    ):
+        # Arrange
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [amazon_product_snapshot], niche.id
+        )
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [amazon_product_snapshot.model_copy(update={"seen_at": datetime(2021, 3, 1)})],
+            niche.id,
+        )
+
+        # Act
+        observations = amazon_products_repository.get_amazon_product_observations(
+            amazon_product_snapshot.asin, since=datetime(2021, 2, 1)
+        )
+
+        # Assert
+        assert [o.seen_at for o in observations] == [datetime(2021, 3, 1)]
+
+    def test_should_not_append_observations_when_bulk_upserting_without_recording_them(
+        self,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+        niche: Niche,
+    ):
+        # Act
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [amazon_product_snapshot], niche.id, record_observations=False
+        )
+
+        # Assert
+        assert amazon_products_repository.find_amazon_product(
+            amazon_product_snapshot.asin
+        )
+        assert (
+            amazon_products_repository.get_amazon_product_observations(
+                amazon_product_snapshot.asin
+            )
+            == []
+        )
+
+    def test_should_append_observations_of_months_without_partition_to_the_default_one(
+        self,
+        database_connection: DatabaseConnection,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+        niche: Niche,
+    ):
+        # Act
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [amazon_product_snapshot.model_copy(update={"seen_at": datetime(1999, 1, 5)})],
+            niche.id,
+        )
+
+        # Assert
+        with database_connection.session() as session:
+            partition = session.exec(
+                text("SELECT to_regclass('amazon_product_observations_1999_01')")
+            ).scalar()
+            in_default = session.exec(
+                text("SELECT count(*) FROM amazon_product_observations_default")
+            ).scalar()
+        assert partition is None
+        assert in_default == 1
+
+    def test_should_create_upcoming_partitions_and_move_default_observations_into_their_own(
+        self,
+        database_connection: DatabaseConnection,
+        amazon_products_repository: AmazonProductsRepository,
+        amazon_product_snapshot: AmazonProductSnapshot,
+        niche: Niche,
+    ):
+        # Arrange
+        amazon_products_repository.bulk_upsert_amazon_products(
+            [amazon_product_snapshot.model_copy(update={"seen_at": datetime(1999, 2, 5)})],
+            niche.id,
+        )
+        today = datetime.now().date().replace(day=1)
+        last_month = add_months(today, 13)
+
+        try:
+            # Act
+            created = amazon_products_repository.create_observations_partitions(13)
+            created_again = amazon_products_repository.create_observations_partitions(
+                13
+            )
+
+            # Assert
+            with database_connection.session() as session:
+                in_partition = session.exec(
+                    text("SELECT count(*) FROM amazon_product_observations_1999_02")
+                ).scalar()
+                in_default = session.exec(
+                    text("SELECT count(*) FROM amazon_product_observations_default")
+                ).scalar()
+            assert created == [
+                "amazon_product_observations_1999_02",
+                f"amazon_product_observations_{last_month:%Y_%m}",
+            ]
+            assert created_again == []
+            assert (in_partition, in_default) == (1, 0)
+            assert [
+                o.seen_at
+                for o in amazon_products_repository.get_amazon_product_observations(
+                    amazon_product_snapshot.asin
+                )
+            ] == [datetime(1999, 2, 5)]
+        finally:
+            with database_connection.session() as session:
+                session.exec(
+                    text("DROP TABLE IF EXISTS amazon_product_observations_1999_02")
+                )
+                session.exec(
+                    text(
+                        f"DROP TABLE IF EXISTS amazon_product_observations_{last_month:%Y_%m}"
+                    )
+                )
+                session.commit()
@@ -1,5 +1,6 @@
 from datetime import datetime
 import inject
+from unittest.mock import patch
 import pytest
 from sqlmodel import delete, select
 from sqlalchemy.orm import joinedload
@@ -10,6 +11,8 @@ from app.repositories.keywords_repository import KeywordsRepository
 from database.connection import DatabaseConnection
 from database.models import (
     Keyword,
+    KeywordLatest,
+    KeywordTypeEnum,
     NicheKeyword,
     MetricsReport,
     Niche,
@@ -169,6 +172,63 @@ class TestKeywordsRepository:
                 "2021-01-02T00:00:00"
             )
 
+    def test_should_store_latest_state_of_keywords_when_upserting_report(
+        self,
+        database_connection: DatabaseConnection,
+        niche: Niche,
+        keywords_respository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert the keyword report
+        keyword = keywords_respository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Assert
+        with database_connection.session() as session:
+            serp_analysis = session.exec(
+                select(SERPAnalysis).where(SERPAnalysis.keyword_id == keyword.id)
+            ).one()
+            keyword_latest = session.get(KeywordLatest, keyword.id)
+            assert keyword_latest.volume == 1000
+            assert keyword_latest.cpc == 0.5
+            assert keyword_latest.serp_analysis_id == serp_analysis.id
+            assert keyword_latest.da_min == 50
+            assert keyword_latest.da_max == 51
+            assert keyword_latest.domains_with_da_under_30 == 0
+            assert keyword_latest.da_top_1 == 50
+            assert keyword_latest.da_top_2 == 51
+            assert keyword_latest.da_top_3 is None
+
+            suggested_keywords_latest = session.exec(
+                select(KeywordLatest).where(KeywordLatest.keyword_id != keyword.id)
+            ).all()
+            assert len(suggested_keywords_latest) == 3
+            assert all(k.serp_analysis_id is None for k in suggested_keywords_latest)
+
+    def test_should_keep_most_recent_report_as_latest_state_when_upserting_older_report(
+        self,
+        database_connection: DatabaseConnection,
+        niche: Niche,
+        keywords_respository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert the keyword report
+        keyword_report.info.updated_at = "2021-01-02T00:00:00"
+        keyword_report.serp_analysis.updated_at = "2021-01-02T00:00:00"
+        keywords_respository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Insert an older keyword report
+        keyword_report.info.updated_at = "2021-01-01T00:00:00"
+        keyword_report.info.volume = 10
+        keyword_report.serp_analysis.updated_at = "2021-01-01T00:00:00"
+        keyword_report.serp_analysis.serp_entries[0].domain_authority = 10
+        keyword = keywords_respository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Assert
+        with database_connection.session() as session:
+            keyword_latest = session.get(KeywordLatest, keyword.id)
+            assert keyword_latest.volume == 1000
+            assert keyword_latest.da_min == 50
+
     def test_should_create_serp_analysis_items_when_upserting_report(
         self,
         database_connection: DatabaseConnection,
@@ -355,3 +415,133 @@ class TestKeywordsRepository:
 
         # Assert
         assert searched_keyword is None
+
+    def test_should_insert_suggestion_set_of_seed_linked_to_niche_when_bulk_inserting_suggestion_keywords(
+        self,
+        database_connection: DatabaseConnection,
+        niche: Niche,
+        keywords_respository: KeywordsRepository,
+    ):
+        # Insert a keyword that already exists
+        with database_connection.session() as session:
+            session.add(
+                Keyword(
+                    keyword="cat toys for kittens",
+                    language="en",
+                    loc_id=2840,
+                    type=KeywordTypeEnum.MATCH,
+                    created_at=datetime.now(),
+                )
+            )
+            session.commit()
+
+        # Bulk insert the suggestions, twice
+        keywords = ["cat toys for kittens", "cat toys feather", "cat toys feather"]
+        inserted = keywords_respository.bulk_insert_suggestion_keywords(
+            "cat toys", keywords, niche.id, "en", 2840
+        )
+        inserted_again = keywords_respository.bulk_insert_suggestion_keywords(
+            "cat toys", keywords, niche.id, "en", 2840
+        )
+
+        # Assert
+        assert (inserted, inserted_again) == (1, 0)
+        with database_connection.session() as session:
+            niche_keywords = session.exec(
+                select(Keyword.keyword, Keyword.type)
+                .join(NicheKeyword, NicheKeyword.keyword_id == Keyword.id)
+                .where(NicheKeyword.niche_id == niche.id)
+            ).all()
+            suggested_keywords = session.exec(
+                select(Keyword.keyword, Keyword.type)
+                .join(
+                    SuggestionSetKeyword, SuggestionSetKeyword.keyword_id == Keyword.id
+                )
+                .order_by(SuggestionSetKeyword.suggestion_set_id, Keyword.keyword)
+            ).all()
+
+        assert niche_keywords == [("cat toys", KeywordTypeEnum.SUGGESTION)]
+        assert suggested_keywords == [
+            ("cat toys feather", KeywordTypeEnum.SUGGESTION),
+            ("cat toys for kittens", KeywordTypeEnum.MATCH),
+        ] * 2
+
+    def test_should_raise_exception_when_bulk_inserting_suggestion_keywords_for_non_existing_niche(
+        self, keywords_respository: KeywordsRepository
+    ):
+        with pytest.raises(NotFoundError):
+            keywords_respository.bulk_insert_suggestion_keywords(
+                "cat toys", ["cat toys feather"], 9999, "en", 2840
+            )
+
+    def test_should_link_and_promote_existing_keyword_when_upserting_it_as_primary_report(
+        self,
+        database_connection: DatabaseConnection,
+        niche: Niche,
+        keywords_respository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # The primary keyword was suggested before, for another seed
+        keywords_respository.bulk_insert_suggestion_keywords(
+            "cat toys", [keyword_report.info.keyword], niche.id, "en", 2840
+        )
+
+        # Insert the keyword report
+        keyword = keywords_respository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Assert
+        with database_connection.session() as session:
+            niche_keywords = session.exec(
+                select(Keyword.keyword, Keyword.type)
+                .join(NicheKeyword, NicheKeyword.keyword_id == Keyword.id)
+                .where(NicheKeyword.niche_id == niche.id)
+                .order_by(Keyword.keyword)
+            ).all()
+
+        assert keyword.type == KeywordTypeEnum.PRIMARY
+        assert niche_keywords == [
+            ("cat toys", KeywordTypeEnum.SUGGESTION),
+            (keyword_report.info.keyword, KeywordTypeEnum.PRIMARY),
+        ]
+
+    def test_should_find_keyword_report_only_from_the_moment_it_was_updated(
+        self,
+        niche: Niche,
+        keywords_respository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Check before and after inserting the keyword report
+        had_report = keywords_respository.has_keyword_report(keyword_report)
+        keywords_respository.upsert_keyword_report(keyword_report, niche.id)
+        has_report = keywords_respository.has_keyword_report(keyword_report)
+        keyword_report.info.updated_at = datetime(2030, 1, 1)
+        has_newer_report = keywords_respository.has_keyword_report(keyword_report)
+
+        # Assert
+        assert (had_report, has_report, has_newer_report) == (False, True, False)
+
+    def test_should_roll_back_ingest_when_refreshing_candidate_index_fails(
+        self,
+        database_connection: DatabaseConnection,
+        niche: Niche,
+        keywords_respository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Make the candidate index refresh fail
+        with patch.object(
+            keywords_respository.niches_repo,
+            "refresh_niche_candidate_index",
+            side_effect=Exception("refresh failed"),
+        ):
+            with pytest.raises(Exception, match="refresh failed"):
+                keywords_respository.upsert_keyword_report(keyword_report, niche.id)
+            with pytest.raises(Exception, match="refresh failed"):
+                keywords_respository.bulk_insert_suggestion_keywords(
+                    "cat toys", ["cat toys feather"], niche.id, "en", 2840
+                )
+
+        # Assert
+        with database_connection.session() as session:
+            assert session.exec(select(Keyword)).all() == []
+            assert session.exec(select(MetricsReport)).all() == []
+            assert session.exec(select(SuggestionSet)).all() == []
@@ -0,0 +1,116 @@
+from datetime import datetime
+import inject
+import pytest
+from sqlmodel import delete, select
+
+from app.repositories.niche_snapshots_repository import NicheSnapshotsRepository
+from database.connection import DatabaseConnection
+from database.models import Niche, NicheSnapshot, NicheSnapshotRow
+
+
+class TestNicheSnapshotsRepository:
+
+    @pytest.fixture(scope="class")
+    def database_connection(self):
+        return inject.instance(DatabaseConnection)
+
+    @pytest.fixture(scope="class")
+    def niche_snapshots_repository(self):
+        return NicheSnapshotsRepository()
+
+    @pytest.fixture
+    def niches(self, database_connection: DatabaseConnection):
+        with database_connection.session() as session:
+            niches = [
+                Niche(name="Test Niche 1", created_at=datetime.now()),
+                Niche(name="Test Niche 2", created_at=datetime.now()),
+            ]
+            session.add_all(niches)
+            session.commit()
+            for niche in niches:
+                session.refresh(niche)
+            return niches
+
+    @pytest.fixture(autouse=True)
+    def clean_tables(self, database_connection: DatabaseConnection):
+        yield
+        with database_connection.session() as session:
+            session.exec(delete(NicheSnapshotRow))
+            session.exec(delete(NicheSnapshot))
+            session.exec(delete(Niche))
+            session.commit()
+
+    def test_should_store_a_snapshot_with_its_watermark_for_every_niche_provided(
+        self,
+        niche_snapshots_repository: NicheSnapshotsRepository,
+        niches: list[Niche],
+    ):
+        watermarks = {niches[0].id: datetime(2024, 1, 1), niches[1].id: None}
+
+        # Store snapshots, with rows only for the first niche
+        niche_snapshots_repository.replace_niche_snapshots(
+            700, 30, watermarks, [{"niche": "Test Niche 1", "keyword": "a"}]
+        )
+
+        # Assert
+        assert (
+            niche_snapshots_repository.get_snapshotted_watermarks(700, 30)
+            == watermarks
+        )
+        assert niche_snapshots_repository.get_snapshotted_watermarks(1000, 30) == {}
+
+    def test_should_return_stored_rows_in_order_with_current_niche_data(
+        self,
+        database_connection: DatabaseConnection,
+        niche_snapshots_repository: NicheSnapshotsRepository,
+        niches: list[Niche],
+    ):
+        rows = [
+            {"niche": "Test Niche 1", "amazon_commission_rate": None, "keyword": "a"},
+            {"niche": "Test Niche 1", "amazon_commission_rate": None, "keyword": "b"},
+            {"niche": "Test Niche 2", "amazon_commission_rate": None, "keyword": "c"},
+        ]
+        niche_snapshots_repository.replace_niche_snapshots(
+            700, 30, {niches[0].id: None, niches[1].id: None}, rows, batch_size=2
+        )
+
+        # Update the commission rate after the snapshot was stored
+        with database_connection.session() as session:
+            niche = session.exec(select(Niche).where(Niche.id == niches[1].id)).one()
+            niche.amazon_commission_rate = 4.5
+            session.add(niche)
+            session.commit()
+
+        # Assert
+        assert list(niche_snapshots_repository.get_snapshot_rows(700, 30)) == [
+            {"niche": "Test Niche 1", "amazon_commission_rate": None, "keyword": "a"},
+            {"niche": "Test Niche 1", "amazon_commission_rate": None, "keyword": "b"},
+            {"niche": "Test Niche 2", "amazon_commission_rate": 4.5, "keyword": "c"},
+        ]
+
+    def test_should_replace_only_the_snapshots_of_the_niches_provided(
+        self,
+        niche_snapshots_repository: NicheSnapshotsRepository,
+        niches: list[Niche],
+    ):
+        niche_snapshots_repository.replace_niche_snapshots(
+            700,
+            30,
+            {niches[0].id: None, niches[1].id: None},
+            [
+                {"niche": "Test Niche 1", "keyword": "a"},
+                {"niche": "Test Niche 2", "keyword": "b"},
+            ],
+        )
+
+        # Replace the snapshot of the first niche only
+        niche_snapshots_repository.replace_niche_snapshots(
+            700,
+            30,
+            {niches[0].id: datetime(2024, 1, 1)},
+            [{"niche": "Test Niche 1", "keyword": "c"}],
+        )
+
+        # Assert
+        rows = list(niche_snapshots_repository.get_snapshot_rows(700, 30))
+        assert [row["keyword"] for row in rows] == ["c", "b"]
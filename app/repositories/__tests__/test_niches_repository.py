@@ -1,12 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import inject
 import pytest
-from sqlmodel import select, delete
+from sqlalchemy import event
+from sqlmodel import func, select, delete
 
+from app.domain.candidate_statistics_pool import calculate_candidates_snapshot_rows
+from app.interfaces.dtos.keyword_report import KeywordReport
 from app.interfaces.dtos.niche_amazon_commission import NicheAmazonCommission
+from app.repositories.keywords_repository import KeywordsRepository
+from app.repositories.loading_profiles import LoadingProfileEnum
 from app.repositories.niches_repository import NichesRepository
 from database.connection import DatabaseConnection
-from database.models import Niche
+from database.models import (
+    AmazonProduct,
+    Keyword,
+    MetricsReport,
+    Niche,
+    NicheAmazonProduct,
+    NicheCandidateIndex,
+    NicheKeyword,
+    SERPAnalysis,
+    SERPAnalysisItem,
+    SuggestionSet,
+    SuggestionSetKeyword,
+)
 
 
 class TestNichesRepository:
@@ -19,10 +37,23 @@ class TestNichesRepository:
     def niches_repository(self):
         return NichesRepository()
 
+    @pytest.fixture(scope="class")
+    def keywords_repository(self):
+        return KeywordsRepository()
+
     @pytest.fixture(autouse=True)
     def clean_niche_table(self, database_connection: DatabaseConnection):
         yield
         with database_connection.session() as session:
+            session.exec(delete(SERPAnalysisItem))
+            session.exec(delete(SERPAnalysis))
+            session.exec(delete(SuggestionSetKeyword))
+            session.exec(delete(SuggestionSet))
+            session.exec(delete(MetricsReport))
+            session.exec(delete(NicheAmazonProduct))
+            session.exec(delete(AmazonProduct))
+            session.exec(delete(NicheKeyword))
+            session.exec(delete(Keyword))
             session.exec(delete(Niche))
             session.commit()
 
@@ -118,6 +149,30 @@ class TestNichesRepository:
             assert existing_niche == niche
             assert len(niches) == 1
 
+    def test_should_insert_a_single_niche_when_creating_concurrently_with_the_same_name(
+        self,
+        database_connection: DatabaseConnection,
+        niches_repository: NichesRepository,
+    ):
+        # Insert the same niche from several threads at once
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            niches = list(
+                executor.map(
+                    lambda _: niches_repository.find_or_insert_niche("Test Niche"),
+                    range(16),
+                )
+            )
+
+        # Select the niches with the provided name
+        with database_connection.session() as session:
+            db_niches = session.exec(
+                select(Niche).where(Niche.name == "Test Niche")
+            ).all()
+
+        # Assert
+        assert len(db_niches) == 1
+        assert all(niche.id == db_niches[0].id for niche in niches)
+
     def test_should_return_all_niches_names_when_getting_all(
         self,
         database_connection: DatabaseConnection,
@@ -232,3 +287,321 @@ class TestNichesRepository:
 
             assert db_niche1.amazon_commission_rate == 4.5
             assert db_niche2.amazon_commission_rate == 2.5
+
+    def test_should_return_suggested_keywords_with_highest_volume_when_getting_top_suggested_keywords(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a niche with a keyword report suggesting three keywords with the same volume
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keyword_report.suggestions[2].volume = 2000
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Get the top suggested keywords
+        keywords = niches_repository.get_top_suggested_keywords(niche.id, 2)
+
+        # Assert
+        assert keywords == ["match suggestion 3", "match suggestion 1"]
+
+    def test_should_return_snapshot_rows_for_keywords_of_candidate_niches(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a niche with a keyword report whose top SERP DAs are 50 and 51
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Get the snapshot rows
+        rows = list(niches_repository.get_candidates_snapshot_rows(1000, 50))
+
+        # Assert
+        assert len(rows) == 1
+        assert rows[0]["niche"] == "Test Niche"
+        assert rows[0]["keyword"] == "test keyword"
+        assert rows[0]["volume"] == 1000
+        assert rows[0]["domains_with_DA_under_30"] == 0
+        assert rows[0]["da_top_1"] == 50
+        assert rows[0]["da_top_2"] == 51
+        assert rows[0]["da_top_3"] is None
+        assert rows[0]["da_max"] == 51
+        assert rows[0]["da_min"] == 50
+        assert rows[0]["da_avg"] == 50.5
+        assert rows[0]["da_stdv"] == 0
+        assert rows[0]["da_p25"] == 50.25
+        assert rows[0]["da_p90"] == 50.9
+        assert rows[0]["amazon_products_price_max"] is None
+
+    def test_should_return_same_snapshot_rows_for_given_niches_as_for_all_niches(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert two candidate niches with keyword reports of different keywords
+        niche1 = niches_repository.find_or_insert_niche("Test Niche 1")
+        niche2 = niches_repository.find_or_insert_niche("Test Niche 2")
+        keywords_repository.upsert_keyword_report(keyword_report, niche1.id)
+        other_report = keyword_report.model_copy(deep=True)
+        other_report.info.keyword = "other keyword"
+        keywords_repository.upsert_keyword_report(other_report, niche2.id)
+
+        # Get the snapshot rows of all niches and of the second one only
+        rows = list(niches_repository.get_candidates_snapshot_rows(1000, 50))
+        scoped_rows = list(
+            niches_repository.get_candidates_snapshot_rows(1000, 50, [niche2.id])
+        )
+
+        # Assert
+        assert [row["keyword"] for row in scoped_rows] == ["other keyword"]
+        assert scoped_rows == [row for row in rows if row["niche"] == "Test Niche 2"]
+        assert scoped_rows[0]["da_max"] == 51
+
+    def test_should_not_return_snapshot_rows_for_niches_that_are_not_candidates(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a niche with a keyword report whose top SERP DAs are 50 and 51
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Get the snapshot rows with thresholds the niche doesn't meet
+        rows_by_da = list(niches_repository.get_candidates_snapshot_rows(1000, 49))
+        rows_by_volume = list(niches_repository.get_candidates_snapshot_rows(1001, 50))
+
+        # Assert
+        assert rows_by_da == []
+        assert rows_by_volume == []
+
+    def test_should_return_only_candidates_among_given_niches_when_getting_niche_candidates(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a candidate niche and a niche without keywords
+        niche1 = niches_repository.find_or_insert_niche("Test Niche 1")
+        niche2 = niches_repository.find_or_insert_niche("Test Niche 2")
+        keywords_repository.upsert_keyword_report(keyword_report, niche1.id)
+
+        # Get the candidates among each niche
+        candidates1 = niches_repository.get_niche_candidates(1000, 50, [niche1.id])
+        candidates2 = niches_repository.get_niche_candidates(1000, 50, [niche2.id])
+
+        # Assert
+        assert [candidate.id for candidate in candidates1] == [niche1.id]
+        assert candidates2 == []
+
+    def test_should_return_same_rows_as_database_when_calculating_snapshot_rows_in_worker_processes(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a candidate niche with a keyword report whose top SERP DAs are 50 and 51
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Report one of its suggested keywords too, so the niche reaches it both directly and through a suggestion set
+        suggestion_report = keyword_report.model_copy(deep=True)
+        suggestion_report.info.keyword = "match suggestion 1"
+        suggestion_report.suggestions = []
+        keywords_repository.upsert_keyword_report(suggestion_report, niche.id)
+
+        # Get the snapshot rows from the database and from the worker processes
+        database_rows = list(niches_repository.get_candidates_snapshot_rows(1000, 50))
+        worker_rows = list(
+            calculate_candidates_snapshot_rows([niche.id], 1000, 50, jobs=2)
+        )
+
+        # Assert
+        assert [row["keyword"] for row in database_rows] == [
+            "test keyword",
+            "match suggestion 1",
+        ]
+        assert worker_rows == database_rows
+
+    def test_should_return_candidates_meeting_thresholds_when_getting_niche_candidates(
+        self,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a niche with a keyword report of volume 1000 whose lowest top SERP DA is 50
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Get the candidates for different thresholds
+        candidates = niches_repository.get_niche_candidates(1000, 50)
+        candidates_by_volume = niches_repository.get_niche_candidates(1001, 50)
+        candidates_by_da = niches_repository.get_niche_candidates(1000, 49)
+
+        # Assert
+        assert [candidate.id for candidate in candidates] == [niche.id]
+        assert candidates_by_volume == []
+        assert candidates_by_da == []
+
+    def test_should_return_only_candidates_without_fresh_products_when_getting_those_lacking_products(
+        self,
+        database_connection: DatabaseConnection,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a candidate niche, get it while it has no products, then add one seen on 2024-01-01
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+        lacking_before = niches_repository.get_niche_candidates_lacking_products(
+            1000, 50
+        )
+        with database_connection.session() as session:
+            db_niche = session.get(Niche, niche.id)
+            db_niche.amazon_products.append(
+                AmazonProduct(
+                    asin="ASIN1",
+                    title="Test Product",
+                    price_usd=10.0,
+                    is_sponsored=False,
+                    seen_at=datetime(2024, 1, 1),
+                )
+            )
+            session.commit()
+
+        # Get the candidates lacking products, without and with a staleness cutoff
+        lacking = niches_repository.get_niche_candidates_lacking_products(1000, 50)
+        lacking_fresh = niches_repository.get_niche_candidates_lacking_products(
+            1000, 50, datetime(2023, 12, 1)
+        )
+        lacking_or_stale = niches_repository.get_niche_candidates_lacking_products(
+            1000, 50, datetime(2024, 2, 1)
+        )
+
+        # Assert
+        assert [candidate.id for candidate in lacking_before] == [niche.id]
+        assert lacking == []
+        assert lacking_fresh == []
+        assert [candidate.id for candidate in lacking_or_stale] == [niche.id]
+
+    def test_should_rebuild_candidate_index_when_refreshing_it_fully(
+        self,
+        database_connection: DatabaseConnection,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a candidate niche and empty its candidate index
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keyword = keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+        with database_connection.session() as session:
+            session.exec(delete(NicheCandidateIndex))
+            session.commit()
+
+        # Refresh the whole index
+        niches_repository.refresh_niche_candidate_index()
+
+        # Assert
+        with database_connection.session() as session:
+            index_rows = session.exec(select(NicheCandidateIndex)).all()
+            assert [(row.niche_id, row.keyword_id) for row in index_rows] == [
+                (niche.id, keyword.id)
+            ]
+            assert index_rows[0].volume == 1000
+            assert index_rows[0].da_min == 50
+
+    def test_should_load_snapshot_profile_in_same_number_of_queries_regardless_of_niches_size(
+        self,
+        database_connection: DatabaseConnection,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        # Insert a candidate niche and count the queries to load and calculate its statistics
+        niche1 = niches_repository.find_or_insert_niche("Test Niche 1")
+        keywords_repository.upsert_keyword_report(keyword_report, niche1.id)
+        event.listen(database_connection.engine, "before_cursor_execute", count_statement)
+        try:
+            for candidate in niches_repository.get_niche_candidates(
+                1000, 50, profile=LoadingProfileEnum.SNAPSHOT
+            ):
+                niches_repository.get_statistics_for_candidate(candidate)
+            statements_for_one_niche = len(statements)
+
+            # Insert another candidate niche with more keywords and count again
+            niche2 = niches_repository.find_or_insert_niche("Test Niche 2")
+            for keyword in ["other keyword", "another keyword"]:
+                keyword_report.info.keyword = keyword
+                keywords_repository.upsert_keyword_report(keyword_report, niche2.id)
+            statements.clear()
+            candidates = niches_repository.get_niche_candidates(
+                1000, 50, profile=LoadingProfileEnum.SNAPSHOT
+            )
+            for candidate in candidates:
+                niches_repository.get_statistics_for_candidate(candidate)
+        finally:
+            event.remove(
+                database_connection.engine, "before_cursor_execute", count_statement
+            )
+
+        # Assert
+        assert len(candidates) == 2
+        assert len(statements) == statements_for_one_niche
+
+    def test_should_return_latest_source_timestamp_as_watermark_of_each_niche(
+        self,
+        database_connection: DatabaseConnection,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a niche with a keyword report and a niche with no data
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        empty_niche = niches_repository.find_or_insert_niche("Empty Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Get the watermarks
+        watermarks = niches_repository.get_niches_source_watermarks()
+
+        # Assert, as the primary and suggested keywords were created after their reports
+        with database_connection.session() as session:
+            last_created_at = session.exec(select(func.max(Keyword.created_at))).one()
+        assert watermarks == {niche.id: last_created_at, empty_niche.id: None}
+
+    def test_should_move_watermark_when_existing_keywords_are_suggested_for_niche(
+        self,
+        database_connection: DatabaseConnection,
+        niches_repository: NichesRepository,
+        keywords_repository: KeywordsRepository,
+        keyword_report: KeywordReport,
+    ):
+        # Insert a niche with a keyword report
+        niche = niches_repository.find_or_insert_niche("Test Niche")
+        keywords_repository.upsert_keyword_report(keyword_report, niche.id)
+
+        # Suggest keywords that already exist for the niche, so no keyword is created
+        with database_connection.session() as session:
+            existing_keywords = session.exec(select(Keyword.keyword)).all()
+        keywords_repository.bulk_insert_suggestion_keywords(
+            keyword_report.info.keyword, existing_keywords, niche.id, "en", 2840
+        )
+
+        # Get the watermarks
+        watermarks = niches_repository.get_niches_source_watermarks()
+
+        # Assert
+        with database_connection.session() as session:
+            last_suggested_at = session.exec(
+                select(func.max(SuggestionSet.created_at))
+            ).one()
+            last_created_at = session.exec(select(func.max(Keyword.created_at))).one()
+        assert last_suggested_at > last_created_at
+        assert watermarks == {niche.id: last_suggested_at}
@@ -1,18 +1,42 @@
+import csv
+import datetime
+import io
 import inject
-from sqlmodel import select
+from typing import List, Optional
+from sqlmodel import Session, select
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 
 from app.exceptions import NotFoundError
 from app.interfaces.dtos.amazon_product_snapshot import AmazonProductSnapshot
 from database.connection import DatabaseConnection
-from database.models import AmazonProduct, Niche, NicheAmazonProduct
+from database.models import (
+    AmazonProduct,
+    AmazonProductObservation,
+    Niche,
+    NicheAmazonProduct,
+)
 from .niches_repository import NichesRepository
 from .base_repository import BaseRepository
 
 
+OBSERVATION_COLUMNS = [
+    "asin",
+    "price_usd",
+    "rating",
+    "reviews",
+    "bought_last_month",
+    "is_sponsored",
+    "seen_at",
+]
+
+
 class AmazonProductsRepository(BaseRepository):
     """
     Repository class for managing Amazon products in the database.
+    Amazon products hold the latest state of each product, while every snapshot is also
+    appended to the amazon_product_observations history.
     """
 
     @inject.autoparams()
@@ -92,6 +116,8 @@ class AmazonProductsRepository(BaseRepository):
 
             try:
                 session.add(product)
+                session.flush()
+                self.__append_observations(session, [snapshot])
                 session.commit()
                 session.refresh(product)
                 return product
@@ -99,6 +125,76 @@ class AmazonProductsRepository(BaseRepository):
                 session.rollback()
                 raise e
 
+    def bulk_upsert_amazon_products(
+        self,
+        snapshots: List[AmazonProductSnapshot],
+        niche_id: int,
+        record_observations: bool = True,
+    ) -> None:
+        """
+        Inserts or updates many Amazon products at once, and associates them with a niche,
+        with one statement for the products and one for the associations, in a single transaction.
+        If a product appears more than once, its last snapshot is kept.
+
+        Args:
+            snapshots (List[AmazonProductSnapshot]): The snapshots containing products data to upsert.
+            niche_id (int): The ID of the niche associated with the products.
+            record_observations (bool, optional): Whether to append the snapshots to the observation history. Default is True.
+
+        Raises:
+            NotFoundError: If the niche doesn't exist.
+            Exception: If an error occurs during the upsert process.
+        """
+        products = {
+            snapshot.asin: {
+                "asin": snapshot.asin,
+                "title": snapshot.title,
+                "is_sponsored": snapshot.is_sponsored,
+                "price_usd": snapshot.price_usd,
+                "rating": snapshot.rating,
+                "reviews": snapshot.reviews,
+                "bought_last_month": snapshot.bought_last_month,
+                "seen_at": snapshot.seen_at,
+            }
+            for snapshot in snapshots
+        }
+
+        with self.conn.session() as session:
+            if not session.get(Niche, niche_id):
+                raise NotFoundError(f"Niche with ID {niche_id} not found.")
+
+            if not products:
+                return
+
+            try:
+                statement = insert(AmazonProduct).values(list(products.values()))
+                session.exec(
+                    statement.on_conflict_do_update(
+                        index_elements=[AmazonProduct.asin],
+                        set_={
+                            column: statement.excluded[column]
+                            for column in next(iter(products.values()))
+                            if column != "asin"
+                        },
+                    )
+                )
+                session.exec(
+                    insert(NicheAmazonProduct)
+                    .values(
+                        [
+                            {"niche_id": niche_id, "amazon_product_asin": asin}
+                            for asin in products
+                        ]
+                    )
+                    .on_conflict_do_nothing()
+                )
+                if record_observations:
+                    self.__append_observations(session, snapshots)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
     def get_amazon_products_for_niche(self, niche_id: int) -> list[AmazonProduct]:
         """
         Gets all Amazon products associated with a niche.
@@ -120,3 +216,155 @@ class AmazonProductsRepository(BaseRepository):
                 .where(Niche.id == niche_id)
             )
             return session.exec(statement).all()
+
+    def get_amazon_product_observations(
+        self, asin: str, since: Optional[datetime.datetime] = None
+    ) -> List[AmazonProductObservation]:
+        """
+        Gets the observation history of an Amazon product, oldest first.
+
+        Args:
+            asin (str): The ASIN of the product.
+            since (Optional[datetime.datetime]): If given, only observations seen from this moment on are returned.
+
+        Returns:
+            List[AmazonProductObservation]: The observations of the product.
+        """
+        with self.conn.session() as session:
+            statement = (
+                select(AmazonProductObservation)
+                .where(AmazonProductObservation.asin == asin)
+                .order_by(AmazonProductObservation.seen_at)
+            )
+            if since:
+                statement = statement.where(AmazonProductObservation.seen_at >= since)
+            return session.exec(statement).all()
+
+    def create_observations_partitions(self, months_ahead: int = 12) -> List[str]:
+        """
+        Creates the monthly partitions of the observation history ahead of time, so writes never create them.
+        Covers the current month and the given number of months after it, along with every month
+        whose observations landed in the default partition, which are moved into their own partition.
+
+        Args:
+            months_ahead (int, optional): The number of months after the current one to create partitions for. Default is 12.
+
+        Returns:
+            List[str]: The names of the partitions created.
+        """
+        table = AmazonProductObservation.__tablename__
+        today = datetime.date.today()
+        current_month = datetime.date(today.year, today.month, 1)
+        months = {add_months(current_month, i) for i in range(months_ahead + 1)}
+
+        with self.conn.session() as session:
+            try:
+                # Writers wait until the partitions are created, so no observation lands in the default partition meanwhile
+                session.exec(text(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE"))
+                months.update(
+                    session.exec(
+                        text(
+                            f"SELECT DISTINCT date_trunc('month', seen_at)::date FROM {table}_default"
+                        )
+                    ).scalars()
+                )
+                created = [
+                    f"{table}_{month:%Y_%m}"
+                    for month in sorted(months)
+                    if self.__create_observations_partition(session, month)
+                ]
+                session.commit()
+                return created
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def __append_observations(
+        self, session: Session, snapshots: List[AmazonProductSnapshot]
+    ) -> None:
+        """
+        Appends snapshots to the observation history with a single COPY, within the session's transaction.
+        Snapshots from a month without a partition yet land in the default partition.
+
+        Args:
+            session (Session): The session whose transaction the observations are written in.
+            snapshots (List[AmazonProductSnapshot]): The snapshots to append.
+        """
+        if not snapshots:
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for snapshot in snapshots:
+            writer.writerow(
+                [
+                    "" if getattr(snapshot, column) is None else getattr(snapshot, column)
+                    for column in OBSERVATION_COLUMNS
+                ]
+            )
+        buffer.seek(0)
+
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {AmazonProductObservation.__tablename__} "
+                f"({', '.join(OBSERVATION_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def __create_observations_partition(
+        self, session: Session, month: datetime.date
+    ) -> bool:
+        """
+        Creates the partition of the observation history for a month, if it doesn't exist yet,
+        moving into it the observations of that month that landed in the default partition.
+
+        Args:
+            session (Session): The session to create the partition with.
+            month (datetime.date): The first day of the month.
+
+        Returns:
+            bool: True if the partition was created.
+        """
+        table = AmazonProductObservation.__tablename__
+        partition = f"{table}_{month:%Y_%m}"
+        if session.exec(text(f"SELECT to_regclass('{partition}')")).scalar():
+            return False
+
+        next_month = add_months(month, 1)
+        month_range = (
+            f"seen_at >= '{month.isoformat()}' AND seen_at < '{next_month.isoformat()}'"
+        )
+        session.exec(
+            text(
+                f"CREATE TEMP TABLE moved_observations ON COMMIT DROP AS "
+                f"SELECT * FROM {table}_default WHERE {month_range}"
+            )
+        )
+        session.exec(text(f"DELETE FROM {table}_default WHERE {month_range}"))
+        session.exec(
+            text(
+                f"CREATE TABLE {partition} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            )
+        )
+        session.exec(text(f"INSERT INTO {table} SELECT * FROM moved_observations"))
+        session.exec(text("DROP TABLE moved_observations"))
+        return True
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """
+    Adds a number of months to the first day of a month.
+
+    Args:
+        month (datetime.date): The first day of the month.
+        months (int): The number of months to add.
+
+    Returns:
+        datetime.date: The first day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
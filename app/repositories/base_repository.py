@@ -12,3 +12,12 @@ class BaseRepository(ABC):
     @inject.autoparams()
     def __init__(self, conn: DatabaseConnection):
         self.conn = conn
+
+    def unit_of_work(self):
+        """
+        Opens a unit of work, in which every repository call shares the same session and transaction.
+
+        Returns:
+            ContextManager[Session]: The unit of work, yielding its session.
+        """
+        return self.conn.unit_of_work()
@@ -1,18 +1,25 @@
 import inject
 from functional import seq
 from datetime import datetime
-from sqlmodel import select
-from sqlalchemy.orm import joinedload
+from typing import List
+from sqlmodel import Session, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
 
 from app.exceptions import NotFoundError
 from app.interfaces.dtos.keyword_report import KeywordReport
 from database.connection import DatabaseConnection
 from database.models import (
     Keyword,
+    KeywordLatest,
+    KeywordTypeEnum,
     MetricsReport,
+    Niche,
+    NicheKeyword,
     SERPAnalysisItem,
     SERPAnalysis,
     SuggestionSet,
+    SuggestionSetKeyword,
 )
 from .base_repository import BaseRepository
 from .niches_repository import NichesRepository
@@ -49,7 +56,8 @@ class KeywordsRepository(BaseRepository):
         if not db_niche:
             raise NotFoundError(f"Niche with ID {niche_id} not found.")
 
-        with self.conn.session() as session:
+        # The candidate index is refreshed in the same transaction, so it never lags behind the ingest
+        with self.unit_of_work() as session:
 
             # Check if the keyword already exists in the database
             keyword = self.find_keyword(
@@ -121,34 +129,36 @@ class KeywordsRepository(BaseRepository):
             )
 
             # For every suggested keyword, upsert the keyword, create the metrics
-            # report and add it to the suggestion set
-            for sk in keyword_report.suggestions:
-                suggestion_keyword = self.find_keyword(
-                    sk.keyword, sk.language, sk.loc_id
-                )
-
-                if not suggestion_keyword:
-                    suggestion_keyword = Keyword(
-                        keyword=sk.keyword,
-                        language=sk.language,
-                        loc_id=sk.loc_id,
-                        type=sk.type,
-                        created_at=datetime.now(),
+            # report and add it to the suggestion set. Looking them up must not flush
+            # the new keyword, which is only added to the session once complete
+            with session.no_autoflush:
+                for sk in keyword_report.suggestions:
+                    suggestion_keyword = self.find_keyword(
+                        sk.keyword, sk.language, sk.loc_id
                     )
 
-                suggestion_metrics_report = MetricsReport(
-                    competition=sk.competition,
-                    volume=sk.volume,
-                    cpc=sk.cpc,
-                    cpc_dollars=sk.cpc_dollars,
-                    sd=sk.sd,
-                    pd=sk.pd,
-                    created_at=sk.updated_at,
-                    keyword=suggestion_keyword,
-                )
+                    if not suggestion_keyword:
+                        suggestion_keyword = Keyword(
+                            keyword=sk.keyword,
+                            language=sk.language,
+                            loc_id=sk.loc_id,
+                            type=sk.type,
+                            created_at=datetime.now(),
+                        )
 
-                suggestion_keyword.metrics_reports.append(suggestion_metrics_report)
-                suggestion_set.suggested_keywords.append(suggestion_keyword)
+                    suggestion_metrics_report = MetricsReport(
+                        competition=sk.competition,
+                        volume=sk.volume,
+                        cpc=sk.cpc,
+                        cpc_dollars=sk.cpc_dollars,
+                        sd=sk.sd,
+                        pd=sk.pd,
+                        created_at=sk.updated_at,
+                        keyword=suggestion_keyword,
+                    )
+
+                    suggestion_keyword.metrics_reports.append(suggestion_metrics_report)
+                    suggestion_set.suggested_keywords.append(suggestion_keyword)
 
             # Establish relationships between the entities
             serp_analysis.analysis_items = serp_analysis_items
@@ -156,15 +166,157 @@ class KeywordsRepository(BaseRepository):
             keyword.serp_analyses.append(serp_analysis)
             keyword.suggestion_sets.append(suggestion_set)
 
+            # A keyword reported as the primary one of a niche may already exist, such as when it was suggested before
+            if keyword_report.info.type == KeywordTypeEnum.PRIMARY.value:
+                keyword.type = KeywordTypeEnum.PRIMARY
+
             try:
                 session.add(keyword)
+                session.flush()
+                session.exec(
+                    insert(NicheKeyword)
+                    .values(niche_id=niche_id, keyword_id=keyword.id)
+                    .on_conflict_do_nothing()
+                )
+                keyword_ids = [keyword.id] + [
+                    sk.id for sk in suggestion_set.suggested_keywords
+                ]
+                self.__refresh_keywords_latest(session, keyword_ids)
+                # The candidacy of the niches related to these keywords may have changed
+                self.niches_repo.refresh_niche_candidate_index(keyword_ids)
                 session.commit()
                 session.refresh(keyword)
-                return keyword
             except Exception as e:
                 session.rollback()
                 raise e
 
+        return keyword
+
+    def bulk_insert_suggestion_keywords(
+        self,
+        seed: str,
+        keywords: List[str],
+        niche_id: int,
+        language: str,
+        loc_id: int,
+    ) -> int:
+        """
+        Inserts keywords suggested for a seed of a niche in bulk, as a new suggestion set of the seed keyword.
+        The seed keyword is linked to the niche, so the niche reaches the suggested keywords through it,
+        like it reaches the suggestions of its primary keyword.
+        Keywords not in the database yet are inserted as SUGGESTION keywords without metrics.
+        Everything is written in a single transaction, along with the refresh of the candidate index.
+
+        Args:
+            seed (str): The keyword the suggestions were expanded from, such as the niche name.
+            keywords (List[str]): The suggested keywords.
+            niche_id (int): The ID of the niche the keywords were suggested for.
+            language (str): The language of the keywords.
+            loc_id (int): The location ID of the keywords.
+
+        Returns:
+            int: The number of suggested keywords inserted.
+
+        Raises:
+            NotFoundError: If the niche does not exist.
+        """
+        keywords = [keyword for keyword in dict.fromkeys(keywords) if keyword != seed]
+
+        # The candidate index is refreshed in the same transaction, so it never lags behind the ingest
+        with self.unit_of_work() as session:
+            try:
+                if not session.get(Niche, niche_id):
+                    raise NotFoundError(f"Niche with ID {niche_id} not found.")
+
+                statement = select(Keyword.keyword, Keyword.id).where(
+                    Keyword.keyword.in_([seed] + keywords),
+                    Keyword.language == language,
+                    Keyword.loc_id == loc_id,
+                )
+                keyword_ids = dict(session.exec(statement).all())
+
+                missing = [
+                    keyword for keyword in [seed] + keywords if keyword not in keyword_ids
+                ]
+                if missing:
+                    created_at = datetime.now()
+                    statement = (
+                        insert(Keyword)
+                        .values(
+                            [
+                                {
+                                    "keyword": keyword,
+                                    "language": language,
+                                    "loc_id": loc_id,
+                                    "type": KeywordTypeEnum.SUGGESTION,
+                                    "created_at": created_at,
+                                }
+                                for keyword in missing
+                            ]
+                        )
+                        .returning(Keyword.id)
+                    )
+                    inserted_ids = session.exec(statement).scalars().all()
+                    keyword_ids.update(zip(missing, inserted_ids))
+
+                # Link the seed keyword to the niche, and the suggestions to the seed
+                session.exec(
+                    insert(NicheKeyword)
+                    .values(niche_id=niche_id, keyword_id=keyword_ids[seed])
+                    .on_conflict_do_nothing()
+                )
+                suggestion_set_id = session.exec(
+                    insert(SuggestionSet)
+                    .values(keyword_id=keyword_ids[seed], created_at=datetime.now())
+                    .returning(SuggestionSet.id)
+                ).scalar_one()
+                if keywords:
+                    session.exec(
+                        insert(SuggestionSetKeyword).values(
+                            [
+                                {
+                                    "suggestion_set_id": suggestion_set_id,
+                                    "keyword_id": keyword_ids[keyword],
+                                }
+                                for keyword in keywords
+                            ]
+                        )
+                    )
+
+                # The candidacy of the niches related to these keywords may have changed
+                self.niches_repo.refresh_niche_candidate_index(
+                    list(keyword_ids.values())
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+        return len([keyword for keyword in missing if keyword != seed])
+
+    def has_keyword_report(self, keyword_report: KeywordReport) -> bool:
+        """
+        Check whether a keyword report is already in the database, by the keyword and the moment it was updated.
+
+        Args:
+            keyword_report (KeywordReport): The keyword report to check.
+
+        Returns:
+            bool: True if the keyword already has a metrics report from that moment.
+        """
+        with self.conn.session() as session:
+            statement = (
+                select(MetricsReport.id)
+                .join(Keyword, Keyword.id == MetricsReport.keyword_id)
+                .where(
+                    Keyword.keyword == keyword_report.info.keyword,
+                    Keyword.language == keyword_report.info.language,
+                    Keyword.loc_id == keyword_report.info.loc_id,
+                    MetricsReport.created_at == keyword_report.info.updated_at,
+                )
+            )
+            return session.exec(statement).first() is not None
+
     def find_keyword(self, keyword: str, language: str, loc_id: int) -> Keyword:
         """
         Find a keyword in the database based on the given parameters.
@@ -180,9 +332,9 @@ class KeywordsRepository(BaseRepository):
         with self.conn.session() as session:
             statement = (
                 select(Keyword)
-                .options(joinedload(Keyword.metrics_reports))
-                .options(joinedload(Keyword.serp_analyses))
-                .options(joinedload(Keyword.suggestion_sets))
+                .options(selectinload(Keyword.metrics_reports))
+                .options(selectinload(Keyword.serp_analyses))
+                .options(selectinload(Keyword.suggestion_sets))
                 .where(
                     Keyword.keyword == keyword,
                     Keyword.language == language,
@@ -190,3 +342,115 @@ class KeywordsRepository(BaseRepository):
                 )
             )
             return session.exec(statement).first()
+
+    def __refresh_keywords_latest(self, session: Session, keyword_ids: List[int]):
+        """
+        Recalculate the latest state of the given keywords within the ongoing transaction of the session.
+        The latest metrics report and SERP analysis of each keyword are picked by their creation date.
+
+        Args:
+            session (Session): The session of the ongoing transaction.
+            keyword_ids (List[int]): The IDs of the keywords to refresh.
+        """
+        latest_metrics = (
+            select(
+                MetricsReport.keyword_id,
+                MetricsReport.volume,
+                MetricsReport.cpc,
+                MetricsReport.sd,
+                MetricsReport.pd,
+            )
+            .where(MetricsReport.keyword_id.in_(keyword_ids))
+            .distinct(MetricsReport.keyword_id)
+            .order_by(
+                MetricsReport.keyword_id,
+                MetricsReport.created_at.desc(),
+                MetricsReport.id.desc(),
+            )
+            .subquery("latest_metrics")
+        )
+
+        latest_serp = (
+            select(SERPAnalysis.keyword_id, SERPAnalysis.id)
+            .where(SERPAnalysis.keyword_id.in_(keyword_ids))
+            .distinct(SERPAnalysis.keyword_id)
+            .order_by(
+                SERPAnalysis.keyword_id,
+                SERPAnalysis.created_at.desc(),
+                SERPAnalysis.id.desc(),
+            )
+            .subquery("latest_serp")
+        )
+
+        top_items = (
+            select(
+                SERPAnalysisItem.serp_analysis_id,
+                SERPAnalysisItem.domain_authority,
+                func.row_number()
+                .over(
+                    partition_by=SERPAnalysisItem.serp_analysis_id,
+                    order_by=(SERPAnalysisItem.position, SERPAnalysisItem.id),
+                )
+                .label("rank"),
+            )
+            .join(latest_serp, SERPAnalysisItem.serp_analysis_id == latest_serp.c.id)
+            .where(SERPAnalysisItem.position <= 10)
+            .subquery("top_items")
+        )
+
+        da = top_items.c.domain_authority
+        serp_stats = (
+            select(
+                top_items.c.serp_analysis_id,
+                func.min(da).label("da_min"),
+                func.max(da).label("da_max"),
+                func.count().filter(da <= 30).label("domains_with_da_under_30"),
+                func.max(da).filter(top_items.c.rank == 1).label("da_top_1"),
+                func.max(da).filter(top_items.c.rank == 2).label("da_top_2"),
+                func.max(da).filter(top_items.c.rank == 3).label("da_top_3"),
+            )
+            .group_by(top_items.c.serp_analysis_id)
+            .subquery("serp_stats")
+        )
+
+        source = (
+            select(
+                Keyword.id,
+                latest_metrics.c.volume,
+                latest_metrics.c.cpc,
+                latest_metrics.c.sd,
+                latest_metrics.c.pd,
+                latest_serp.c.id,
+                serp_stats.c.da_min,
+                serp_stats.c.da_max,
+                serp_stats.c.domains_with_da_under_30,
+                serp_stats.c.da_top_1,
+                serp_stats.c.da_top_2,
+                serp_stats.c.da_top_3,
+            )
+            .outerjoin(latest_metrics, latest_metrics.c.keyword_id == Keyword.id)
+            .outerjoin(latest_serp, latest_serp.c.keyword_id == Keyword.id)
+            .outerjoin(serp_stats, serp_stats.c.serp_analysis_id == latest_serp.c.id)
+            .where(Keyword.id.in_(keyword_ids))
+        )
+
+        columns = [
+            "keyword_id",
+            "volume",
+            "cpc",
+            "sd",
+            "pd",
+            "serp_analysis_id",
+            "da_min",
+            "da_max",
+            "domains_with_da_under_30",
+            "da_top_1",
+            "da_top_2",
+            "da_top_3",
+        ]
+        statement = insert(KeywordLatest).from_select(columns, source)
+        statement = statement.on_conflict_do_update(
+            index_elements=[KeywordLatest.keyword_id],
+            set_={column: statement.excluded[column] for column in columns[1:]},
+        )
+        session.exec(statement)
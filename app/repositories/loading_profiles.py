@@ -0,0 +1,56 @@
+from enum import Enum
+from typing import List
+from sqlalchemy.orm import selectinload
+
+from database.models import Keyword, KeywordLatest, Niche, SERPAnalysis, SuggestionSet
+
+
+class LoadingProfileEnum(Enum):
+    """
+    Named sets of relationships eagerly loaded together with niches.
+    Every relationship is loaded with selectinload, so a profile always issues one query per
+    relationship level, no matter how many niches, keywords or SERP items are loaded.
+    """
+
+    # The niche keywords
+    MINIMAL = "minimal"
+    # The niche keywords and their suggested keywords, with their latest state
+    CANDIDATE = "candidate"
+    # Everything the candidate statistics are calculated from: the candidate profile
+    # plus the items of the latest SERP analyses and the niche Amazon products
+    SNAPSHOT = "snapshot"
+
+
+def get_niche_loading_options(profile: LoadingProfileEnum) -> List:
+    """
+    Builds the loader options of a loading profile for statements selecting niches.
+
+    Args:
+        profile (LoadingProfileEnum): The loading profile.
+
+    Returns:
+        List: The loader options to pass to the statement options.
+    """
+    keywords = selectinload(Niche.keywords)
+    if profile == LoadingProfileEnum.MINIMAL:
+        return [keywords]
+
+    suggested_keywords = keywords.selectinload(Keyword.suggestion_sets).selectinload(
+        SuggestionSet.suggested_keywords
+    )
+    keywords_latest = [
+        keywords.selectinload(Keyword.latest),
+        suggested_keywords.selectinload(Keyword.latest),
+    ]
+    if profile == LoadingProfileEnum.CANDIDATE:
+        return keywords_latest
+
+    return [
+        *[
+            latest.selectinload(KeywordLatest.serp_analysis).selectinload(
+                SERPAnalysis.analysis_items
+            )
+            for latest in keywords_latest
+        ],
+        selectinload(Niche.amazon_products),
+    ]
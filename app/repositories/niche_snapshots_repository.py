@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+from sqlmodel import delete, insert, select
+
+from database.models import Niche, NicheSnapshot, NicheSnapshotRow
+from .base_repository import BaseRepository
+
+
+class NicheSnapshotsRepository(BaseRepository):
+    """
+    Repository class for managing the stored per-niche snapshot rows in the database.
+    Snapshots are stored per pair of candidate thresholds, together with the source
+    watermark they were computed from.
+    """
+
+    def get_snapshotted_watermarks(
+        self, minimum_volume: int, maximum_da: int
+    ) -> Dict[int, Optional[datetime]]:
+        """
+        Get the source watermark of every niche that has a stored snapshot for the given thresholds.
+
+        Args:
+            minimum_volume (int): The minimum volume threshold of the snapshots.
+            maximum_da (int): The maximum DA threshold of the snapshots.
+
+        Returns:
+            dict: The source watermark of each snapshotted niche by niche ID.
+        """
+        with self.conn.session() as session:
+            statement = select(
+                NicheSnapshot.niche_id, NicheSnapshot.source_watermark
+            ).where(
+                NicheSnapshot.minimum_volume == minimum_volume,
+                NicheSnapshot.maximum_da == maximum_da,
+            )
+            return dict(session.exec(statement).all())
+
+    def replace_niche_snapshots(
+        self,
+        minimum_volume: int,
+        maximum_da: int,
+        watermarks: Dict[int, Optional[datetime]],
+        rows: Iterable[dict],
+        batch_size: int = 1000,
+    ) -> None:
+        """
+        Replaces the stored snapshots of the given niches in a single transaction.
+        Every niche in watermarks gets a snapshot, even if it has no rows (i.e. it is not a candidate).
+
+        Args:
+            minimum_volume (int): The minimum volume threshold of the snapshots.
+            maximum_da (int): The maximum DA threshold of the snapshots.
+            watermarks (dict): The source watermark each niche was computed from, by niche ID.
+            rows (Iterable[dict]): The snapshot rows of the niches, identified by their "niche" name.
+            batch_size (int, optional): The number of rows inserted per statement. Default is 1000.
+        """
+        if not watermarks:
+            return
+
+        with self.conn.session() as session:
+            try:
+                session.exec(
+                    delete(NicheSnapshot).where(
+                        NicheSnapshot.niche_id.in_(watermarks.keys()),
+                        NicheSnapshot.minimum_volume == minimum_volume,
+                        NicheSnapshot.maximum_da == maximum_da,
+                    )
+                )
+
+                computed_at = datetime.now()
+                snapshot_ids = session.exec(
+                    insert(NicheSnapshot).returning(
+                        NicheSnapshot.niche_id, NicheSnapshot.id
+                    ),
+                    params=[
+                        {
+                            "niche_id": niche_id,
+                            "minimum_volume": minimum_volume,
+                            "maximum_da": maximum_da,
+                            "source_watermark": watermark,
+                            "computed_at": computed_at,
+                        }
+                        for niche_id, watermark in watermarks.items()
+                    ],
+                ).all()
+                snapshot_ids = dict(snapshot_ids)
+
+                niche_ids = dict(
+                    session.exec(
+                        select(Niche.name, Niche.id).where(
+                            Niche.id.in_(watermarks.keys())
+                        )
+                    ).all()
+                )
+
+                batch = []
+                for position, row in enumerate(rows):
+                    batch.append(
+                        {
+                            "niche_snapshot_id": snapshot_ids[niche_ids[row["niche"]]],
+                            "position": position,
+                            "data": row,
+                        }
+                    )
+                    if len(batch) >= batch_size:
+                        session.exec(insert(NicheSnapshotRow), params=batch)
+                        batch = []
+                if batch:
+                    session.exec(insert(NicheSnapshotRow), params=batch)
+
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+
+    def get_snapshot_rows(self, minimum_volume: int, maximum_da: int) -> Iterator[dict]:
+        """
+        Get the stored snapshot rows for the given thresholds, streamed in niche and keyword order.
+        The niche name and commission rate are read from the niche itself, so they are always current.
+
+        Args:
+            minimum_volume (int): The minimum volume threshold of the snapshots.
+            maximum_da (int): The maximum DA threshold of the snapshots.
+
+        Yields:
+            dict: A flat row with the niche, products and keyword statistics.
+        """
+        statement = (
+            select(NicheSnapshotRow.data, Niche.name, Niche.amazon_commission_rate)
+            .join(NicheSnapshot, NicheSnapshot.id == NicheSnapshotRow.niche_snapshot_id)
+            .join(Niche, Niche.id == NicheSnapshot.niche_id)
+            .where(
+                NicheSnapshot.minimum_volume == minimum_volume,
+                NicheSnapshot.maximum_da == maximum_da,
+            )
+            .order_by(Niche.id, NicheSnapshotRow.position)
+        )
+        with self.conn.session() as session:
+            result = session.exec(
+                statement.execution_options(stream_results=True, yield_per=1000)
+            )
+            for data, name, amazon_commission_rate in result:
+                yield data | {
+                    "niche": name,
+                    "amazon_commission_rate": amazon_commission_rate,
+                }
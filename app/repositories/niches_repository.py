@@ -1,13 +1,48 @@
 from datetime import datetime
-from typing import List
-from sqlmodel import select
-from sqlalchemy.orm import joinedload
-from functional import seq
-import statistics
-
+from typing import Dict, Iterator, List, Optional
+from sqlmodel import delete, select
+from sqlalchemy import Float, case, cast, exists, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.descriptive_statistics import (
+    DESCRIPTIVE_STATISTICS,
+    PERCENTILES,
+    calculate_descriptive_statistics,
+    to_masked_array,
+)
 from app.interfaces.dtos.niche_amazon_commission import NicheAmazonCommission
-from database.models import Niche, Keyword
+from database.models import (
+    AmazonProduct,
+    Keyword,
+    KeywordLatest,
+    KeywordTypeEnum,
+    MetricsReport,
+    Niche,
+    NicheAmazonProduct,
+    NicheCandidateIndex,
+    NicheKeyword,
+    SERPAnalysis,
+    SERPAnalysisItem,
+    SuggestionSet,
+    SuggestionSetKeyword,
+)
 from .base_repository import BaseRepository
+from .loading_profiles import LoadingProfileEnum, get_niche_loading_options
+
+# Statistics calculated for the niche products and the keywords SERP items, by attribute
+AMAZON_PRODUCTS_STATISTICS_KEYS = {
+    "amazon_products_price": "price_usd",
+    "amazon_products_reviews": "reviews",
+    "amazon_products_ratings": "rating",
+    "amazon_products_bought": "bought_last_month",
+}
+SERP_ANALYSIS_ITEMS_STATISTICS_KEYS = {
+    "da": "domain_authority",
+    "backlinks": "backlinks",
+    "referring_domains": "referring_domains",
+    "nofollow_backlinks": "nofollow_backlinks",
+    "dofollow_backlinks": "dofollow_backlinks",
+}
 
 
 class NichesRepository(BaseRepository):
@@ -15,28 +50,36 @@ class NichesRepository(BaseRepository):
     Repository class for managing niches in the database.
     """
 
-    def find_niche_by_id(self, id: int) -> Niche:
+    def find_niche_by_id(
+        self, id: int, profile: LoadingProfileEnum = LoadingProfileEnum.MINIMAL
+    ) -> Niche:
         """
         Find a niche in the database by id.
 
         Args:
             id (int): The ID of the niche to search for.
+            profile (LoadingProfileEnum, optional): The relationships to load with the niche. Default is MINIMAL.
 
         Returns:
             Niche: The found niche object, or None if not found.
         """
         with self.conn.session() as session:
             statement = (
-                select(Niche).options(joinedload(Niche.keywords)).where(Niche.id == id)
+                select(Niche)
+                .options(*get_niche_loading_options(profile))
+                .where(Niche.id == id)
             )
             return session.exec(statement).first()
 
-    def find_niche(self, name: str) -> Niche:
+    def find_niche(
+        self, name: str, profile: LoadingProfileEnum = LoadingProfileEnum.MINIMAL
+    ) -> Niche:
         """
         Find a niche in the database based its name.
 
         Args:
             name (str): The niche name.
+            profile (LoadingProfileEnum, optional): The relationships to load with the niche. Default is MINIMAL.
 
         Returns:
             Niche: The found niche object, or None if not found.
@@ -44,7 +87,7 @@ class NichesRepository(BaseRepository):
         with self.conn.session() as session:
             statement = (
                 select(Niche)
-                .options(joinedload(Niche.keywords))
+                .options(*get_niche_loading_options(profile))
                 .where(Niche.name == name)
             )
             return session.exec(statement).first()
@@ -53,6 +96,8 @@ class NichesRepository(BaseRepository):
         """
         Find a niche in the database based on its name,
         or insert a new niche if it doesn't exist.
+        Runs as a single atomic upsert, so concurrent callers always
+        end up with the same niche row.
 
         Args:
             name (str): The niche name.
@@ -65,22 +110,20 @@ class NichesRepository(BaseRepository):
         """
         with self.conn.session() as session:
             try:
-                db_niche = self.find_niche(name)
-                if db_niche:
-                    return db_niche
-                niche = Niche(
-                    name=name,
-                    created_at=datetime.now(),
-                )
-                session.add(niche)
+                statement = insert(Niche).values(name=name, created_at=datetime.now())
+                # The no-op update makes RETURNING yield the id of an existing row too
+                statement = statement.on_conflict_do_update(
+                    index_elements=[Niche.name],
+                    set_={"name": statement.excluded.name},
+                ).returning(Niche.id)
+                niche_id = session.exec(statement).scalar_one()
                 session.commit()
-                session.refresh(niche)
-                niche.keywords = []
-                return niche
             except Exception as e:
                 session.rollback()
                 raise e
 
+        return self.find_niche_by_id(niche_id)
+
     def get_all_niches_names(self) -> List[str]:
         """
         Get the names of all niches in the database.
@@ -89,7 +132,34 @@ class NichesRepository(BaseRepository):
             list[str]: A list of niche names.
         """
         with self.conn.session() as session:
-            statement = select(Niche.name)
+            statement = select(Niche.name).order_by(Niche.id)
+            return session.exec(statement).all()
+
+    def get_top_suggested_keywords(self, niche_id: int, limit: int) -> List[str]:
+        """
+        Get the suggested keywords of a niche with the highest volume.
+        Suggested keywords are the niche keywords that are not its primary ones.
+
+        Args:
+            niche_id (int): The ID of the niche.
+            limit (int): The maximum number of keywords to get.
+
+        Returns:
+            list[str]: The keywords, from the highest volume to the lowest.
+        """
+        niche_keywords = self.__build_niche_keywords_subquery()
+        with self.conn.session() as session:
+            statement = (
+                select(Keyword.keyword)
+                .join(niche_keywords, niche_keywords.c.keyword_id == Keyword.id)
+                .outerjoin(KeywordLatest, KeywordLatest.keyword_id == Keyword.id)
+                .where(
+                    niche_keywords.c.niche_id == niche_id,
+                    Keyword.type.is_distinct_from(KeywordTypeEnum.PRIMARY),
+                )
+                .order_by(KeywordLatest.volume.desc().nulls_last(), Keyword.keyword)
+                .limit(limit)
+            )
             return session.exec(statement).all()
 
     def get_niches_names_with_no_amazon_commission_rate(self) -> List[str]:
@@ -100,7 +170,11 @@ class NichesRepository(BaseRepository):
             list[str]: A list of niche names.
         """
         with self.conn.session() as session:
-            statement = select(Niche.name).where(Niche.amazon_commission_rate == None)
+            statement = (
+                select(Niche.name)
+                .where(Niche.amazon_commission_rate == None)
+                .order_by(Niche.id)
+            )
             return session.exec(statement).all()
 
     def update_niches_amazon_commission_rates(
@@ -126,230 +200,566 @@ class NichesRepository(BaseRepository):
             session.commit()
             return updated_niches
 
-    def get_niche_candidates(self, minimum_volume: int, maximum_da: int) -> List[Niche]:
+    def get_niche_candidates(
+        self,
+        minimum_volume: int,
+        maximum_da: int,
+        niche_ids: Optional[List[int]] = None,
+        profile: LoadingProfileEnum = LoadingProfileEnum.MINIMAL,
+    ) -> List[Niche]:
         """
         Get a list of niche candidates based on the specified criteria.
 
         Args:
             minimum_volume (int): The minimum volume at least one keyword of the niche should have.
             maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+            niche_ids (List[int], optional): If provided, only these niches are considered.
+            profile (LoadingProfileEnum, optional): The relationships to load with the niches. Default is MINIMAL.
+
+        Returns:
+            List[Niche]: A list of niche objects.
+        """
+        candidate_niche_ids = self.__build_candidate_niche_ids_statement(
+            minimum_volume, maximum_da
+        )
+
+        with self.conn.session() as session:
+            statement = (
+                select(Niche)
+                .options(*get_niche_loading_options(profile))
+                .where(Niche.id.in_(candidate_niche_ids))
+                .order_by(Niche.id)
+            )
+            if niche_ids is not None:
+                statement = statement.where(Niche.id.in_(niche_ids))
+            return session.exec(statement).all()
+
+    def get_niche_candidates_lacking_products(
+        self,
+        minimum_volume: int,
+        maximum_da: int,
+        seen_since: Optional[datetime] = None,
+    ) -> List[Niche]:
+        """
+        Get the niche candidates whose Amazon products need to be fetched, i.e. the ones without products,
+        or, given a staleness cutoff, without any product seen since then.
+
+        Args:
+            minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+            maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+            seen_since (datetime, optional): If provided, niches whose products were all seen before this moment
+                are considered stale and are returned as well.
 
         Returns:
             List[Niche]: A list of niche objects.
         """
+        candidate_niche_ids = self.__build_candidate_niche_ids_statement(
+            minimum_volume, maximum_da
+        )
+
+        fresh_products = exists().where(NicheAmazonProduct.niche_id == Niche.id)
+        if seen_since is not None:
+            fresh_products = fresh_products.where(
+                AmazonProduct.asin == NicheAmazonProduct.amazon_product_asin,
+                AmazonProduct.seen_at >= seen_since,
+            )
+
+        with self.conn.session() as session:
+            statement = (
+                select(Niche)
+                .where(Niche.id.in_(candidate_niche_ids), ~fresh_products)
+                .order_by(Niche.id)
+            )
+            return session.exec(statement).all()
+
+    def refresh_niche_candidate_index(
+        self, keyword_ids: Optional[List[int]] = None
+    ) -> None:
+        """
+        Refresh the candidate index, which holds the latest volume and lowest top 10 DA
+        of every keyword of each niche, so candidates can be selected for any thresholds with an index scan.
+
+        Args:
+            keyword_ids (List[int], optional): If provided, only the niches related to these keywords are refreshed.
+                Otherwise, the whole index is rebuilt.
+
+        Raises:
+            Exception: If an error occurs during the refresh process.
+        """
+        niche_keywords = self.__build_niche_keywords_subquery()
+        source = (
+            select(
+                niche_keywords.c.niche_id,
+                niche_keywords.c.keyword_id,
+                KeywordLatest.volume,
+                KeywordLatest.da_min,
+            )
+            .join(
+                KeywordLatest, KeywordLatest.keyword_id == niche_keywords.c.keyword_id
+            )
+            .where(KeywordLatest.volume != None, KeywordLatest.da_min != None)
+        )
+        statement = delete(NicheCandidateIndex)
+
+        if keyword_ids is not None:
+            related_niche_keywords = self.__build_niche_keywords_subquery()
+            related_niche_ids = select(related_niche_keywords.c.niche_id).where(
+                related_niche_keywords.c.keyword_id.in_(keyword_ids)
+            )
+            source = source.where(niche_keywords.c.niche_id.in_(related_niche_ids))
+            statement = statement.where(
+                NicheCandidateIndex.niche_id.in_(related_niche_ids)
+            )
+
         with self.conn.session() as session:
-            niches = session.exec(select(Niche)).all()
-            return (
-                seq(niches)
-                .filter(
-                    lambda niche: self.__check_if_niche_is_valid_candidate(
-                        niche, minimum_volume, maximum_da
+            try:
+                session.exec(statement)
+                session.exec(
+                    insert(NicheCandidateIndex).from_select(
+                        ["niche_id", "keyword_id", "volume", "da_min"], source
                     )
                 )
-                .to_list()
-            )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
 
     def get_statistics_for_candidate(self, niche: Niche):
         """
         For a given niche, calculate the statistics for it and its keywords.
 
         Args:
-            niche (Niche): The niche to calculate statistics for.
+            niche (Niche): The niche to calculate statistics for, loaded with the SNAPSHOT profile.
 
         Returns:
             dict: A dictionary containing the calculated statistics.
         """
+        amazon_products = [
+            p
+            for p in niche.amazon_products
+            if p.is_sponsored == False and p.rating is not None and p.rating >= 4.0
+        ]
+
+        # A keyword reached both directly and through a suggestion set is kept once,
+        # and keywords are ordered by ID, like in get_candidates_snapshot_rows
+        keywords = {}
+        for k in niche.keywords:
+            keywords[k.id] = k
+            for ss in k.suggestion_sets:
+                keywords.update((sk.id, sk) for sk in ss.suggested_keywords)
+        keywords = [keywords[keyword_id] for keyword_id in sorted(keywords)]
+
+        products_statistics = {
+            name: self.__calculate_descriptive_statistics([amazon_products], key)[0]
+            for name, key in AMAZON_PRODUCTS_STATISTICS_KEYS.items()
+        }
+
+        statistics = {
+            "niche": niche.name,
+            "amazon_commission_rate": niche.amazon_commission_rate,
+            **products_statistics,
+            "keywords": self.__get_statistics_for_candidate_keywords(keywords),
+        }
+
+        return statistics
+
+    def get_candidates_snapshot_rows(
+        self,
+        minimum_volume: int,
+        maximum_da: int,
+        niche_ids: Optional[List[int]] = None,
+    ) -> Iterator[dict]:
+        """
+        Select the niche candidates and calculate the statistics for them and their keywords
+        in a single query, yielding one row per candidate keyword as the database streams them.
+
+        Args:
+            minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+            maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+            niche_ids (List[int], optional): If provided, only these niches are considered.
+
+        Yields:
+            dict: A flat row with the niche, products and keyword statistics.
+        """
+        statement = self.__build_candidates_snapshot_statement(
+            minimum_volume, maximum_da, niche_ids
+        )
         with self.conn.session() as session:
-            session.add(niche)
-            amazon_products = [
-                p
-                for p in niche.amazon_products
-                if p.is_sponsored == False and p.rating is not None and p.rating >= 4.0
-            ]
+            result = session.exec(
+                statement.execution_options(stream_results=True, yield_per=1000)
+            )
+            for row in result.mappings():
+                yield dict(row)
 
-            keywords_statistics = []
-            for k in niche.keywords:
-                keyword_statistics = self.__get_statistics_for_candidate_keyword(k)
-                if keyword_statistics:
-                    keywords_statistics.append(keyword_statistics)
-
-                for ss in k.suggestion_sets:
-                    for suggested_keyword in ss.suggested_keywords:
-                        keyword_statistics = (
-                            self.__get_statistics_for_candidate_keyword(
-                                suggested_keyword
-                            )
-                        )
-                        if keyword_statistics:
-                            keywords_statistics.append(keyword_statistics)
-
-            statistics = {
-                "niche": niche.name,
-                "amazon_commission_rate": niche.amazon_commission_rate,
-                "amazon_products_price": self.__calculate_descriptive_statistics(
-                    amazon_products, "price_usd"
-                ),
-                "amazon_products_reviews": self.__calculate_descriptive_statistics(
-                    amazon_products, "reviews"
-                ),
-                "amazon_products_ratings": self.__calculate_descriptive_statistics(
-                    amazon_products, "rating"
-                ),
-                "amazon_products_bought": self.__calculate_descriptive_statistics(
-                    amazon_products, "bought_last_month"
+    def get_niches_source_watermarks(self) -> Dict[int, Optional[datetime]]:
+        """
+        Get, for every niche, the most recent timestamp among the data its snapshot is calculated from:
+        its keywords (own and suggested), their metrics reports and SERP analyses, its suggestion sets,
+        and its Amazon products.
+
+        Returns:
+            dict: The watermark of each niche by niche ID, or None for niches without any data.
+        """
+        niche_keywords = self.__build_niche_keywords_subquery()
+
+        metrics_marks = (
+            select(
+                MetricsReport.keyword_id,
+                func.max(MetricsReport.created_at).label("watermark"),
+            )
+            .group_by(MetricsReport.keyword_id)
+            .subquery("metrics_marks")
+        )
+        serp_marks = (
+            select(
+                SERPAnalysis.keyword_id,
+                func.max(SERPAnalysis.created_at).label("watermark"),
+            )
+            .group_by(SERPAnalysis.keyword_id)
+            .subquery("serp_marks")
+        )
+        keywords_marks = (
+            select(
+                niche_keywords.c.niche_id,
+                func.greatest(
+                    func.max(Keyword.created_at),
+                    func.max(metrics_marks.c.watermark),
+                    func.max(serp_marks.c.watermark),
+                ).label("watermark"),
+            )
+            .join(Keyword, Keyword.id == niche_keywords.c.keyword_id)
+            .outerjoin(metrics_marks, metrics_marks.c.keyword_id == Keyword.id)
+            .outerjoin(serp_marks, serp_marks.c.keyword_id == Keyword.id)
+            .group_by(niche_keywords.c.niche_id)
+            .subquery("keywords_marks")
+        )
+        # A new suggestion set can link keywords created long before, so it moves the watermark on its own
+        suggestion_marks = (
+            select(
+                NicheKeyword.niche_id,
+                func.max(SuggestionSet.created_at).label("watermark"),
+            )
+            .join(SuggestionSet, SuggestionSet.keyword_id == NicheKeyword.keyword_id)
+            .group_by(NicheKeyword.niche_id)
+            .subquery("suggestion_marks")
+        )
+        products_marks = (
+            select(
+                NicheAmazonProduct.niche_id,
+                func.max(AmazonProduct.seen_at).label("watermark"),
+            )
+            .join(
+                AmazonProduct,
+                AmazonProduct.asin == NicheAmazonProduct.amazon_product_asin,
+            )
+            .group_by(NicheAmazonProduct.niche_id)
+            .subquery("products_marks")
+        )
+
+        statement = (
+            select(
+                Niche.id,
+                func.greatest(
+                    keywords_marks.c.watermark,
+                    suggestion_marks.c.watermark,
+                    products_marks.c.watermark,
                 ),
-                "keywords": keywords_statistics,
-            }
+            )
+            .outerjoin(keywords_marks, keywords_marks.c.niche_id == Niche.id)
+            .outerjoin(suggestion_marks, suggestion_marks.c.niche_id == Niche.id)
+            .outerjoin(products_marks, products_marks.c.niche_id == Niche.id)
+        )
 
-            return statistics
+        with self.conn.session() as session:
+            return dict(session.exec(statement).all())
 
-    def __check_if_niche_is_valid_candidate(
-        self, niche: Niche, minimum_volume: int, maximum_da: int
-    ) -> bool:
+    def __get_statistics_for_candidate_keywords(
+        self, keywords: List[Keyword]
+    ) -> List[dict]:
         """
-        Check if a niche is a valid candidate based on the specified criteria.
+        Calculate statistics for the candidate keywords of a niche, from their latest state.
+        Keywords without metrics report or SERP analysis are skipped.
+        The SERP items of every keyword are batched, so each metric is calculated for all keywords at once.
 
         Args:
-            niche (Niche): The niche object to check.
-            minimum_volume (int): The minimum volume this niche should have.
-            maximum_da (int): The maximum DA for at least one website in the top 10 last SERP results to have.
+            keywords (List[Keyword]): The keywords to calculate statistics for.
 
         Returns:
-            bool: True if the niche is a valid candidate, False otherwise.
+            List[dict]: A dictionary containing the calculated statistics of each keyword.
         """
-        for keyword in niche.keywords:
-            if self.__check_if_keyword_is_valid_candidate(
-                keyword, minimum_volume, maximum_da
-            ):
-                return True
+        keywords = [
+            k
+            for k in keywords
+            if k.latest
+            and k.latest.volume is not None
+            and k.latest.serp_analysis_id is not None
+        ]
 
-            if any(
-                self.__check_if_keyword_is_valid_candidate(
-                    suggested_keyword, minimum_volume, maximum_da
-                )
-                for suggestion_set in keyword.suggestion_sets
-                for suggested_keyword in suggestion_set.suggested_keywords
-            ):
-                return True
+        keywords_serp_analysis_items = [
+            [
+                item
+                for item in keyword.latest.serp_analysis.analysis_items
+                if item.position <= 10
+            ]
+            for keyword in keywords
+        ]
+
+        metrics_statistics = {
+            name: self.__calculate_descriptive_statistics(
+                keywords_serp_analysis_items, key
+            )
+            for name, key in SERP_ANALYSIS_ITEMS_STATISTICS_KEYS.items()
+        }
+
+        return [
+            {
+                "keyword": keyword.keyword,
+                "volume": keyword.latest.volume,
+                "domains_with_DA_under_30": keyword.latest.domains_with_da_under_30,
+                "da_top_1": keyword.latest.da_top_1,
+                "da_top_2": keyword.latest.da_top_2,
+                "da_top_3": keyword.latest.da_top_3,
+                **{
+                    name: statistics[i]
+                    for name, statistics in metrics_statistics.items()
+                },
+            }
+            for i, keyword in enumerate(keywords)
+        ]
+
+    def __calculate_descriptive_statistics(
+        self, groups: List[List[object]], key: str
+    ) -> List[dict]:
+        """
+        Calculate descriptive statistics for groups of values at once.
+
+        Args:
+            groups (List[List[object]]): The groups of values to calculate statistics for.
+            key (str): The key to use for the statistics.
 
-        return False
+        Returns:
+            List[dict]: A dictionary containing the calculated statistics of each group.
+        """
+        values = to_masked_array([[getattr(v, key) for v in group] for group in groups])
+        statistics = calculate_descriptive_statistics(values)
+        return [
+            {name: statistics[name][i] for name in DESCRIPTIVE_STATISTICS}
+            for i in range(len(groups))
+        ]
 
-    def __check_if_keyword_is_valid_candidate(
-        self, keyword: Keyword, minimum_volume: int, maximum_da: int
-    ) -> bool:
+    def __build_candidates_snapshot_statement(
+        self,
+        minimum_volume: int,
+        maximum_da: int,
+        niche_ids: Optional[List[int]] = None,
+    ):
         """
-        Check if a keyword is a valid candidate based on the specified criteria.
+        Build the statement used by get_candidates_snapshot_rows.
+        The latest metrics and SERP analysis of each keyword are read from its latest state,
+        and the candidate niches are selected from the candidate index.
 
         Args:
-            keyword (Keyword): The keyword object to check.
-            minimum_volume (int): The minimum volume this keyword should have.
-            maximum_da (int): The maximum DA for at least one website in the top 10 last SERP results to have.
+            minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+            maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
+            niche_ids (List[int], optional): If provided, only these niches are considered.
 
         Returns:
-            bool: True if the keyword is a valid candidate, False otherwise.
+            Select: The statement producing the snapshot rows.
         """
+        top_items = (
+            select(
+                KeywordLatest.keyword_id,
+                SERPAnalysisItem.domain_authority,
+                SERPAnalysisItem.backlinks,
+                SERPAnalysisItem.referring_domains,
+                SERPAnalysisItem.nofollow_backlinks,
+                SERPAnalysisItem.dofollow_backlinks,
+            )
+            .join(
+                KeywordLatest,
+                SERPAnalysisItem.serp_analysis_id == KeywordLatest.serp_analysis_id,
+            )
+            .where(SERPAnalysisItem.position <= 10)
+        )
 
-        if not keyword.metrics_reports:
-            return False
+        products_stats = (
+            select(
+                NicheAmazonProduct.niche_id,
+                *self.__descriptive_statistics_columns(
+                    AmazonProduct.price_usd, "amazon_products_price"
+                ),
+                *self.__descriptive_statistics_columns(
+                    AmazonProduct.reviews, "amazon_products_reviews"
+                ),
+                *self.__descriptive_statistics_columns(
+                    AmazonProduct.rating, "amazon_products_ratings"
+                ),
+                *self.__descriptive_statistics_columns(
+                    AmazonProduct.bought_last_month, "amazon_products_bought"
+                ),
+            )
+            .join(
+                AmazonProduct,
+                AmazonProduct.asin == NicheAmazonProduct.amazon_product_asin,
+            )
+            .where(AmazonProduct.is_sponsored == False, AmazonProduct.rating >= 4.0)
+            .group_by(NicheAmazonProduct.niche_id)
+        )
 
-        last_metrics_report = keyword.metrics_reports[-1]
+        niche_keywords = self.__build_niche_keywords_subquery()
 
-        if last_metrics_report.volume < minimum_volume:
-            return False
+        # Filter each niche-scoped subquery directly,
+        # as the planner can't push the niche filter down into the grouped subqueries
+        if niche_ids is not None:
+            products_stats = products_stats.where(
+                NicheAmazonProduct.niche_id.in_(niche_ids)
+            )
+            niche_keywords = (
+                select(niche_keywords)
+                .where(niche_keywords.c.niche_id.in_(niche_ids))
+                .subquery("scoped_niche_keywords")
+            )
+            top_items = top_items.where(
+                KeywordLatest.keyword_id.in_(select(niche_keywords.c.keyword_id))
+            )
+        top_items = top_items.subquery("top_items")
+        products_stats = products_stats.subquery("products_stats")
+
+        keyword_stats = (
+            select(
+                top_items.c.keyword_id,
+                *self.__descriptive_statistics_columns(
+                    top_items.c.domain_authority, "da"
+                ),
+                *self.__descriptive_statistics_columns(
+                    top_items.c.backlinks, "backlinks"
+                ),
+                *self.__descriptive_statistics_columns(
+                    top_items.c.referring_domains, "referring_domains"
+                ),
+                *self.__descriptive_statistics_columns(
+                    top_items.c.nofollow_backlinks, "nofollow_backlinks"
+                ),
+                *self.__descriptive_statistics_columns(
+                    top_items.c.dofollow_backlinks, "dofollow_backlinks"
+                ),
+            )
+            .group_by(top_items.c.keyword_id)
+            .subquery("keyword_stats")
+        )
 
-        if not keyword.serp_analyses:
-            return False
+        keyword_rows = (
+            select(
+                niche_keywords.c.niche_id,
+                niche_keywords.c.keyword_id,
+                Keyword.keyword,
+                KeywordLatest.volume,
+                KeywordLatest.domains_with_da_under_30.label(
+                    "domains_with_DA_under_30"
+                ),
+                KeywordLatest.da_top_1,
+                KeywordLatest.da_top_2,
+                KeywordLatest.da_top_3,
+                *[c for c in keyword_stats.c if c.name != "keyword_id"],
+            )
+            .join(Keyword, Keyword.id == niche_keywords.c.keyword_id)
+            .join(KeywordLatest, KeywordLatest.keyword_id == Keyword.id)
+            .outerjoin(keyword_stats, keyword_stats.c.keyword_id == Keyword.id)
+            .where(
+                KeywordLatest.volume != None, KeywordLatest.serp_analysis_id != None
+            )
+            .subquery("keyword_rows")
+        )
 
-        last_serp_analysis = keyword.serp_analyses[-1]
-        top_n_items = [
-            item for item in last_serp_analysis.analysis_items if item.position <= 10
-        ]
-        return any(
-            item.domain_authority != None and item.domain_authority <= maximum_da
-            for item in top_n_items
+        return (
+            select(
+                Niche.name.label("niche"),
+                Niche.amazon_commission_rate,
+                *[c for c in products_stats.c if c.name != "niche_id"],
+                *[
+                    c
+                    for c in keyword_rows.c
+                    if c.name not in ("niche_id", "keyword_id")
+                ],
+            )
+            .join(keyword_rows, keyword_rows.c.niche_id == Niche.id)
+            .outerjoin(products_stats, products_stats.c.niche_id == Niche.id)
+            .where(
+                Niche.id.in_(
+                    self.__build_candidate_niche_ids_statement(
+                        minimum_volume, maximum_da
+                    )
+                )
+            )
+            .order_by(Niche.id, keyword_rows.c.keyword_id)
         )
 
-    def __get_statistics_for_candidate_keyword(self, keyword: Keyword):
+    def __build_candidate_niche_ids_statement(
+        self, minimum_volume: int, maximum_da: int
+    ):
         """
-        Calculate statistics for a candidate keyword.
+        Build a statement selecting the IDs of the niches with at least one keyword
+        meeting both thresholds, using the candidate index.
 
         Args:
-            keyword (Keyword): The keyword to calculate statistics for.
+            minimum_volume (int): The minimum volume at least one keyword of the niche should have.
+            maximum_da (int): The maximum DA for at least one website in the top 10 SERP results should have.
 
         Returns:
-            dict: A dictionary containing the calculated statistics.
+            Select: The statement selecting the niche IDs.
         """
-        if not keyword.metrics_reports or not keyword.serp_analyses:
-            return None
+        return select(NicheCandidateIndex.niche_id).where(
+            NicheCandidateIndex.volume >= minimum_volume,
+            NicheCandidateIndex.da_min <= maximum_da,
+        )
 
-        target_report = keyword.metrics_reports[-1]
-        target_serp_analysis = keyword.serp_analyses[-1]
-        serp_analysis_items = [
-            item for item in target_serp_analysis.analysis_items if item.position <= 10
-        ]
-        serp_analysis_items.sort(key=lambda x: x.position)
-
-        return {
-            "keyword": keyword.keyword,
-            "volume": target_report.volume,
-            "domains_with_DA_under_30": len(
-                [
-                    item
-                    for item in serp_analysis_items
-                    if item.domain_authority and item.domain_authority <= 30
-                ]
-            ),
-            "da_top_1": serp_analysis_items[0].domain_authority,
-            "da_top_2": serp_analysis_items[1].domain_authority,
-            "da_top_3": serp_analysis_items[2].domain_authority,
-            "da": self.__calculate_descriptive_statistics(
-                serp_analysis_items, "domain_authority"
-            ),
-            "backlinks": self.__calculate_descriptive_statistics(
-                serp_analysis_items, "backlinks"
-            ),
-            "referring_domains": self.__calculate_descriptive_statistics(
-                serp_analysis_items, "referring_domains"
-            ),
-            "nofollow_backlinks": self.__calculate_descriptive_statistics(
-                serp_analysis_items, "nofollow_backlinks"
-            ),
-            "dofollow_backlinks": self.__calculate_descriptive_statistics(
-                serp_analysis_items, "dofollow_backlinks"
-            ),
-        }
+    def __build_niche_keywords_subquery(self):
+        """
+        Build a subquery relating each niche to its keywords,
+        which are its own keywords plus the ones suggested for them.
+
+        Returns:
+            Subquery: The subquery with niche_id and keyword_id columns.
+        """
+        return (
+            select(NicheKeyword.niche_id, NicheKeyword.keyword_id)
+            .union(
+                select(NicheKeyword.niche_id, SuggestionSetKeyword.keyword_id)
+                .join(SuggestionSet, SuggestionSet.keyword_id == NicheKeyword.keyword_id)
+                .join(
+                    SuggestionSetKeyword,
+                    SuggestionSetKeyword.suggestion_set_id == SuggestionSet.id,
+                )
+            )
+            .subquery("niche_keywords")
+        )
 
-    def __calculate_descriptive_statistics(self, values: List[object], key: str):
+    def __descriptive_statistics_columns(self, column, prefix: str) -> list:
         """
-        Calculate descriptive statistics for a list of values.
+        Build the SQL aggregates for the descriptive statistics of a column,
+        following the same rules as __calculate_descriptive_statistics.
 
         Args:
-            values (List[object]): The values to calculate statistics for.
-            key (str): The key to use for the statistics.
+            column: The column to calculate statistics for.
+            prefix (str): The prefix to use for the labels of the aggregates.
 
         Returns:
-            dict: A dictionary containing the calculated statistics.
+            list: The labeled max, min, avg, stdv and percentiles aggregates.
         """
-        key_values = [getattr(v, key) for v in values if getattr(v, key) is not None]
-        if not key_values:
-            return {
-                "max": None,
-                "min": None,
-                "avg": None,
-                "stdv": None
-            }
-
-        return {
-            "max": max(
-                [getattr(v, key) for v in values if getattr(v, key) is not None]
-            ),
-            "min": min(
-                [getattr(v, key) for v in values if getattr(v, key) is not None]
-            ),
-            "avg": statistics.mean(
-                [getattr(v, key) for v in values if getattr(v, key) is not None]
-            ),
-            "stdv": statistics.stdev(
-                [getattr(v, key) for v in values if getattr(v, key) is not None]
-            ) if len(key_values) > 2 else 0,
-        }
+        count = func.count(column)
+        return [
+            func.max(column).label(f"{prefix}_max"),
+            func.min(column).label(f"{prefix}_min"),
+            cast(func.avg(column), Float).label(f"{prefix}_avg"),
+            case(
+                (count > 2, cast(func.stddev_samp(column), Float)),
+                (count > 0, 0),
+                else_=None,
+            ).label(f"{prefix}_stdv"),
+            *[
+                func.percentile_cont(fraction)
+                .within_group(column)
+                .label(f"{prefix}_{name}")
+                for name, fraction in PERCENTILES.items()
+            ],
+        ]
@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,5 +17,24 @@ class Config(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     ECHO_POSTGRES: bool
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_STATEMENT_TIMEOUT: int = 0
+    POSTGRES_EXECUTEMANY_MODE: Literal["values_only", "values_plus_batch"] = (
+        "values_plus_batch"
+    )
+    POSTGRES_EXECUTEMANY_PAGE_SIZE: int = 1000
     PROXY_PROVIDER_CREDENTIALS: str
+    PROXY_POOL: Optional[str] = None
+    PROXY_POOL_STICKY: bool = False
+    PROXY_COOLDOWN: int = 300
+    PROXY_FIRST_HOSTS: str = ""
+    USER_AGENTS_FILE: Optional[str] = None
+    GOOGLE_SUGGEST_HEDGING: bool = False
+    AMAZON_SEARCH_PARSER: Literal["lxml", "html.parser"] = "lxml"
+    AMAZON_SEARCH_VARIANTS: str = "{niche}"
+    AMAZON_SEARCH_TOP_SUGGESTIONS: int = 0
+    RESPONSE_ARCHIVE_DIR: Optional[str] = None
     OPENAI_API_KEY: str
@@ -1,8 +1,11 @@
+from datetime import datetime
 import inject
 import pytest
 from sqlalchemy import text
+from sqlmodel import delete, select
 from config.config import Config
 from database.connection import DatabaseConnection
+from database.models import Niche
 
 
 class TestDatabaseConnection:
@@ -14,6 +17,68 @@ class TestDatabaseConnection:
             result = session.exec(text("SELECT 1")).fetchall()
             assert result[0][0] == 1
 
+    def test_should_share_session_and_commit_at_the_end_of_a_unit_of_work(self):
+        database_connection = DatabaseConnection()
+
+        try:
+            with database_connection.unit_of_work() as unit_of_work_session:
+                with database_connection.session() as session:
+                    session.add(Niche(name="Test Niche", created_at=datetime.now()))
+                    session.commit()
+
+                # Assert the session is shared and nothing is committed yet
+                with database_connection.session() as session:
+                    assert session is unit_of_work_session
+                with DatabaseConnection().session() as other_session:
+                    assert other_session.exec(select(Niche)).all() == []
+
+            # Assert
+            with database_connection.session() as session:
+                assert session is not unit_of_work_session
+                assert [n.name for n in session.exec(select(Niche)).all()] == [
+                    "Test Niche"
+                ]
+        finally:
+            with database_connection.session() as session:
+                session.exec(delete(Niche))
+                session.commit()
+
+    def test_should_rollback_every_change_when_a_unit_of_work_raises(self):
+        database_connection = DatabaseConnection()
+
+        with pytest.raises(ValueError):
+            with database_connection.unit_of_work():
+                with database_connection.session() as session:
+                    session.add(Niche(name="Test Niche", created_at=datetime.now()))
+                    session.commit()
+                raise ValueError()
+
+        # Assert
+        with database_connection.session() as session:
+            assert session.exec(select(Niche)).all() == []
+
+    def test_should_tune_engine_with_configured_pool_and_execution_options(self):
+        config = Config(
+            _env_file=".env.test",
+            POSTGRES_POOL_SIZE=3,
+            POSTGRES_MAX_OVERFLOW=7,
+            POSTGRES_POOL_RECYCLE=60,
+            POSTGRES_STATEMENT_TIMEOUT=5000,
+            POSTGRES_EXECUTEMANY_PAGE_SIZE=250,
+        )
+        database_connection = DatabaseConnection(config)
+
+        # Assert
+        engine = database_connection.engine
+        assert engine.pool.size() == 3
+        assert engine.pool._max_overflow == 7
+        assert engine.pool._recycle == 60
+        assert engine.pool._pre_ping is True
+        assert engine.dialect.insertmanyvalues_page_size == 250
+        with database_connection.session() as session:
+            result = session.exec(text("SHOW statement_timeout")).fetchall()
+            assert result[0][0] == "5s"
+
     def test_should_raise_an_exception_when_creating_a_database_connection_with_invalid_credentials(
         self,
     ):
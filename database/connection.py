@@ -1,3 +1,6 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
 import inject
 from sqlalchemy import Engine
 from sqlmodel import Session, create_engine
@@ -8,6 +11,20 @@ from config import Config
 from . import models
 
 
+class UnitOfWorkSession(Session):
+    """
+    A session shared by every repository call made within a unit of work.
+    Commits only flush the pending changes and closing does nothing,
+    as the transaction is committed and the session closed when the unit of work ends.
+    """
+
+    def commit(self) -> None:
+        self.flush()
+
+    def close(self) -> None:
+        pass
+
+
 class DatabaseConnection:
     """
     Represents a connection to a database.
@@ -17,6 +34,9 @@ class DatabaseConnection:
     def __init__(self, config: Config):
         self.config = config
         self.engine = self.__create_engine()
+        self.__unit_of_work_session: ContextVar[Optional[UnitOfWorkSession]] = (
+            ContextVar(f"unit_of_work_session_{id(self)}", default=None)
+        )
 
     def __build_connection_str(self):
         """
@@ -35,21 +55,71 @@ class DatabaseConnection:
 
     def __create_engine(self) -> Engine:
         """
-        Creates a database engine based on the DATABASE_URI environment variable.
+        Creates a database engine based on the DATABASE_URI environment variable,
+        with the pool and execution options from the configuration.
 
         Returns:
             Engine: The created database engine.
 
         """
         echo = bool(self.config.ECHO_POSTGRES)
-        return create_engine(self.__build_connection_str(), echo=echo)
+
+        # The statement timeout is set server-side for every connection of the pool
+        connect_args = {}
+        if self.config.POSTGRES_STATEMENT_TIMEOUT > 0:
+            connect_args["options"] = (
+                f"-c statement_timeout={self.config.POSTGRES_STATEMENT_TIMEOUT}"
+            )
+
+        return create_engine(
+            self.__build_connection_str(),
+            echo=echo,
+            pool_size=self.config.POSTGRES_POOL_SIZE,
+            max_overflow=self.config.POSTGRES_MAX_OVERFLOW,
+            pool_pre_ping=self.config.POSTGRES_POOL_PRE_PING,
+            pool_recycle=self.config.POSTGRES_POOL_RECYCLE,
+            executemany_mode=self.config.POSTGRES_EXECUTEMANY_MODE,
+            executemany_batch_page_size=self.config.POSTGRES_EXECUTEMANY_PAGE_SIZE,
+            insertmanyvalues_page_size=self.config.POSTGRES_EXECUTEMANY_PAGE_SIZE,
+            connect_args=connect_args,
+        )
     
-    def session(self):
+    def session(self) -> Session:
         """
-        Creates a new session to the database.
+        Creates a new session to the database,
+        or returns the session of the ongoing unit of work, if any.
 
         Returns:
             Session: The created session.
 
         """
-        return Session(self.engine)
\ No newline at end of file
+        return self.__unit_of_work_session.get() or Session(self.engine)
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator[Session]:
+        """
+        Opens a unit of work. Every session requested within it, in the same thread or task,
+        is the same session, so all repository calls share one connection and one transaction,
+        which is committed when the unit of work ends or rolled back if it raises.
+        A nested unit of work joins the ongoing one.
+
+        Yields:
+            Session: The session of the unit of work.
+
+        """
+        session = self.__unit_of_work_session.get()
+        if session is not None:
+            yield session
+            return
+
+        session = UnitOfWorkSession(self.engine, expire_on_commit=False)
+        token = self.__unit_of_work_session.set(session)
+        try:
+            yield session
+            Session.commit(session)
+        except Exception as e:
+            Session.rollback(session)
+            raise e
+        finally:
+            self.__unit_of_work_session.reset(token)
+            Session.close(session)
\ No newline at end of file
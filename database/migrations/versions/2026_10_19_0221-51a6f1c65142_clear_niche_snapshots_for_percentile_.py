@@ -0,0 +1,28 @@
+"""Clear niche snapshots for percentile columns
+
+Revision ID: 51a6f1c65142
+Revises: 19d768abd3b4
+Create Date: 2026-10-19 02:21:46.479021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '51a6f1c65142'
+down_revision: Union[str, None] = '19d768abd3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored rows lack the new percentile columns, so every niche is recalculated on the next snapshot
+    op.execute("DELETE FROM niche_snapshots")
+
+
+def downgrade() -> None:
+    pass
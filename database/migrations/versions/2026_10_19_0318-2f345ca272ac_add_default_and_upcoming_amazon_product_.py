@@ -0,0 +1,59 @@
+"""Add default and upcoming amazon product observations partitions
+
+Revision ID: 2f345ca272ac
+Revises: 574530e242d0
+Create Date: 2026-10-19 03:18:37.213662
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f345ca272ac'
+down_revision: Union[str, None] = '574530e242d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Observations outside every monthly partition land in the default one,
+    # so writes never need to create partitions on the fly
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS amazon_product_observations_default "
+        "PARTITION OF amazon_product_observations DEFAULT"
+    )
+
+    # Create the partitions of the current month and the next twelve,
+    # the ones after are created ahead by the create_observation_partitions command
+    op.execute(
+        """
+        DO $$
+        DECLARE month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', now()),
+                    date_trunc('month', now()) + interval '12 months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF amazon_product_observations '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'amazon_product_observations_' || to_char(month, 'YYYY_MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    # Observations still in the default partition are dropped with it
+    op.execute("DROP TABLE IF EXISTS amazon_product_observations_default")
@@ -1,9 +1,14 @@
 from .amazon_product import AmazonProduct
+from .amazon_product_observation import AmazonProductObservation
 from .keyword import Keyword, KeywordTypeEnum
+from .keyword_latest import KeywordLatest
 from .metrics_report import MetricsReport
 from .niche_amazon_product import NicheAmazonProduct
+from .niche_candidate_index import NicheCandidateIndex
 from .niche_keyword import NicheKeyword
 from .niche import Niche
+from .niche_snapshot import NicheSnapshot
+from .niche_snapshot_row import NicheSnapshotRow
 from .serp_analysis_item import SERPAnalysisItem
 from .serp_analysis import SERPAnalysis
 from .suggestion_set_keyword import SuggestionSetKeyword
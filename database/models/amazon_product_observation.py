@@ -0,0 +1,33 @@
+import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Identity, Index, String
+from sqlmodel import Field, SQLModel
+
+
+class AmazonProductObservation(SQLModel, table=True):
+
+    __tablename__ = "amazon_product_observations"
+    __table_args__ = (
+        Index("ix_amazon_product_observations_asin_seen_at", "asin", "seen_at"),
+        {"postgresql_partition_by": "RANGE (seen_at)"},
+    )
+
+    id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger, Identity(), primary_key=True),
+    )
+    asin: str = Field(
+        sa_column=Column(
+            String,
+            ForeignKey("amazon_products.asin", ondelete="CASCADE"),
+            nullable=False,
+        )
+    )
+    price_usd: float
+    rating: Optional[float] = None
+    reviews: Optional[int] = None
+    bought_last_month: Optional[int] = None
+    is_sponsored: bool
+    seen_at: datetime.datetime = Field(
+        sa_column=Column(DateTime, primary_key=True)
+    )
@@ -8,6 +8,7 @@ from .niche_keyword import NicheKeyword
 from .suggestion_set import SuggestionSet
 
 if TYPE_CHECKING:
+    from .keyword_latest import KeywordLatest
     from .niche import Niche
     from .metrics_report import MetricsReport
     from .serp_analysis import SERPAnalysis
@@ -37,3 +38,6 @@ class Keyword(SQLModel, table=True):
     metrics_reports: List["MetricsReport"] = Relationship(back_populates="keyword")
     serp_analyses: List["SERPAnalysis"] = Relationship(back_populates="keyword")
     suggestion_sets: List["SuggestionSet"] = Relationship(back_populates="keyword")
+    latest: Optional["KeywordLatest"] = Relationship(
+        sa_relationship_kwargs={"uselist": False, "viewonly": True}
+    )
@@ -0,0 +1,36 @@
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlmodel import Field, Relationship, SQLModel
+
+if TYPE_CHECKING:
+    from .serp_analysis import SERPAnalysis
+
+
+class KeywordLatest(SQLModel, table=True):
+
+    __tablename__ = "keyword_latest"
+
+    keyword_id: int = Field(
+        sa_column=Column(
+            Integer, ForeignKey("keywords.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    volume: Optional[int] = None
+    cpc: Optional[float] = None
+    sd: Optional[int] = None
+    pd: Optional[int] = None
+    serp_analysis_id: Optional[int] = Field(
+        sa_column=Column(
+            Integer, ForeignKey("serp_analyses.id", ondelete="SET NULL"), nullable=True
+        )
+    )
+    da_min: Optional[int] = None
+    da_max: Optional[int] = None
+    domains_with_da_under_30: Optional[int] = None
+    da_top_1: Optional[int] = None
+    da_top_2: Optional[int] = None
+    da_top_3: Optional[int] = None
+
+    serp_analysis: Optional["SERPAnalysis"] = Relationship(
+        sa_relationship_kwargs={"viewonly": True}
+    )
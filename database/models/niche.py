@@ -16,7 +16,7 @@ class Niche(SQLModel, table=True):
     __tablename__ = "niches"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(unique=True, index=True)
     amazon_commission_rate: Optional[float]
 
     created_at: datetime.datetime
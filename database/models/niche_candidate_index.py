@@ -0,0 +1,23 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer
+from sqlmodel import Field, SQLModel
+
+
+class NicheCandidateIndex(SQLModel, table=True):
+
+    __tablename__ = "niche_candidate_index"
+    __table_args__ = (
+        Index("ix_niche_candidate_index_volume_da_min", "volume", "da_min"),
+    )
+
+    niche_id: int = Field(
+        sa_column=Column(
+            Integer, ForeignKey("niches.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    keyword_id: int = Field(
+        sa_column=Column(
+            Integer, ForeignKey("keywords.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    volume: int
+    da_min: int
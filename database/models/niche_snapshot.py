@@ -0,0 +1,27 @@
+import datetime
+from typing import TYPE_CHECKING, List, Optional
+from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint
+from sqlmodel import Field, Relationship, SQLModel
+
+if TYPE_CHECKING:
+    from .niche_snapshot_row import NicheSnapshotRow
+
+
+class NicheSnapshot(SQLModel, table=True):
+
+    __tablename__ = "niche_snapshots"
+    __table_args__ = (UniqueConstraint("niche_id", "minimum_volume", "maximum_da"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    niche_id: int = Field(
+        sa_column=Column(
+            Integer, ForeignKey("niches.id", ondelete="CASCADE"), nullable=False
+        )
+    )
+    minimum_volume: int
+    maximum_da: int
+    source_watermark: Optional[datetime.datetime] = None
+
+    computed_at: datetime.datetime
+
+    rows: List["NicheSnapshotRow"] = Relationship(back_populates="snapshot")
@@ -0,0 +1,25 @@
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import JSON, Column, ForeignKey, Integer
+from sqlmodel import Field, Relationship, SQLModel
+
+if TYPE_CHECKING:
+    from .niche_snapshot import NicheSnapshot
+
+
+class NicheSnapshotRow(SQLModel, table=True):
+
+    __tablename__ = "niche_snapshot_rows"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    niche_snapshot_id: int = Field(
+        sa_column=Column(
+            Integer,
+            ForeignKey("niche_snapshots.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        )
+    )
+    position: int
+    data: dict = Field(sa_column=Column(JSON, nullable=False))
+
+    snapshot: "NicheSnapshot" = Relationship(back_populates="rows")
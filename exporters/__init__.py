@@ -0,0 +1,5 @@
+from .constants import SnapshotFormatEnum
+from .factory import create_snapshot_writer
+from .snapshot_writer_interface import SnapshotWriterInterface
+from .csv_snapshot_writer import CsvSnapshotWriter
+from .parquet_snapshot_writer import ParquetSnapshotWriter
\ No newline at end of file
@@ -0,0 +1,48 @@
+import csv
+import gzip
+from pathlib import Path
+
+from exporters.csv_snapshot_writer import CsvSnapshotWriter
+
+
+class TestCsvSnapshotWriter:
+
+    def test_should_write_header_from_first_row_keys(self, tmp_path: Path):
+        path = tmp_path / "snapshot.csv"
+
+        with CsvSnapshotWriter(str(path)) as writer:
+            writer.write_row({"niche": "cat toys", "volume": 1000})
+
+        assert path.read_text().splitlines()[0] == "niche,volume"
+
+    def test_should_quote_values_with_commas(self, tmp_path: Path):
+        path = tmp_path / "snapshot.csv"
+
+        with CsvSnapshotWriter(str(path)) as writer:
+            writer.write_row({"niche": "cats, dogs", "volume": 1000})
+            writer.write_row({"niche": "fish", "volume": None})
+
+        with open(path, newline="") as file:
+            rows = list(csv.DictReader(file))
+
+        assert rows == [
+            {"niche": "cats, dogs", "volume": "1000"},
+            {"niche": "fish", "volume": ""},
+        ]
+
+    def test_should_compress_file_when_flagged(self, tmp_path: Path):
+        path = tmp_path / "snapshot.csv.gz"
+
+        with CsvSnapshotWriter(str(path), compress=True) as writer:
+            writer.write_row({"niche": "cat toys", "volume": 1000})
+
+        with gzip.open(path, "rt") as file:
+            assert file.read().splitlines() == ["niche,volume", "cat toys,1000"]
+
+    def test_should_write_empty_file_when_there_are_no_rows(self, tmp_path: Path):
+        path = tmp_path / "snapshot.csv"
+
+        with CsvSnapshotWriter(str(path)):
+            pass
+
+        assert path.read_text() == ""
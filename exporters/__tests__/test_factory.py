@@ -0,0 +1,29 @@
+import pytest
+
+from exporters.constants import SnapshotFormatEnum
+from exporters.csv_snapshot_writer import CsvSnapshotWriter
+from exporters.factory import create_snapshot_writer
+from exporters.parquet_snapshot_writer import ParquetSnapshotWriter
+
+
+@pytest.mark.parametrize(
+    "format, writer_class, compress",
+    [
+        (SnapshotFormatEnum.CSV, CsvSnapshotWriter, False),
+        (SnapshotFormatEnum.CSV_GZIP, CsvSnapshotWriter, True),
+        (SnapshotFormatEnum.PARQUET, ParquetSnapshotWriter, None),
+    ],
+)
+def test_should_create_the_writer_for_the_given_format(
+    format: SnapshotFormatEnum, writer_class: type, compress: bool
+):
+    writer = create_snapshot_writer(format, "snapshot")
+
+    assert isinstance(writer, writer_class)
+    assert writer.path == "snapshot"
+    assert getattr(writer, "compress", None) == compress
+
+
+def test_should_raise_exception_if_format_is_not_supported():
+    with pytest.raises(ValueError):
+        create_snapshot_writer("INVALID_FORMAT", "snapshot")
@@ -0,0 +1,33 @@
+from pathlib import Path
+import pyarrow.parquet as pq
+
+from exporters.parquet_snapshot_writer import ParquetSnapshotWriter
+
+
+class TestParquetSnapshotWriter:
+
+    def test_should_write_all_rows_across_batches(self, tmp_path: Path):
+        path = tmp_path / "snapshot.parquet"
+
+        with ParquetSnapshotWriter(str(path), batch_size=2) as writer:
+            for i in range(5):
+                writer.write_row({"niche": f"niche {i}", "volume": i})
+
+        table = pq.read_table(path)
+
+        assert table.num_rows == 5
+        assert pq.ParquetFile(path).num_row_groups == 3
+        assert table.column("niche").to_pylist() == [f"niche {i}" for i in range(5)]
+
+    def test_should_type_columns_that_are_null_on_the_first_batch_as_float(
+        self, tmp_path: Path
+    ):
+        path = tmp_path / "snapshot.parquet"
+
+        with ParquetSnapshotWriter(str(path), batch_size=1) as writer:
+            writer.write_row({"niche": "cat toys", "price": None})
+            writer.write_row({"niche": "dog toys", "price": 10.5})
+
+        table = pq.read_table(path)
+
+        assert table.column("price").to_pylist() == [None, 10.5]
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class SnapshotFormatEnum(Enum):
+    CSV = "csv"
+    CSV_GZIP = "csv.gz"
+    PARQUET = "parquet"
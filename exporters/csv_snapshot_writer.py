@@ -0,0 +1,32 @@
+import csv
+import gzip
+
+from .snapshot_writer_interface import SnapshotWriterInterface
+
+
+class CsvSnapshotWriter(SnapshotWriterInterface):
+    """
+    Streams snapshot rows into a CSV file, optionally gzip compressed.
+    The header is taken from the keys of the first row.
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        super().__init__(path)
+        self.compress = compress
+        self.file = None
+        self.writer = None
+
+    def open(self) -> None:
+        if self.compress:
+            self.file = gzip.open(self.path, "wt", newline="")
+        else:
+            self.file = open(self.path, "w", newline="")
+
+    def write_row(self, row: dict) -> None:
+        if not self.writer:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row.keys()))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def close(self) -> None:
+        self.file.close()
@@ -0,0 +1,29 @@
+from .constants import SnapshotFormatEnum
+from .csv_snapshot_writer import CsvSnapshotWriter
+from .parquet_snapshot_writer import ParquetSnapshotWriter
+from .snapshot_writer_interface import SnapshotWriterInterface
+
+
+def create_snapshot_writer(
+    format: SnapshotFormatEnum, path: str
+) -> SnapshotWriterInterface:
+    """
+    Creates the snapshot writer for the given format.
+
+    Args:
+        format (SnapshotFormatEnum): The format of the snapshot file.
+        path (str): The path of the snapshot file.
+
+    Returns:
+        SnapshotWriterInterface: The writer for the given format.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if format == SnapshotFormatEnum.CSV:
+        return CsvSnapshotWriter(path)
+    if format == SnapshotFormatEnum.CSV_GZIP:
+        return CsvSnapshotWriter(path, compress=True)
+    if format == SnapshotFormatEnum.PARQUET:
+        return ParquetSnapshotWriter(path)
+    raise ValueError(f'Snapshot format "{format}" is invalid.')
@@ -0,0 +1,52 @@
+from typing import List
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .snapshot_writer_interface import SnapshotWriterInterface
+
+
+class ParquetSnapshotWriter(SnapshotWriterInterface):
+    """
+    Streams snapshot rows into a Parquet file, one row group per batch of rows.
+    The schema is inferred from the first batch, and columns that are null on all
+    of its rows are typed as float64, as every nullable snapshot column is numeric.
+    """
+
+    def __init__(self, path: str, batch_size: int = 10000):
+        super().__init__(path)
+        self.batch_size = batch_size
+        self.rows: List[dict] = []
+        self.writer = None
+
+    def open(self) -> None:
+        # The file is created on the first flush, once the schema is known
+        pass
+
+    def write_row(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.__flush()
+
+    def close(self) -> None:
+        if self.rows:
+            self.__flush()
+        if self.writer:
+            self.writer.close()
+
+    def __flush(self) -> None:
+        """
+        Writes the buffered rows as a row group and clears the buffer.
+        """
+        if not self.writer:
+            schema = pa.RecordBatch.from_pylist(self.rows).schema
+            schema = pa.schema(
+                [
+                    field.with_type(pa.float64()) if pa.types.is_null(field.type) else field
+                    for field in schema
+                ]
+            )
+            self.writer = pq.ParquetWriter(self.path, schema)
+
+        batch = pa.RecordBatch.from_pylist(self.rows, schema=self.writer.schema)
+        self.writer.write_batch(batch)
+        self.rows = []
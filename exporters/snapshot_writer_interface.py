@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+
+
+class SnapshotWriterInterface(ABC):
+    """
+    Interface for writers that stream snapshot rows into a file.
+    Writers are context managers, so the file is always closed after writing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self) -> "SnapshotWriterInterface":
+        self.open()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @abstractmethod
+    def open(self) -> None:
+        """
+        Opens the output file.
+        Should be implemented by the extending class.
+        """
+        ...
+
+    @abstractmethod
+    def write_row(self, row: dict) -> None:
+        """
+        Writes a single row into the output file.
+        Should be implemented by the extending class.
+
+        Args:
+            row (dict): The row to write. Every row must have the same keys, in the same order.
+        """
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Flushes any pending rows and closes the output file.
+        Should be implemented by the extending class.
+        """
+        ...
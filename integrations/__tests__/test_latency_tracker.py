@@ -0,0 +1,20 @@
+from integrations.latency_tracker import LatencyTracker
+
+
+class TestLatencyTracker:
+
+    def test_should_return_no_percentile_until_min_samples_are_recorded(self):
+        latency_tracker = LatencyTracker(window=10, min_samples=3)
+        latency_tracker.record(0.1)
+        latency_tracker.record(0.2)
+
+        assert latency_tracker.percentile(0.9) is None
+
+    def test_should_return_nearest_rank_percentile_of_latest_latencies(self):
+        latency_tracker = LatencyTracker(window=10, min_samples=1)
+        latency_tracker.record(100.0)
+        for i in range(1, 11):
+            latency_tracker.record(i / 10)
+
+        assert latency_tracker.percentile(0.9) == 0.9
+        assert latency_tracker.percentile(0.5) == 0.5
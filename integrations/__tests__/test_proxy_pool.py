@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import patch
+
+from config import Config
+from integrations.proxy_pool import ProxyPool, load_proxy_endpoints
+
+
+class TestProxyPool:
+
+    @pytest.fixture
+    def proxy_pool(self):
+        config = Config(
+            _env_file=".env.test",
+            PROXY_POOL="user:pass@first:8000,user:pass@second:8000",
+            PROXY_FIRST_HOSTS="www.amazon.com, www.google.com",
+        )
+        return ProxyPool(config)
+
+    def test_should_fall_back_to_proxy_provider_credentials_if_pool_is_not_set(self):
+        proxy_pool = ProxyPool(Config(_env_file=".env.test"))
+
+        assert [e.uri for e in proxy_pool.endpoints] == ["username:password@host:port"]
+        assert proxy_pool.acquire().proxies == {
+            "http": "username:password@host:port",
+            "https": "username:password@host:port",
+        }
+
+    def test_should_load_endpoints_from_file(self, tmp_path):
+        path = tmp_path / "proxies.txt"
+        path.write_text("# residential\nuser:pass@first:8000\n\nuser:pass@second:8000\n")
+
+        assert load_proxy_endpoints(str(path)) == [
+            "user:pass@first:8000",
+            "user:pass@second:8000",
+        ]
+
+    def test_should_route_only_proxy_first_hosts_through_proxies_from_start(
+        self, proxy_pool: ProxyPool
+    ):
+        assert proxy_pool.is_proxy_first("www.amazon.com")
+        assert proxy_pool.is_proxy_first("www.google.com")
+        assert not proxy_pool.is_proxy_first("app.neilpatel.com")
+
+    def test_should_not_pick_endpoint_cooling_down_after_being_blocked(
+        self, proxy_pool: ProxyPool
+    ):
+        first, second = proxy_pool.endpoints
+        proxy_pool.report(first, False, 0.5, blocked=True)
+
+        assert all(proxy_pool.acquire() is second for _ in range(20))
+
+    def test_should_pick_endpoint_whose_cooldown_ends_first_if_all_are_cooling_down(
+        self, proxy_pool: ProxyPool
+    ):
+        first, second = proxy_pool.endpoints
+        proxy_pool.report(first, False, 0.5, blocked=True)
+        proxy_pool.report(second, False, 0.5, blocked=True)
+
+        assert proxy_pool.acquire() is first
+
+    def test_should_weight_endpoints_by_success_rate_and_latency(
+        self, proxy_pool: ProxyPool
+    ):
+        first, second = proxy_pool.endpoints
+        for _ in range(10):
+            proxy_pool.report(first, True, 0.2)
+            proxy_pool.report(second, False, 2.0)
+
+        with patch("integrations.proxy_pool.random.choices") as choices:
+            choices.return_value = [first]
+            proxy_pool.acquire()
+
+        weights = choices.call_args.kwargs["weights"]
+        assert weights[0] > weights[1] * 10
+
+    def test_should_keep_host_on_same_endpoint_until_blocked_if_sticky(
+        self, proxy_pool: ProxyPool
+    ):
+        proxy_pool.sticky = True
+        endpoint = proxy_pool.acquire("www.amazon.com")
+
+        assert all(proxy_pool.acquire("www.amazon.com") is endpoint for _ in range(20))
+
+        proxy_pool.report(endpoint, False, 0.5, blocked=True)
+
+        assert proxy_pool.acquire("www.amazon.com") is not endpoint
@@ -0,0 +1,88 @@
+from datetime import datetime
+import json
+import os
+import pytest
+
+from config import Config
+from integrations.constants import ArchiveProviderEnum
+from integrations.response_archive import ResponseArchive, read_archived_response
+
+
+class TestResponseArchive:
+
+    @pytest.fixture
+    def response_archive(self, tmp_path):
+        config = Config(_env_file=".env.test", RESPONSE_ARCHIVE_DIR=str(tmp_path))
+        return ResponseArchive(config)
+
+    def test_should_read_back_stored_response(
+        self, response_archive: ResponseArchive
+    ):
+        entry = response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "cat toys", b"<html></html>"
+        )
+
+        assert read_archived_response(entry) == b"<html></html>"
+
+    def test_should_store_same_content_once_and_index_every_response(
+        self, response_archive: ResponseArchive, tmp_path
+    ):
+        first = response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "cat toys", b"<html></html>"
+        )
+        second = response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "dog toys", b"<html></html>"
+        )
+
+        entries = response_archive.get_responses(ArchiveProviderEnum.AMAZON_SEARCH)
+
+        assert first.path == second.path
+        assert len(list((tmp_path / "objects").rglob("*.gz"))) == 1
+        assert [entry.request for entry in entries] == ["cat toys", "dog toys"]
+
+    def test_should_return_only_responses_received_since_given_moment(
+        self, response_archive: ResponseArchive
+    ):
+        response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "old", b"old", datetime(2024, 1, 1)
+        )
+        response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "new", b"new", datetime(2024, 2, 1)
+        )
+
+        entries = response_archive.get_responses(
+            ArchiveProviderEnum.AMAZON_SEARCH, since=datetime(2024, 1, 15)
+        )
+
+        assert [entry.request for entry in entries] == ["new"]
+
+    def test_should_not_store_anything_when_archive_is_disabled(self):
+        response_archive = ResponseArchive(Config(_env_file=".env.test"))
+
+        entry = response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "cat toys", b"<html></html>"
+        )
+
+        assert entry is None
+        assert response_archive.get_responses(ArchiveProviderEnum.AMAZON_SEARCH) == []
+
+    def test_should_read_responses_after_archive_is_moved(self, tmp_path):
+        # Store a response, then move the archive
+        response_archive = ResponseArchive(
+            Config(_env_file=".env.test", RESPONSE_ARCHIVE_DIR=str(tmp_path / "archive"))
+        )
+        response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, "cat toys", b"<html></html>"
+        )
+        os.rename(tmp_path / "archive", tmp_path / "moved")
+
+        # Act
+        moved_archive = ResponseArchive(
+            Config(_env_file=".env.test", RESPONSE_ARCHIVE_DIR=str(tmp_path / "moved"))
+        )
+        entries = moved_archive.get_responses(ArchiveProviderEnum.AMAZON_SEARCH)
+
+        # Assert
+        (index_path,) = (tmp_path / "moved").glob("*.jsonl")
+        assert not os.path.isabs(json.loads(index_path.read_text())["path"])
+        assert [read_archived_response(entry) for entry in entries] == [b"<html></html>"]
@@ -129,7 +129,9 @@ class TestRetriableHttpClient:
         retriable_http_client: RetriableHttpClient,
     ):
         mock_request.return_value.status_code = 500
-        retriable_http_client.get_proxies = Mock(return_value={"http": "proxy"})
+        retriable_http_client.proxy_pool = Mock()
+        retriable_http_client.proxy_pool.is_proxy_first.return_value = False
+        retriable_http_client.proxy_pool.acquire.return_value.proxies = {"http": "proxy"}
         retriable_http_client.request(
             HttpMethodEnum.GET,
             "http://example.com",
@@ -145,6 +147,121 @@ class TestRetriableHttpClient:
             ),
         ]
 
+    def test_should_use_proxies_from_first_attempt_if_host_is_proxy_first(
+        self,
+        mock_request: Mock,
+        retriable_http_client: RetriableHttpClient,
+    ):
+        mock_request.return_value.status_code = 200
+        retriable_http_client.proxy_pool = Mock()
+        retriable_http_client.proxy_pool.is_proxy_first.return_value = True
+        retriable_http_client.proxy_pool.acquire.return_value.proxies = {"http": "proxy"}
+        retriable_http_client.request(
+            HttpMethodEnum.GET,
+            "http://example.com/s?k=cat",
+            retry_times=1,
+            retry_strategy=RetryStrategyEnum.USE_PROXY,
+        )
+        retriable_http_client.proxy_pool.is_proxy_first.assert_called_once_with(
+            "example.com"
+        )
+        retriable_http_client.proxy_pool.acquire.assert_called_once_with("example.com")
+        assert mock_request.call_args_list == [
+            call("GET", "http://example.com/s?k=cat", proxies={"http": "proxy"}),
+        ]
+
+    def test_should_use_proxies_from_first_attempt_if_asked_to(
+        self,
+        mock_request: Mock,
+        retriable_http_client: RetriableHttpClient,
+    ):
+        mock_request.return_value.status_code = 200
+        retriable_http_client.proxy_pool = Mock()
+        retriable_http_client.proxy_pool.acquire.return_value.proxies = {"http": "proxy"}
+        retriable_http_client.request(
+            HttpMethodEnum.GET, "http://example.com", use_proxy=True
+        )
+        assert mock_request.call_args_list == [
+            call("GET", "http://example.com", proxies={"http": "proxy"}),
+        ]
+
+    def test_should_report_proxy_endpoint_as_blocked_if_response_is_rejected(
+        self,
+        mock_request: Mock,
+        retriable_http_client: RetriableHttpClient,
+    ):
+        mock_request.side_effect = [
+            Mock(status_code=503, content=b""),
+            Mock(status_code=200, content=b"blocked"),
+        ]
+        retriable_http_client.proxy_pool = Mock()
+        retriable_http_client.proxy_pool.is_proxy_first.return_value = False
+        endpoint = retriable_http_client.proxy_pool.acquire.return_value
+        retriable_http_client.request(
+            HttpMethodEnum.GET,
+            "http://example.com",
+            retry_times=1,
+            retry_strategy=RetryStrategyEnum.USE_PROXY,
+            is_rejected=lambda response: response.content == b"blocked",
+        )
+        report = retriable_http_client.proxy_pool.report
+        report.assert_called_once()
+        assert report.call_args.args[:2] == (endpoint, False)
+        assert report.call_args.kwargs == {"blocked": True}
+
+    def test_should_retry_successful_response_if_it_is_rejected(
+        self,
+        mock_request: Mock,
+        retriable_http_client: RetriableHttpClient,
+    ):
+        mock_request.side_effect = [
+            Mock(status_code=200, content=b"blocked"),
+            Mock(status_code=200, content=b"ok"),
+        ]
+        response = retriable_http_client.request(
+            HttpMethodEnum.GET,
+            "http://example.com",
+            retry_times=3,
+            is_rejected=lambda response: response.content == b"blocked",
+        )
+        assert response.content == b"ok"
+        assert mock_request.call_count == 2
+
+    def test_should_send_each_attempt_with_user_agent_from_pool_if_rotating(
+        self,
+        mock_request: Mock,
+        retriable_http_client: RetriableHttpClient,
+    ):
+        mock_request.side_effect = [
+            Mock(status_code=200, content=b"blocked"),
+            Mock(status_code=200, content=b"ok"),
+        ]
+        retriable_http_client.user_agent_pool = Mock()
+        retriable_http_client.user_agent_pool.pick.side_effect = ["first", "second"]
+        retriable_http_client.request(
+            HttpMethodEnum.GET,
+            "http://example.com",
+            retry_times=1,
+            is_rejected=lambda response: response.content == b"blocked",
+            rotate_user_agent=True,
+            headers={"accept": "*/*"},
+        )
+        assert mock_request.call_args_list == [
+            call(
+                "GET",
+                "http://example.com",
+                headers={"accept": "*/*", "user-agent": "first"},
+            ),
+            call(
+                "GET",
+                "http://example.com",
+                headers={"accept": "*/*", "user-agent": "second"},
+            ),
+        ]
+        retriable_http_client.user_agent_pool.report_blocked.assert_called_once_with(
+            "first", None
+        )
+
     def test_should_use_session_if_provided(
         self,
         mock_request: Mock,
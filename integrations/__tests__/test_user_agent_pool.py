@@ -0,0 +1,51 @@
+import pytest
+
+from config import Config
+from integrations.user_agent_pool import UserAgentPool, load_user_agents
+
+
+class TestUserAgentPool:
+
+    @pytest.fixture
+    def user_agent_pool(self, tmp_path):
+        path = tmp_path / "user_agents.tsv"
+        path.write_text("# weight\tuser agent\n3\tChrome\n\n1\tFirefox\n")
+        config = Config(_env_file=".env.test", USER_AGENTS_FILE=str(path))
+        return UserAgentPool(config)
+
+    def test_should_load_bundled_user_agents_if_file_is_not_set(self):
+        user_agent_pool = UserAgentPool(Config(_env_file=".env.test"))
+
+        assert user_agent_pool.user_agents
+        assert all(ua.startswith("Mozilla/5.0") for ua in user_agent_pool.user_agents)
+
+    def test_should_load_weighted_user_agents_from_file(self, tmp_path):
+        path = tmp_path / "user_agents.tsv"
+        path.write_text("# weight\tuser agent\n3\tChrome\n\n1.5\tFirefox\n")
+
+        assert load_user_agents(path) == [(3.0, "Chrome"), (1.5, "Firefox")]
+
+    def test_should_stick_to_same_user_agent_per_proxy(
+        self, user_agent_pool: UserAgentPool
+    ):
+        user_agent = user_agent_pool.pick("proxy")
+
+        assert all(user_agent_pool.pick("proxy") == user_agent for _ in range(20))
+
+    def test_should_not_pick_user_agent_blocked_with_proxy(
+        self, user_agent_pool: UserAgentPool
+    ):
+        user_agent_pool.report_blocked("Chrome", "proxy")
+
+        assert all(user_agent_pool.pick("proxy") == "Firefox" for _ in range(20))
+        assert user_agent_pool.weights == [1.5, 1.0]
+
+    def test_should_start_rotation_over_if_every_user_agent_is_blocked_with_proxy(
+        self, user_agent_pool: UserAgentPool
+    ):
+        user_agent_pool.report_blocked("Chrome", "proxy")
+        user_agent_pool.report_blocked("Firefox", "proxy")
+        user_agent_pool.report_blocked("Firefox", "other proxy")
+
+        assert user_agent_pool.pick("proxy") in ["Chrome", "Firefox"]
+        assert user_agent_pool.blocked_pairs == {("Firefox", "other proxy")}
@@ -7,4 +7,11 @@ webfixtures_folder = Path(__file__).resolve().parent / "webfixtures"
 def amazon_search() -> dict:
     with open(webfixtures_folder / "amazon_search.html.fixture", "r") as file:
         amazon_search = file.read()
-    return amazon_search
\ No newline at end of file
+    return amazon_search
+
+
+@pytest.fixture(scope="module")
+def amazon_captcha() -> bytes:
+    with open(webfixtures_folder / "amazon_captcha.html.fixture", "rb") as file:
+        amazon_captcha = file.read()
+    return amazon_captcha
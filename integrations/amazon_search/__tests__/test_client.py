@@ -1,9 +1,10 @@
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 import pytest
 
 
 from app.exceptions import DataFetchError
 from integrations.amazon_search.client import AmazonSearchClient
+from integrations.constants import ArchiveProviderEnum, RetryStrategyEnum
 
 
 class TestAmazonSearchClient:
@@ -17,11 +18,47 @@ class TestAmazonSearchClient:
     ):
         amazon_search_client.http_client.request.return_value.status_code = 200
         amazon_search_client.http_client.request.return_value.text = amazon_search
+        amazon_search_client.http_client.request.return_value.content = (
+            amazon_search.encode()
+        )
 
         search_response = amazon_search_client.search("cat toys")
 
         assert search_response == amazon_search
 
+    def test_should_raise_exception_if_response_is_a_block_page(
+        self, amazon_search_client: AmazonSearchClient, amazon_captcha: bytes
+    ):
+        amazon_search_client.http_client.request.return_value.status_code = 200
+        amazon_search_client.http_client.request.return_value.content = amazon_captcha
+
+        with pytest.raises(DataFetchError):
+            amazon_search_client.search("cat toys")
+
+    def test_should_retry_block_pages_through_proxy(
+        self, amazon_search_client: AmazonSearchClient, amazon_captcha: bytes
+    ):
+        amazon_search_client.http_client.request.return_value.status_code = 200
+        amazon_search_client.http_client.request.return_value.content = b"<html></html>"
+
+        amazon_search_client.search("cat toys")
+
+        kwargs = amazon_search_client.http_client.request.call_args.kwargs
+        assert kwargs["retry_strategy"] == RetryStrategyEnum.USE_PROXY
+        assert kwargs["is_rejected"](Mock(content=amazon_captcha))
+
+    def test_should_rotate_user_agent_on_every_attempt(
+        self, amazon_search_client: AmazonSearchClient
+    ):
+        amazon_search_client.http_client.request.return_value.status_code = 200
+        amazon_search_client.http_client.request.return_value.content = b"<html></html>"
+
+        amazon_search_client.search("cat toys")
+
+        kwargs = amazon_search_client.http_client.request.call_args.kwargs
+        assert kwargs["rotate_user_agent"] is True
+        assert "user-agent" not in kwargs["headers"]
+
     def test_should_raise_exception_if_request_fails(
         self, amazon_search_client: AmazonSearchClient
     ):
@@ -36,6 +73,79 @@ class TestAmazonSearchClient:
         amazon_search_client.http_client.request.return_value.status_code = 200
         amazon_search_client.http_client.request.return_value.text = amazon_search
 
-        with patch("integrations.amazon_search.client.format_search") as format_search:
+        with patch(
+            "integrations.amazon_search.client.format_search_pages"
+        ) as format_search_pages:
             amazon_search_client.get_products_for_keyword("cat toys")
-            format_search.assert_called_once_with(amazon_search)
+            format_search_pages.assert_called_once_with(
+                [amazon_search], amazon_search_client.config.AMAZON_SEARCH_PARSER
+            )
+
+    def test_should_fetch_every_page_in_page_order_when_fetching_search_pages(
+        self, amazon_search_client: AmazonSearchClient
+    ):
+        with patch.object(
+            amazon_search_client, "search", side_effect=lambda _, page, niche: str(page)
+        ) as search:
+            htmls = amazon_search_client.fetch_search_pages("cat toys", 3)
+
+        assert sorted(c.args for c in search.call_args_list) == [
+            ("cat toys", 1),
+            ("cat toys", 2),
+            ("cat toys", 3),
+        ]
+        assert htmls == ["1", "2", "3"]
+
+    def test_should_fetch_pages_of_every_keyword_in_keyword_order_when_fetching_for_keywords(
+        self, amazon_search_client: AmazonSearchClient
+    ):
+        with patch.object(
+            amazon_search_client,
+            "search",
+            side_effect=lambda keyword, page, niche: f"{keyword} {page}",
+        ) as search:
+            htmls = amazon_search_client.fetch_search_pages_for_keywords(
+                ["cat toys", "best cat toys"], 2, "cat toys"
+            )
+
+        assert htmls == ["cat toys 1", "cat toys 2", "best cat toys 1", "best cat toys 2"]
+        assert all(c.kwargs == {"niche": "cat toys"} for c in search.call_args_list)
+
+    def test_should_fetch_nothing_when_there_are_no_keywords_or_no_pages(
+        self, amazon_search_client: AmazonSearchClient
+    ):
+        with patch.object(amazon_search_client, "search") as search:
+            no_keywords = amazon_search_client.fetch_search_pages_for_keywords([], 2)
+            no_pages = amazon_search_client.fetch_search_pages_for_keywords(
+                ["cat toys"], 0
+            )
+            no_products = amazon_search_client.get_products_for_keywords([], 1)
+
+        assert (no_keywords, no_pages, no_products) == ([], [], [])
+        search.assert_not_called()
+
+    def test_should_archive_page_as_requested_for_niche_when_searching_for_it(
+        self, amazon_search_client: AmazonSearchClient
+    ):
+        amazon_search_client.http_client.request.return_value.status_code = 200
+        amazon_search_client.http_client.request.return_value.content = b"<html></html>"
+
+        with patch.object(amazon_search_client, "response_archive") as response_archive:
+            amazon_search_client.search("best cat toys", niche="cat toys")
+
+        response_archive.store.assert_called_once_with(
+            ArchiveProviderEnum.AMAZON_SEARCH, "cat toys", b"<html></html>"
+        )
+
+    def test_should_request_page_number_when_searching_beyond_first_page(
+        self, amazon_search_client: AmazonSearchClient
+    ):
+        amazon_search_client.http_client.request.return_value.status_code = 200
+        amazon_search_client.http_client.request.return_value.content = b"<html></html>"
+
+        amazon_search_client.search("cat toys", 2)
+
+        assert (
+            amazon_search_client.http_client.request.call_args.args[1]
+            == "https://www.amazon.com/s?k=cat toys&page=2"
+        )
@@ -1,13 +1,40 @@
 # Fixtures from conftest.py
+from datetime import datetime
 from typing import List
+from unittest.mock import Mock, patch
 import pytest
 from app.interfaces.dtos.amazon_product_snapshot import AmazonProductSnapshot
-from integrations.amazon_search.formatters import format_search
+from integrations.amazon_search.constants import SearchParserEnum
+from config import Config
+from integrations.amazon_search.formatters import (
+    format_archived_search,
+    format_search,
+    format_search_pages,
+    is_block_page,
+)
+from integrations.constants import ArchiveProviderEnum
+from integrations.response_archive import ResponseArchive
 
 
-@pytest.fixture(scope="module")
-def products(amazon_search: dict):
-    return format_search(amazon_search)
+@pytest.fixture(scope="module", params=list(SearchParserEnum))
+def products(request, amazon_search: dict):
+    return format_search(amazon_search, request.param)
+
+
+def test_should_extract_the_same_products_with_every_parser(amazon_search: dict):
+    html_parser_products = format_search(amazon_search, SearchParserEnum.HTML_PARSER)
+    lxml_products = format_search(amazon_search, SearchParserEnum.LXML)
+    assert lxml_products == html_parser_products
+
+
+def test_should_fall_back_to_html_parser_when_chosen_parser_fails(amazon_search: dict):
+    with patch.dict(
+        "integrations.amazon_search.formatters.SEARCH_PARSERS",
+        {SearchParserEnum.LXML: lambda _: 1 / 0},
+    ):
+        products = format_search(amazon_search, SearchParserEnum.LXML)
+
+    assert products == format_search(amazon_search, SearchParserEnum.HTML_PARSER)
 
 
 def test_should_extract_only_products_that_have_asin_when_html_is_a_search_result_page(
@@ -78,3 +105,43 @@ def test_should_remove_duplicated_products_and_keep_the_first_one(products: List
 
     assert target_product.is_sponsored == True
     assert len(products) == len(set(p.asin for p in products))
+
+
+def test_should_classify_captcha_page_as_block_page(amazon_captcha: bytes):
+    assert is_block_page(amazon_captcha)
+
+
+def test_should_not_classify_search_result_page_as_block_page(amazon_search: str):
+    assert not is_block_page(amazon_search.encode())
+
+
+def test_should_extract_archived_products_as_seen_when_page_was_received(
+    amazon_search: str, tmp_path
+):
+    response_archive = ResponseArchive(
+        Config(_env_file=".env.test", RESPONSE_ARCHIVE_DIR=str(tmp_path))
+    )
+    entry = response_archive.store(
+        ArchiveProviderEnum.AMAZON_SEARCH,
+        "cat toys",
+        amazon_search.encode(),
+        datetime(2024, 1, 1),
+    )
+
+    products = format_archived_search(entry, SearchParserEnum.LXML)
+
+    assert [p.asin for p in products] == [p.asin for p in format_search(amazon_search)]
+    assert all(p.seen_at == datetime(2024, 1, 1) for p in products)
+
+
+def test_should_keep_products_once_from_first_page_they_appear_in_when_formatting_search_pages():
+    first_page = [Mock(asin="ASIN1"), Mock(asin="ASIN2")]
+    second_page = [Mock(asin="ASIN2"), Mock(asin="ASIN3")]
+
+    with patch(
+        "integrations.amazon_search.formatters.format_search",
+        side_effect=lambda html, _: {"1": first_page, "2": second_page}[html],
+    ):
+        products = format_search_pages(["1", "2"])
+
+    assert products == [first_page[0], first_page[1], second_page[1]]
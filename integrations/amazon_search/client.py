@@ -1,12 +1,19 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 import inject
 
 from app.exceptions import DataFetchError
 from app.interfaces.dtos.amazon_product_snapshot import AmazonProductSnapshot
-from integrations.amazon_search.formatters import format_search
-from integrations.constants import HttpMethodEnum, RetryStrategyEnum
+from config import Config
+from integrations.amazon_search.constants import MAX_CONCURRENT_SEARCH_PAGES
+from integrations.amazon_search.formatters import format_search_pages, is_block_page
+from integrations.constants import (
+    ArchiveProviderEnum,
+    HttpMethodEnum,
+    RetryStrategyEnum,
+)
+from integrations.response_archive import ResponseArchive
 from integrations.retriable_http_client import RetriableHttpClient
-from fake_useragent import UserAgent
 
 
 class AmazonSearchClient:
@@ -16,23 +23,35 @@ class AmazonSearchClient:
 
     @inject.autoparams()
     def __init__(
-        self, http_client: RetriableHttpClient, user_agent_generator: UserAgent
+        self,
+        config: Config,
+        http_client: RetriableHttpClient,
+        response_archive: ResponseArchive,
     ):
+        self.config = config
         self.http_client = http_client
+        self.response_archive = response_archive
         self.base_uri = "https://www.amazon.com"
-        self.user_agent_generator = user_agent_generator
 
-    def search(self, keyword: str) -> str:
+    def search(self, keyword: str, page: int = 1, niche: Optional[str] = None) -> str:
         """
-        Searches Amazon for a keyword.
+        Searches Amazon for a keyword. The raw page is archived, if the archive is enabled.
 
         Args:
             keyword (str): The keyword to search for.
+            page (int): The page of the search results. Default is 1.
+            niche (Optional[str]): The niche the search is for, archived as the request,
+                so reparsing links the products to it. Defaults to the keyword.
 
         Returns:
             str: The HTML of the search results page.
+
+        Raises:
+            DataFetchError: If the request fails, or Amazon answers with a block page even through the proxy.
         """
         uri = f"{self.base_uri}/s?k={keyword}"
+        if page > 1:
+            uri += f"&page={page}"
 
         headers = {
             "authority": "www.amazon.com",
@@ -44,13 +63,13 @@ class AmazonSearchClient:
             "accept-encoding": "gzip, deflate, br",
         }
 
-        headers["user-agent"] = self.user_agent_generator.random
-
         response = self.http_client.request(
             HttpMethodEnum.GET,
             uri,
             retry_times=1,
             retry_strategy=RetryStrategyEnum.USE_PROXY,
+            is_rejected=lambda response: is_block_page(response.content),
+            rotate_user_agent=True,
             headers=headers,
         )
 
@@ -59,17 +78,93 @@ class AmazonSearchClient:
                 f"Failed request to '{uri}': {response.text} - {response.status_code}"
             )
 
+        if is_block_page(response.content):
+            raise DataFetchError(f"Blocked by Amazon on request to '{uri}'")
+
+        self.response_archive.store(
+            ArchiveProviderEnum.AMAZON_SEARCH, niche or keyword, response.content
+        )
+
         return response.text
 
-    def get_products_for_keyword(self, keyword: str) -> List[AmazonProductSnapshot]:
+    def fetch_search_pages(self, keyword: str, pages: int = 1) -> List[str]:
+        """
+        Searches Amazon for a keyword, fetching the result pages concurrently.
+
+        Args:
+            keyword (str): The keyword to search for.
+            pages (int): The number of result pages to fetch. Default is 1.
+
+        Returns:
+            List[str]: The HTML of every result page, in page order.
+        """
+        return self.fetch_search_pages_for_keywords([keyword], pages)
+
+    def fetch_search_pages_for_keywords(
+        self, keywords: List[str], pages: int = 1, niche: Optional[str] = None
+    ) -> List[str]:
+        """
+        Searches Amazon for several keywords, fetching the result pages of all of them concurrently.
+
+        Args:
+            keywords (List[str]): The keywords to search for.
+            pages (int): The number of result pages to fetch for each keyword. Default is 1.
+            niche (Optional[str]): The niche the searches are for, archived as the request of every page.
+                Defaults to the keyword of each page.
+
+        Returns:
+            List[str]: The HTML of every result page, in keyword order, then page order.
+            Empty if there are no keywords or no pages to fetch.
+        """
+        searches = [
+            (keyword, page) for keyword in keywords for page in range(1, pages + 1)
+        ]
+        if not searches:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(searches), MAX_CONCURRENT_SEARCH_PAGES)
+        ) as executor:
+            return list(
+                executor.map(
+                    lambda search: self.search(*search, niche=niche), searches
+                )
+            )
+
+    def get_products_for_keyword(
+        self, keyword: str, pages: int = 1
+    ) -> List[AmazonProductSnapshot]:
         """
         Searches Amazon for a keyword and returns a list of products.
+        The result pages are fetched concurrently, and a product found in more than one page is kept once,
+        from the first page it appears in.
 
         Args:
             keyword (str): The keyword to search for.
+            pages (int): The number of result pages to fetch. Default is 1.
 
         Returns:
             list: A list of products.
         """
-        html = self.search(keyword)
-        return format_search(html)
+        return self.get_products_for_keywords([keyword], pages)
+
+    def get_products_for_keywords(
+        self, keywords: List[str], pages: int = 1, niche: Optional[str] = None
+    ) -> List[AmazonProductSnapshot]:
+        """
+        Searches Amazon for several keywords and returns the products found by any of them.
+        The result pages are fetched concurrently, and a product found in more than one page is kept once,
+        from the first keyword and page it appears in.
+
+        Args:
+            keywords (List[str]): The keywords to search for.
+            pages (int): The number of result pages to fetch for each keyword. Default is 1.
+            niche (Optional[str]): The niche the searches are for, archived as the request of every page.
+
+        Returns:
+            list: A list of products.
+        """
+        return format_search_pages(
+            self.fetch_search_pages_for_keywords(keywords, pages, niche),
+            self.config.AMAZON_SEARCH_PARSER,
+        )
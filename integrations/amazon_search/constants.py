@@ -0,0 +1,18 @@
+from enum import Enum
+
+
+class SearchParserEnum(str, Enum):
+    HTML_PARSER = "html.parser"
+    LXML = "lxml"
+
+
+# Byte sequences only found on Amazon robot check, captcha and automated access block pages
+BLOCK_PAGE_MARKERS = [
+    b"/errors/validateCaptcha",
+    b"Type the characters you see in this image",
+    b"Sorry, we just need to make sure you're not a robot",
+    b"To discuss automated access to Amazon data please contact",
+]
+
+# The maximum number of result pages of a search fetched at the same time
+MAX_CONCURRENT_SEARCH_PAGES = 5
@@ -1,16 +1,44 @@
-from bs4 import BeautifulSoup
+from typing import Callable, Dict, List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
 from functional import seq
 
 from app.exceptions import DataFormatError
 from app.interfaces.dtos.amazon_product_snapshot import AmazonProductSnapshot
+from app.interfaces.dtos.archived_response import ArchivedResponse
+from integrations.response_archive import read_archived_response
+from .constants import BLOCK_PAGE_MARKERS, SearchParserEnum
 
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = lxml_html = None
 
-def format_search(html: str) -> list[AmazonProductSnapshot]:
+
+def is_block_page(content: bytes) -> bool:
+    """
+    Tells whether a page is a robot check, captcha or automated access block page, instead of search results.
+    It only scans the raw bytes for known markers, so it is cheap enough to run before parsing any page.
+
+    Args:
+        content (bytes): The raw content of the page.
+
+    Returns:
+        bool: True if the page is a block page.
+    """
+    return any(marker in content for marker in BLOCK_PAGE_MARKERS)
+
+
+def format_search(
+    html: str, parser: SearchParserEnum = SearchParserEnum.HTML_PARSER
+) -> list[AmazonProductSnapshot]:
     """
     Extracts product information from HTML and returns a list of dictionaries.
+    Every parser gives the same output. If the chosen parser is not installed or fails,
+    the page is parsed again with the built-in html.parser.
 
     Args:
         html (str): The HTML content to extract product information from.
+        parser (SearchParserEnum): The parser engine to build the HTML tree with. Default is html.parser.
 
     Returns:
         products (List[AmazonProductSnapshot]): A list of products snapshots containing product information at that moment.
@@ -18,81 +46,317 @@ def format_search(html: str) -> list[AmazonProductSnapshot]:
     Raises:
         DataFormatError: If there is an error while extracting data from the HTML.
     """
-    products = []
+    products = None
+    if parser != SearchParserEnum.HTML_PARSER:
+        try:
+            products = SEARCH_PARSERS[SearchParserEnum(parser)](html)
+        except Exception:
+            # The built-in parser reports the error if the page is really malformed
+            products = None
 
     try:
-        soup = BeautifulSoup(html, features="html.parser")
-        # Get all divs that have "data-asin" attribute
-        html_products = soup.find_all("div", {"data-asin": True})
-        # Filter out products that have "data-asin" attribute equal to ""
-        html_products = [p for p in html_products if p["data-asin"]]
-        # Loop through each product and extract the that
-        for p in html_products:
-            p_data = {}
-
-            p_data["asin"] = p["data-asin"]
-
-            # For the title, find a div that have the "data-cy" attribute equal to "title-recipe"
-            # Then find the first "h2" tag, and inside of it, the first "span" tag. Its inner text is the title
-            title_recipe_div = p.find("div", {"data-cy": "title-recipe"})
-            p_data["title"] = title_recipe_div.find("h2").find("span").text
-            # Try to find a div that have "a-row a-spacing-micro" class
-            # If this div is found, then the product is sponsored
-            p_data["is_sponsored"] = (
-                title_recipe_div.find("div", {"class": "a-row a-spacing-micro"})
-                is not None
-            )
-
-            # For the price, find a div that have the "data-cy" attribute equal to "price-recipe"
-            # Then find the first "span" tag that have the "a-price-whole" class. Its inner text is integer part of the price
-            # If there is a "a-price-fraction" class, then there is a decimal part of the price
-            price_recipe_div = p.find("div", {"data-cy": "price-recipe"})
-            price_span = price_recipe_div.find("span", {"class": "a-price-whole"})
-            if not price_span:
-                continue
-            price = float(price_span.text.replace(",", ""))
-            price_fraction = price_recipe_div.find(
-                "span", {"class": "a-price-fraction"}
-            )
-            if price_fraction:
-                price += float(price_fraction.text) / 100
-            p_data["price_usd"] = price
-
-            # For the rating, find a div that have the "data-cy" attribute equal to "reviews-block"
-            # Then find the first "span" tag that has the aria-label attribute. Its value is the rating in a string format
-            reviews_block_div = p.find("div", {"data-cy": "reviews-block"})
-            if reviews_block_div:
-                p_data["rating"] = float(
-                    reviews_block_div.find("span", {"aria-label": True})[
-                        "aria-label"
-                    ].split(" ")[0]
-                )
-
-                # For the reviews, find the last "span" tag that contains "a-size-base s-underline-text" class within the reviews_block_div. Its inner text is a number with commas that contains the number of reviews
-                reviews_data = reviews_block_div.find_all(
-                    "span", {"class": "a-size-base s-underline-text"}
-                )
-                if not reviews_data:
-                    continue
-                p_data["reviews"] = int(reviews_data[-1].text.replace(",", ""))
-
-                # For the bought last month, find the last "span" tag within the reviews_block_div. Its inner text is a string that contains the number of bought last month
-                bought_last_month = reviews_block_div.find_all("span")[-1].text.split(
-                    " "
-                )[0]
-                # We have to convert "K" to "000" and "M" to "000000"
-                bought_last_month = bought_last_month.replace("K", "000").replace(
-                    "M", "000000"
-                )
-                # Then we have to remove all non-numeric characters from the string
-                p_data["bought_last_month"] = int(
-                    "".join(filter(str.isdigit, bought_last_month))
-                )
-
-            products.append(p_data)
+        if products is None:
+            products = extract_products_with_html_parser(html)
 
         # Remove duplicates using asin key, keep the first occurrence
         products = {p["asin"]: p for p in list(reversed(products))}.values()
         return seq(products).map(AmazonProductSnapshot.model_validate).to_list()
     except Exception as e:
         raise DataFormatError(f"Failed to extract data from HTML: {e}")
+
+
+def format_search_pages(
+    htmls: List[str], parser: SearchParserEnum = SearchParserEnum.HTML_PARSER
+) -> list[AmazonProductSnapshot]:
+    """
+    Extracts product information from the result pages of a search.
+    A product found in more than one page is kept once, from the first page it appears in.
+
+    Args:
+        htmls (List[str]): The HTML content of every result page, in page order.
+        parser (SearchParserEnum): The parser engine to build the HTML trees with. Default is html.parser.
+
+    Returns:
+        products (List[AmazonProductSnapshot]): A list of products snapshots containing product information at that moment.
+
+    Raises:
+        DataFormatError: If there is an error while extracting data from any page.
+    """
+    products = {}
+    for html in htmls:
+        for product in format_search(html, parser):
+            products.setdefault(product.asin, product)
+    return list(products.values())
+
+
+def format_archived_search(
+    entry: ArchivedResponse, parser: SearchParserEnum = SearchParserEnum.HTML_PARSER
+) -> list[AmazonProductSnapshot]:
+    """
+    Extracts product information from an archived search page.
+    The products are seen at the moment the page was received, not when it is parsed.
+
+    Args:
+        entry (ArchivedResponse): The index entry of the archived search page.
+        parser (SearchParserEnum): The parser engine to build the HTML tree with. Default is html.parser.
+
+    Returns:
+        products (List[AmazonProductSnapshot]): A list of products snapshots containing product information at that moment.
+
+    Raises:
+        DataFormatError: If there is an error while extracting data from the HTML.
+    """
+    html = read_archived_response(entry).decode("utf-8", errors="replace")
+    return [
+        product.model_copy(update={"seen_at": entry.timestamp})
+        for product in format_search(html, parser)
+    ]
+
+
+def extract_products_with_html_parser(html: str) -> List[Dict]:
+    """
+    Extracts the raw products data from a search page using BeautifulSoup with the built-in html.parser.
+
+    Args:
+        html (str): The HTML content to extract product information from.
+
+    Returns:
+        List[Dict]: The data of every product with pricing data, in page order, including duplicates.
+    """
+    products = []
+
+    # Only build the tree of the divs that have "data-asin" attribute, skipping the rest of the page
+    soup = BeautifulSoup(
+        html, features="html.parser", parse_only=SoupStrainer("div", {"data-asin": True})
+    )
+    # Get all divs that have "data-asin" attribute
+    html_products = soup.find_all("div", {"data-asin": True})
+    # Filter out products that have "data-asin" attribute equal to ""
+    html_products = [p for p in html_products if p["data-asin"]]
+    # Loop through each product and extract the that
+    for p in html_products:
+        p_data = {}
+
+        p_data["asin"] = p["data-asin"]
+
+        # For the title, find a div that have the "data-cy" attribute equal to "title-recipe"
+        # Then find the first "h2" tag, and inside of it, the first "span" tag. Its inner text is the title
+        title_recipe_div = p.find("div", {"data-cy": "title-recipe"})
+        p_data["title"] = title_recipe_div.find("h2").find("span").text
+        # Try to find a div that have "a-row a-spacing-micro" class
+        # If this div is found, then the product is sponsored
+        p_data["is_sponsored"] = (
+            title_recipe_div.find("div", {"class": "a-row a-spacing-micro"})
+            is not None
+        )
+
+        # For the price, find a div that have the "data-cy" attribute equal to "price-recipe"
+        # Then find the first "span" tag that have the "a-price-whole" class. Its inner text is integer part of the price
+        # If there is a "a-price-fraction" class, then there is a decimal part of the price
+        price_recipe_div = p.find("div", {"data-cy": "price-recipe"})
+        price_span = price_recipe_div.find("span", {"class": "a-price-whole"})
+        if not price_span:
+            continue
+        price_fraction = price_recipe_div.find("span", {"class": "a-price-fraction"})
+        p_data["price_usd"] = parse_price(
+            price_span.text, price_fraction.text if price_fraction else None
+        )
+
+        # For the rating, find a div that have the "data-cy" attribute equal to "reviews-block"
+        # Then find the first "span" tag that has the aria-label attribute. Its value is the rating in a string format
+        reviews_block_div = p.find("div", {"data-cy": "reviews-block"})
+        if reviews_block_div:
+            p_data["rating"] = parse_rating(
+                reviews_block_div.find("span", {"aria-label": True})["aria-label"]
+            )
+
+            # For the reviews, find the last "span" tag that contains "a-size-base s-underline-text" class within the reviews_block_div. Its inner text is a number with commas that contains the number of reviews
+            reviews_data = reviews_block_div.find_all(
+                "span", {"class": "a-size-base s-underline-text"}
+            )
+            if not reviews_data:
+                continue
+            p_data["reviews"] = parse_reviews(reviews_data[-1].text)
+
+            # For the bought last month, find the last "span" tag within the reviews_block_div. Its inner text is a string that contains the number of bought last month
+            p_data["bought_last_month"] = parse_bought_last_month(
+                reviews_block_div.find_all("span")[-1].text
+            )
+
+        products.append(p_data)
+
+    return products
+
+
+def extract_products_with_lxml(html: str) -> List[Dict]:
+    """
+    Extracts the raw products data from a search page using lxml, which builds the tree in C
+    and locates the elements with compiled XPath expressions. It follows the same rules as extract_products_with_html_parser.
+
+    Args:
+        html (str): The HTML content to extract product information from.
+
+    Returns:
+        List[Dict]: The data of every product with pricing data, in page order, including duplicates.
+
+    Raises:
+        ImportError: If lxml is not installed.
+    """
+    if lxml_html is None:
+        raise ImportError("lxml is not installed")
+
+    products = []
+
+    tree = lxml_html.fromstring(html)
+    for p in CARD_XPATHS["products"](tree):
+        p_data = {}
+
+        p_data["asin"] = p.get("data-asin")
+
+        title_recipe_div = CARD_XPATHS["title_recipe"](p)[0]
+        p_data["title"] = CARD_XPATHS["title"](title_recipe_div)[0].text_content()
+        p_data["is_sponsored"] = bool(CARD_XPATHS["sponsored"](title_recipe_div))
+
+        price_recipe_div = CARD_XPATHS["price_recipe"](p)[0]
+        price_span = _first(CARD_XPATHS["price_whole"](price_recipe_div))
+        if price_span is None:
+            continue
+        price_fraction = _first(CARD_XPATHS["price_fraction"](price_recipe_div))
+        p_data["price_usd"] = parse_price(
+            price_span.text_content(),
+            price_fraction.text_content() if price_fraction is not None else None,
+        )
+
+        reviews_block_div = _first(CARD_XPATHS["reviews_block"](p))
+        if reviews_block_div is not None:
+            p_data["rating"] = parse_rating(
+                CARD_XPATHS["rating"](reviews_block_div)[0].get("aria-label")
+            )
+
+            reviews_data = CARD_XPATHS["reviews"](reviews_block_div)
+            if not reviews_data:
+                continue
+            p_data["reviews"] = parse_reviews(reviews_data[-1].text_content())
+
+            p_data["bought_last_month"] = parse_bought_last_month(
+                CARD_XPATHS["spans"](reviews_block_div)[-1].text_content()
+            )
+
+        products.append(p_data)
+
+    return products
+
+
+def parse_price(whole: str, fraction: Optional[str]) -> float:
+    """
+    Parses a price from the texts of its integer and decimal parts.
+
+    Args:
+        whole (str): The integer part of the price, possibly with commas.
+        fraction (Optional[str]): The decimal part of the price, if any.
+
+    Returns:
+        float: The price.
+    """
+    price = float(whole.replace(",", ""))
+    if fraction:
+        price += float(fraction) / 100
+    return price
+
+
+def parse_rating(label: str) -> float:
+    """
+    Parses a rating from its label, such as "4.4 out of 5 stars".
+
+    Args:
+        label (str): The label of the rating.
+
+    Returns:
+        float: The rating.
+    """
+    return float(label.split(" ")[0])
+
+
+def parse_reviews(text: str) -> int:
+    """
+    Parses the number of reviews from a number with commas.
+
+    Args:
+        text (str): The text of the number of reviews.
+
+    Returns:
+        int: The number of reviews.
+    """
+    return int(text.replace(",", ""))
+
+
+def parse_bought_last_month(text: str) -> int:
+    """
+    Parses the number of purchases in the last month from a text such as "600+ bought in past month".
+
+    Args:
+        text (str): The text of the purchases in the last month.
+
+    Returns:
+        int: The number of purchases in the last month.
+    """
+    bought_last_month = text.split(" ")[0]
+    # We have to convert "K" to "000" and "M" to "000000"
+    bought_last_month = bought_last_month.replace("K", "000").replace("M", "000000")
+    # Then we have to remove all non-numeric characters from the string
+    return int("".join(filter(str.isdigit, bought_last_month)))
+
+
+def _has_class(name: str) -> str:
+    """
+    Builds an XPath condition matching elements having a class among others.
+
+    Args:
+        name (str): The class name.
+
+    Returns:
+        str: The XPath condition.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first(elements: List):
+    """
+    Gets the first of the elements matched by an XPath expression.
+
+    Args:
+        elements (List): The matched elements.
+
+    Returns:
+        The first element, or None if there is none.
+    """
+    return elements[0] if elements else None
+
+
+# XPath expressions compiled once, then evaluated against every card
+CARD_XPATHS = (
+    {
+        "products": etree.XPath("//div[@data-asin!='']"),
+        "title_recipe": etree.XPath(".//div[@data-cy='title-recipe']"),
+        "title": etree.XPath("(.//h2)[1]//span"),
+        "sponsored": etree.XPath(
+            ".//div[normalize-space(@class)='a-row a-spacing-micro']"
+        ),
+        "price_recipe": etree.XPath(".//div[@data-cy='price-recipe']"),
+        "price_whole": etree.XPath(f".//span[{_has_class('a-price-whole')}]"),
+        "price_fraction": etree.XPath(f".//span[{_has_class('a-price-fraction')}]"),
+        "reviews_block": etree.XPath(".//div[@data-cy='reviews-block']"),
+        "rating": etree.XPath(".//span[@aria-label]"),
+        "reviews": etree.XPath(
+            ".//span[normalize-space(@class)='a-size-base s-underline-text']"
+        ),
+        "spans": etree.XPath(".//span"),
+    }
+    if etree is not None
+    else {}
+)
+
+SEARCH_PARSERS: Dict[SearchParserEnum, Callable[[str], List[Dict]]] = {
+    SearchParserEnum.HTML_PARSER: extract_products_with_html_parser,
+    SearchParserEnum.LXML: extract_products_with_lxml,
+}
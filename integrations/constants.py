@@ -12,4 +12,9 @@ class RetryStrategyEnum(Enum):
     USE_PROXY = "USE_PROXY"
     BEFORE_RETRY_FUNCTION = "BEFORE_RETRY_FUNCTION"
 
+class ArchiveProviderEnum(Enum):
+    AMAZON_SEARCH = "amazon_search"
+    UBERSUGGEST_KEYWORD_REPORT = "ubersuggest_keyword_report"
+
 SUCCESSFUL_STATUS_CODES = [200, 201, 202, 204, 302]
+BLOCKED_STATUS_CODES = [403, 429, 503]
@@ -1,7 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, Mock
 
 from app.exceptions import DataFetchError
+from config import Config
 from integrations.google_suggest.client import GoogleSuggestClient
 
 
@@ -30,3 +33,56 @@ class TestGoogleSuggestClient:
 
         with pytest.raises(DataFetchError):
             google_suggest_client.get_suggestions("cat toys")
+
+    @pytest.fixture
+    def hedged_google_suggest_client(self, search: dict):
+        def request(method, uri, use_proxy):
+            # The first attempt hangs, while the duplicate through a proxy answers at once
+            if not use_proxy:
+                time.sleep(0.5)
+            return Mock(status_code=200, json=Mock(return_value=[uri, [str(use_proxy)]]))
+
+        http_client = Mock()
+        http_client.request.side_effect = request
+        config = Config(_env_file=".env.test", GOOGLE_SUGGEST_HEDGING=True)
+        return GoogleSuggestClient(http_client, config)
+
+    def test_should_not_hedge_request_until_enough_latencies_were_seen(
+        self, hedged_google_suggest_client: GoogleSuggestClient
+    ):
+        suggestions = hedged_google_suggest_client.get_suggestions("cat toys")
+
+        assert suggestions == ["False"]
+        assert hedged_google_suggest_client.http_client.request.call_count == 1
+
+    def test_should_take_duplicate_through_proxy_if_request_is_slower_than_p90(
+        self, hedged_google_suggest_client: GoogleSuggestClient
+    ):
+        for _ in range(20):
+            hedged_google_suggest_client.latency_tracker.record(0.01)
+
+        started_at = time.monotonic()
+        suggestions = hedged_google_suggest_client.get_suggestions("cat toys")
+
+        assert suggestions == ["True"]
+        assert time.monotonic() - started_at < 0.4
+        assert hedged_google_suggest_client.http_client.request.call_count == 2
+
+    def test_should_not_count_time_waiting_for_a_free_worker_towards_hedge_delay(
+        self, hedged_google_suggest_client: GoogleSuggestClient
+    ):
+        for _ in range(20):
+            hedged_google_suggest_client.latency_tracker.record(0.2)
+        # Every attempt answers at once, but every worker is busy for a while before the request can start
+        hedged_google_suggest_client.http_client.request.side_effect = (
+            lambda method, uri, use_proxy: Mock(
+                status_code=200, json=Mock(return_value=[uri, [str(use_proxy)]])
+            )
+        )
+        hedged_google_suggest_client.hedging_executor = ThreadPoolExecutor(max_workers=1)
+        hedged_google_suggest_client.hedging_executor.submit(time.sleep, 0.4)
+
+        suggestions = hedged_google_suggest_client.get_suggestions("cat toys")
+
+        assert suggestions == ["False"]
+        assert hedged_google_suggest_client.http_client.request.call_count == 1
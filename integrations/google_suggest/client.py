@@ -1,22 +1,40 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import threading
+import time
+from typing import List, Optional
 import inject
+import requests
 
 from app.exceptions import DataFetchError
+from config import Config
 from integrations.google_suggest.formatters import format_get_suggestions
-from .constants import DEFAULT_COUNTRY, DEFAULT_LANGUAGE
+from .constants import (
+    DEFAULT_COUNTRY,
+    DEFAULT_LANGUAGE,
+    HEDGE_LATENCY_WINDOW,
+    HEDGE_MAX_WORKERS,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+)
 from ..constants import HttpMethodEnum
+from ..latency_tracker import LatencyTracker
 from ..retriable_http_client import RetriableHttpClient
 
 
 class GoogleSuggestClient:
     """
     A client for retrieving Google search suggestions.
+    If GOOGLE_SUGGEST_HEDGING is set, a request still unanswered after the p90 latency seen so far
+    is duplicated through a proxy, and whichever answers first is used.
     """
 
     @inject.autoparams()
-    def __init__(self, http_client: RetriableHttpClient):
+    def __init__(self, http_client: RetriableHttpClient, config: Config):
         self.http_client = http_client
         self.base_uri = "https://suggestqueries.google.com"
+        self.hedging = config.GOOGLE_SUGGEST_HEDGING
+        self.latency_tracker = LatencyTracker(HEDGE_LATENCY_WINDOW, HEDGE_MIN_SAMPLES)
+        self.hedging_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS)
 
     def get_suggestions(
         self,
@@ -39,9 +57,75 @@ class GoogleSuggestClient:
             DataFetchError: If the request fails.
         """
         uri = f"{self.base_uri}/complete/search?client=chrome&q={query}&hl={language}&gl={country}"
-        response = self.http_client.request(HttpMethodEnum.GET, uri)
+        response = (
+            self.__request_hedged(uri) if self.hedging else self.__request_timed(uri)
+        )
         if response.status_code != 200:
             raise DataFetchError(
                 f"Failed to get suggestions: {response.text} - {response.status_code}"
             )
         return format_get_suggestions(response.json())
+
+    def __request_hedged(self, uri: str) -> requests.Response:
+        """
+        Requests the URI, sending a duplicate through a proxy if the first attempt takes longer than usual.
+        No duplicate is sent until enough latencies were seen to tell what usual is.
+        The delay counts from the moment the first attempt starts, so waiting for a free worker doesn't trigger a duplicate.
+
+        Args:
+            uri (str): The URI to request.
+
+        Returns:
+            requests.Response: The first successful response, or the last one if neither succeeded.
+
+        Raises:
+            Exception: The error of the last attempt to finish, if neither got a response.
+        """
+        started = threading.Event()
+        first = self.hedging_executor.submit(self.__request_timed, uri, False, started)
+        delay = self.latency_tracker.percentile(HEDGE_PERCENTILE)
+        if delay is None:
+            return first.result()
+
+        started.wait()
+        if wait([first], timeout=delay).done:
+            return first.result()
+
+        hedge = self.hedging_executor.submit(self.__request_timed, uri, True)
+        response, error = None, None
+        for attempt in as_completed([first, hedge]):
+            try:
+                response = attempt.result()
+            except Exception as e:
+                error = e
+                continue
+            if response.status_code == 200:
+                return response
+
+        if response is None:
+            raise error
+        return response
+
+    def __request_timed(
+        self,
+        uri: str,
+        use_proxy: bool = False,
+        started: Optional[threading.Event] = None,
+    ) -> requests.Response:
+        """
+        Requests the URI, recording how long it took.
+
+        Args:
+            uri (str): The URI to request.
+            use_proxy (bool, optional): If True, the request goes through a proxy. Default is False.
+            started (Optional[threading.Event], optional): If given, it is set as soon as the request starts.
+
+        Returns:
+            requests.Response: The response.
+        """
+        if started:
+            started.set()
+        started_at = time.monotonic()
+        response = self.http_client.request(HttpMethodEnum.GET, uri, use_proxy=use_proxy)
+        self.latency_tracker.record(time.monotonic() - started_at)
+        return response
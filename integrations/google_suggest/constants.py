@@ -1,2 +1,11 @@
 DEFAULT_LANGUAGE = "en"
-DEFAULT_COUNTRY = "us"
\ No newline at end of file
+DEFAULT_COUNTRY = "us"
+
+# The percentile of the latencies seen after which a request is hedged with a duplicate
+HEDGE_PERCENTILE = 0.9
+# The number of latest latencies the percentile is calculated from
+HEDGE_LATENCY_WINDOW = 200
+# The number of latencies to see before hedging, so the percentile is meaningful
+HEDGE_MIN_SAMPLES = 20
+# The number of requests, first attempts and duplicates, running at once
+HEDGE_MAX_WORKERS = 32
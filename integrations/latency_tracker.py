@@ -0,0 +1,43 @@
+from collections import deque
+import math
+import threading
+from typing import Optional
+
+
+class LatencyTracker:
+    """
+    Keeps the latencies of the latest requests to a service, to tell how long a request usually takes.
+    """
+
+    def __init__(self, window: int, min_samples: int):
+        self.latencies = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        """
+        Records the latency of a request, forgetting the oldest one when the window is full.
+
+        Args:
+            latency (float): How long the request took, in seconds.
+        """
+        with self.lock:
+            self.latencies.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Gets a percentile of the latencies recorded, using the nearest rank.
+
+        Args:
+            fraction (float): The percentile, from 0 to 1, such as 0.9 for p90.
+
+        Returns:
+            float: The latency, in seconds, that the given fraction of the requests took at most.
+            None: If fewer than min_samples latencies were recorded yet.
+        """
+        with self.lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+
+        return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
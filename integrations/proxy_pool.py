@@ -0,0 +1,170 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+import inject
+
+from config.config import Config
+
+# How much each new outcome moves the rolling scores of an endpoint, from 0 (never) to 1 (forgets the past)
+SCORE_SMOOTHING = 0.2
+# The success rate below which an endpoint is no longer less likely to be picked, so it can still prove it recovered
+MIN_SUCCESS_RATE = 0.05
+# The latency, in seconds, assumed for an endpoint that was never measured
+DEFAULT_LATENCY = 1.0
+
+
+class ProxyEndpoint:
+    """
+    A proxy endpoint of the pool, with the rolling scores of the requests made through it.
+    """
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self.success_rate = 1.0
+        self.latency = DEFAULT_LATENCY
+        self.cooldown_until = 0.0
+
+    @property
+    def proxies(self) -> dict:
+        """
+        The proxy configuration to send a request through this endpoint.
+        """
+        return {"http": self.uri, "https": self.uri}
+
+    @property
+    def weight(self) -> float:
+        """
+        How likely this endpoint is to be picked: the more successful and the faster, the likelier.
+        """
+        return max(self.success_rate, MIN_SUCCESS_RATE) / max(self.latency, 0.01)
+
+    def is_cooling_down(self, now: float) -> bool:
+        """
+        Whether this endpoint got blocked recently and should rest.
+
+        Args:
+            now (float): The current moment, from time.monotonic.
+
+        Returns:
+            bool: True if the endpoint is cooling down.
+        """
+        return now < self.cooldown_until
+
+
+class ProxyPool:
+    """
+    A pool of proxy endpoints, from PROXY_POOL, or the single PROXY_PROVIDER_CREDENTIALS endpoint when not set.
+    Endpoints are picked at random weighted by their rolling success rate and latency,
+    and rest for PROXY_COOLDOWN seconds whenever they get blocked.
+    If PROXY_POOL_STICKY is set, each host keeps being routed through the same endpoint while it works.
+    """
+
+    @inject.autoparams()
+    def __init__(self, config: Config):
+        uris = (
+            load_proxy_endpoints(config.PROXY_POOL)
+            if config.PROXY_POOL
+            else [config.PROXY_PROVIDER_CREDENTIALS]
+        )
+        self.endpoints = [ProxyEndpoint(uri) for uri in uris]
+        self.cooldown = config.PROXY_COOLDOWN
+        self.sticky = config.PROXY_POOL_STICKY
+        self.proxy_first_hosts = {
+            host.strip() for host in config.PROXY_FIRST_HOSTS.split(",") if host.strip()
+        }
+        self.sticky_endpoints: Dict[str, ProxyEndpoint] = {}
+        self.lock = threading.Lock()
+
+    def is_proxy_first(self, host: str) -> bool:
+        """
+        Whether requests to a host should go through a proxy from the first attempt,
+        because the host blocks direct requests too often to be worth trying.
+
+        Args:
+            host (str): The host of the request.
+
+        Returns:
+            bool: True if the host is in PROXY_FIRST_HOSTS.
+        """
+        return host in self.proxy_first_hosts
+
+    def acquire(self, host: Optional[str] = None) -> ProxyEndpoint:
+        """
+        Picks an endpoint to send a request through.
+        When every endpoint is cooling down, picks the one whose cooldown ends first.
+
+        Args:
+            host (Optional[str]): The host of the request, to keep it on the same endpoint when the pool is sticky.
+
+        Returns:
+            ProxyEndpoint: The endpoint picked.
+        """
+        now = time.monotonic()
+        with self.lock:
+            sticky_endpoint = self.sticky_endpoints.get(host) if self.sticky else None
+            if sticky_endpoint and not sticky_endpoint.is_cooling_down(now):
+                return sticky_endpoint
+
+            available = [e for e in self.endpoints if not e.is_cooling_down(now)]
+            if available:
+                endpoint = random.choices(
+                    available, weights=[e.weight for e in available]
+                )[0]
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.cooldown_until)
+
+            if self.sticky and host:
+                self.sticky_endpoints[host] = endpoint
+            return endpoint
+
+    def report(
+        self,
+        endpoint: ProxyEndpoint,
+        success: bool,
+        latency: float,
+        blocked: bool = False,
+    ) -> None:
+        """
+        Updates the rolling scores of an endpoint with the outcome of a request sent through it.
+        A blocked endpoint rests for the cooldown, and no longer sticks to any host.
+
+        Args:
+            endpoint (ProxyEndpoint): The endpoint the request was sent through.
+            success (bool): Whether the request succeeded.
+            latency (float): How long the request took, in seconds.
+            blocked (bool, optional): Whether the host blocked the request. Default is False.
+        """
+        with self.lock:
+            endpoint.success_rate += SCORE_SMOOTHING * (
+                float(success) - endpoint.success_rate
+            )
+            endpoint.latency += SCORE_SMOOTHING * (latency - endpoint.latency)
+
+            if blocked:
+                endpoint.cooldown_until = time.monotonic() + self.cooldown
+                self.sticky_endpoints = {
+                    host: e
+                    for host, e in self.sticky_endpoints.items()
+                    if e is not endpoint
+                }
+
+
+def load_proxy_endpoints(value: str) -> List[str]:
+    """
+    Loads proxy endpoints from a comma-separated list, or from a file with one endpoint per line.
+    Blank lines and lines starting with # are ignored in files.
+
+    Args:
+        value (str): The comma-separated endpoints, or the path of the file.
+
+    Returns:
+        List[str]: The endpoints, in the format `username:password@host:port`.
+    """
+    if os.path.isfile(value):
+        with open(value) as file:
+            lines = [line.strip() for line in file]
+        return [line for line in lines if line and not line.startswith("#")]
+
+    return [uri.strip() for uri in value.split(",") if uri.strip()]
@@ -0,0 +1,147 @@
+from datetime import datetime
+import gzip
+import hashlib
+import os
+from pathlib import Path
+import threading
+from typing import List, Optional
+import uuid
+import inject
+
+from app.interfaces.dtos.archived_response import ArchivedResponse
+from config.config import Config
+from .constants import ArchiveProviderEnum
+
+
+class ResponseArchive:
+    """
+    A content-addressed archive of raw provider responses on local disk.
+    Each distinct content is stored once, gzip-compressed, under its SHA-256 hash,
+    while every response is appended to the index of its provider with the request and the moment it was received.
+    The index stores content paths relative to the archive root, so the archive keeps working when moved.
+    Archiving is disabled when RESPONSE_ARCHIVE_DIR is not set.
+    """
+
+    @inject.autoparams()
+    def __init__(self, config: Config):
+        self.root = (
+            Path(config.RESPONSE_ARCHIVE_DIR) if config.RESPONSE_ARCHIVE_DIR else None
+        )
+        self.index_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the archive is enabled.
+        """
+        return self.root is not None
+
+    def store(
+        self,
+        provider: ArchiveProviderEnum,
+        request: str,
+        content: bytes,
+        timestamp: Optional[datetime] = None,
+    ) -> Optional[ArchivedResponse]:
+        """
+        Stores a raw response in the archive.
+
+        Args:
+            provider (ArchiveProviderEnum): The provider the response came from.
+            request (str): What was requested, such as the searched keyword.
+            content (bytes): The raw content of the response.
+            timestamp (Optional[datetime]): When the response was received. Defaults to now.
+
+        Returns:
+            ArchivedResponse: The index entry of the stored response.
+            None: If the archive is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self.__get_object_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so a content is never seen half written
+            temporary_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            temporary_path.write_bytes(gzip.compress(content))
+            os.replace(temporary_path, path)
+
+        entry = ArchivedResponse(
+            provider=provider.value,
+            request=request,
+            timestamp=timestamp or datetime.now(),
+            sha256=sha256,
+            path=str(path.relative_to(self.root.resolve())),
+        )
+        with self.index_lock, open(self.__get_index_path(provider), "a") as index:
+            index.write(entry.model_dump_json() + "\n")
+
+        return entry.model_copy(update={"path": str(path)})
+
+    def get_responses(
+        self, provider: ArchiveProviderEnum, since: Optional[datetime] = None
+    ) -> List[ArchivedResponse]:
+        """
+        Gets the index entries of the archived responses of a provider, oldest first.
+
+        Args:
+            provider (ArchiveProviderEnum): The provider of the responses.
+            since (Optional[datetime]): If given, only responses received from this moment on are returned.
+
+        Returns:
+            List[ArchivedResponse]: The index entries of the responses, with the absolute path of their content.
+        """
+        if not self.enabled or not self.__get_index_path(provider).exists():
+            return []
+
+        with open(self.__get_index_path(provider)) as index:
+            entries = [ArchivedResponse.model_validate_json(line) for line in index]
+
+        if since is not None:
+            entries = [entry for entry in entries if entry.timestamp >= since]
+        # The content is located from the hash, so the archive can be read from anywhere it is moved or mounted
+        entries = [
+            entry.model_copy(update={"path": str(self.__get_object_path(entry.sha256))})
+            for entry in entries
+        ]
+        return sorted(entries, key=lambda entry: entry.timestamp)
+
+    def __get_object_path(self, sha256: str) -> Path:
+        """
+        Gets the absolute path of an archived content.
+
+        Args:
+            sha256 (str): The SHA-256 hash of the content.
+
+        Returns:
+            Path: The path of the compressed content.
+        """
+        return self.root.resolve() / "objects" / sha256[:2] / f"{sha256}.gz"
+
+    def __get_index_path(self, provider: ArchiveProviderEnum) -> Path:
+        """
+        Gets the path of the index of a provider.
+
+        Args:
+            provider (ArchiveProviderEnum): The provider.
+
+        Returns:
+            Path: The path of the index file.
+        """
+        return self.root / f"{provider.value}.jsonl"
+
+
+def read_archived_response(entry: ArchivedResponse) -> bytes:
+    """
+    Reads the raw content of an archived response.
+    It only needs the entry, so it can run in any process.
+
+    Args:
+        entry (ArchivedResponse): The index entry of the response.
+
+    Returns:
+        bytes: The raw content of the response.
+    """
+    return gzip.decompress(Path(entry.path).read_bytes())
@@ -1,11 +1,19 @@
 from typing import Optional
+from urllib.parse import urlparse
 import inject
 import requests
 import time
 
 from config.config import Config
 from monitoring.logger import Logger, LogTypeEnum
-from .constants import SUCCESSFUL_STATUS_CODES, HttpMethodEnum, RetryStrategyEnum
+from .constants import (
+    BLOCKED_STATUS_CODES,
+    SUCCESSFUL_STATUS_CODES,
+    HttpMethodEnum,
+    RetryStrategyEnum,
+)
+from .proxy_pool import ProxyEndpoint, ProxyPool
+from .user_agent_pool import UserAgentPool
 
 
 class RetriableHttpClient:
@@ -14,9 +22,17 @@ class RetriableHttpClient:
     """
 
     @inject.autoparams()
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(
+        self,
+        config: Config,
+        logger: Logger,
+        proxy_pool: ProxyPool,
+        user_agent_pool: UserAgentPool,
+    ):
         self.config = config
         self.logger = logger
+        self.proxy_pool = proxy_pool
+        self.user_agent_pool = user_agent_pool
 
     def get_session(self) -> requests.Session:
         """
@@ -27,18 +43,6 @@ class RetriableHttpClient:
         """
         return requests.Session()
 
-    def get_proxies(self) -> dict:
-        """
-        Returns a dictionary containing the proxy configuration.
-
-        Returns:
-            dict: A dictionary containing the proxy configuration.
-        """
-        return {
-            "http": self.config.PROXY_PROVIDER_CREDENTIALS,
-            "https": self.config.PROXY_PROVIDER_CREDENTIALS,
-        }
-
     def request(
         self,
         method: HttpMethodEnum,
@@ -48,6 +52,9 @@ class RetriableHttpClient:
         retry_strategy: Optional[RetryStrategyEnum] = None,
         before_retry: Optional[callable] = None,
         session: Optional[requests.Session] = None,
+        is_rejected: Optional[callable] = None,
+        rotate_user_agent: bool = False,
+        use_proxy: bool = False,
         **kwargs,
     ):
         """
@@ -62,6 +69,11 @@ class RetriableHttpClient:
             before_retry (callable, optional): A function to execute before each retry. Can return new headers.
                                                Will execute only if retry_strategy is BEFORE_RETRY_FUNCTION. Default is None.
             session (requests.Session, optional): The requests session to use. Default is None.
+            is_rejected (callable, optional): A function receiving a response with a successful status code,
+                                              returning True if it should be retried anyway, such as a block page. Default is None.
+            rotate_user_agent (bool, optional): If True, each attempt is sent with a user agent from the pool,
+                                                sticking to the proxy endpoint used. Default is False.
+            use_proxy (bool, optional): If True, the request goes through a proxy endpoint from the first attempt. Default is False.
             **kwargs: Additional keyword arguments to pass to the requests library.
 
         Returns:
@@ -79,9 +91,23 @@ class RetriableHttpClient:
         )
 
         request_agent = session if session else requests
-        response = request_agent.request(method.value, uri, **kwargs)
+        host = urlparse(uri).hostname
+        endpoint = None
+        if use_proxy or (
+            retry_strategy == RetryStrategyEnum.USE_PROXY
+            and self.proxy_pool.is_proxy_first(host)
+        ):
+            endpoint = self.proxy_pool.acquire(host)
+            kwargs["proxies"] = endpoint.proxies
+
+        response = self.__send(
+            request_agent, method, uri, endpoint, is_rejected, rotate_user_agent, **kwargs
+        )
 
-        while response.status_code not in SUCCESSFUL_STATUS_CODES and retry_times:
+        while retry_times and (
+            response.status_code not in SUCCESSFUL_STATUS_CODES
+            or (is_rejected and is_rejected(response))
+        ):
             retry_times -= 1
             time.sleep(cooldown)
             self.logger.notify(
@@ -94,9 +120,68 @@ class RetriableHttpClient:
                     kwargs["headers"] = new_headers
 
             elif retry_strategy == RetryStrategyEnum.USE_PROXY:
-                proxies = self.get_proxies()
-                kwargs["proxies"] = proxies
+                endpoint = self.proxy_pool.acquire(host)
+                kwargs["proxies"] = endpoint.proxies
 
-            response = request_agent.request(method.value, uri, **kwargs)
+            response = self.__send(
+                request_agent, method, uri, endpoint, is_rejected, rotate_user_agent, **kwargs
+            )
             
         return response
+
+    def __send(
+        self,
+        request_agent,
+        method: HttpMethodEnum,
+        uri: str,
+        endpoint: Optional[ProxyEndpoint],
+        is_rejected: Optional[callable],
+        rotate_user_agent: bool,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Sends a single HTTP request, reporting its outcome to the proxy pool when sent through a proxy endpoint,
+        and to the user agent pool when sent with a user agent from it.
+        A response with a blocked status code, or rejected by is_rejected, counts as blocked.
+
+        Args:
+            request_agent: The requests session, or the requests module itself.
+            method (HttpMethodEnum): The HTTP method.
+            uri (str): The URI to send the request to.
+            endpoint (Optional[ProxyEndpoint]): The proxy endpoint the request is sent through, if any.
+            is_rejected (callable, optional): A function receiving a response with a successful status code,
+                                              returning True if it was rejected anyway.
+            rotate_user_agent (bool): If True, the request is sent with a user agent from the pool.
+            **kwargs: Additional keyword arguments to pass to the requests library.
+
+        Returns:
+            requests.Response: The response object from the HTTP request.
+        """
+        proxy = endpoint.uri if endpoint else None
+        if rotate_user_agent:
+            user_agent = self.user_agent_pool.pick(proxy)
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "user-agent": user_agent}
+
+        started_at = time.monotonic()
+        try:
+            response = request_agent.request(method.value, uri, **kwargs)
+        except requests.RequestException:
+            if endpoint:
+                self.proxy_pool.report(endpoint, False, time.monotonic() - started_at)
+            raise
+
+        successful = response.status_code in SUCCESSFUL_STATUS_CODES
+        blocked = response.status_code in BLOCKED_STATUS_CODES or bool(
+            successful and is_rejected and is_rejected(response)
+        )
+        if endpoint:
+            self.proxy_pool.report(
+                endpoint,
+                successful and not blocked,
+                time.monotonic() - started_at,
+                blocked=blocked,
+            )
+        if rotate_user_agent and blocked:
+            self.user_agent_pool.report_blocked(user_agent, proxy)
+
+        return response
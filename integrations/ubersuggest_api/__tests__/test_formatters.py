@@ -1,7 +1,12 @@
 from datetime import datetime, timezone
 
+import json
 import pytest
+from config import Config
+from integrations.constants import ArchiveProviderEnum
+from integrations.response_archive import ResponseArchive
 from integrations.ubersuggest_api.formatters import (
+    format_archived_keyword_report,
     format_get_keyword_report,
     extract_and_filter_kws,
     extract_serp_entries,
@@ -178,3 +183,41 @@ def test_should_filter_out_matching_keywords_without_volume(matching_keywords: d
     filtered_keywords = extract_and_filter_kws(suggestion_keywords, "en", 2840, "MATCH")
 
     assert len(filtered_keywords) == 20
+
+
+def test_should_format_archived_keyword_report_as_the_original_responses(
+    keyword_info: dict,
+    matching_keywords: dict,
+    serp_analysis: dict,
+    domain_counts: dict,
+    tmp_path,
+):
+    response_archive = ResponseArchive(
+        Config(_env_file=".env.test", RESPONSE_ARCHIVE_DIR=str(tmp_path))
+    )
+    entry = response_archive.store(
+        ArchiveProviderEnum.UBERSUGGEST_KEYWORD_REPORT,
+        "cat toys",
+        json.dumps(
+            {
+                "keyword_info": keyword_info,
+                "matching_keywords": matching_keywords,
+                "serp_analysis": serp_analysis,
+                "domain_counts": domain_counts,
+                "language": "en",
+                "loc_id": 2840,
+            }
+        ).encode(),
+    )
+
+    keyword_report = format_archived_keyword_report(entry)
+    original_report = format_get_keyword_report(
+        keyword_info, matching_keywords, serp_analysis, domain_counts, "en", 2840
+    )
+
+    # Suggestions without an update date are dated when formatted, so only their keywords are compared
+    assert keyword_report.info == original_report.info
+    assert keyword_report.serp_analysis == original_report.serp_analysis
+    assert [s.keyword for s in keyword_report.suggestions] == [
+        s.keyword for s in original_report.suggestions
+    ]
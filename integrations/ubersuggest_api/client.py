@@ -1,3 +1,4 @@
+import json
 from typing import List
 import inject
 
@@ -8,7 +9,12 @@ from app.exceptions import (
 )
 from app.interfaces.dtos.keyword_report import KeywordReport
 from config import Config
-from integrations.constants import HttpMethodEnum, RetryStrategyEnum
+from integrations.constants import (
+    ArchiveProviderEnum,
+    HttpMethodEnum,
+    RetryStrategyEnum,
+)
+from integrations.response_archive import ResponseArchive
 from integrations.retriable_http_client import RetriableHttpClient
 from .formatters import format_get_keyword_report
 from .constants import DEFAULT_MARKET_LANGUAGE, DEFAULT_MARKET_LOCATION_ID
@@ -20,9 +26,15 @@ class UbersuggestAPIClient:
     """
 
     @inject.autoparams()
-    def __init__(self, config: Config, http_client: RetriableHttpClient):
+    def __init__(
+        self,
+        config: Config,
+        http_client: RetriableHttpClient,
+        response_archive: ResponseArchive,
+    ):
         self.config = config
         self.http_client = http_client
+        self.response_archive = response_archive
         self.base_uri = "https://app.neilpatel.com/api"
         self.authorization_token = None
 
@@ -223,6 +235,7 @@ class UbersuggestAPIClient:
     ) -> KeywordReport:
         """
         Retrieves a keyword report for the specified keyword.
+        The raw responses it is built from are archived together, if the archive is enabled.
 
         Args:
             keyword (str): The keyword to retrieve the report for.
@@ -249,6 +262,21 @@ class UbersuggestAPIClient:
         urls = [entry["url"] for entry in serp_analysis["serpEntries"][:20]]
         domain_counts = self.get_domain_counts(urls)
 
+        self.response_archive.store(
+            ArchiveProviderEnum.UBERSUGGEST_KEYWORD_REPORT,
+            keyword,
+            json.dumps(
+                {
+                    "keyword_info": keyword_info,
+                    "matching_keywords": matching_keywords,
+                    "serp_analysis": serp_analysis,
+                    "domain_counts": domain_counts,
+                    "language": language,
+                    "loc_id": loc_id,
+                }
+            ).encode(),
+        )
+
         return format_get_keyword_report(
             keyword_info,
             matching_keywords,
@@ -1,8 +1,11 @@
+import json
 from datetime import datetime
 from typing import List
 from functional import seq
 
+from app.interfaces.dtos.archived_response import ArchivedResponse
 from app.interfaces.dtos.keyword_report import KeywordReport
+from integrations.response_archive import read_archived_response
 
 
 from typing import List
@@ -142,3 +145,16 @@ def format_get_keyword_report(
     }
 
     return KeywordReport.model_validate(formatted_data)
+
+
+def format_archived_keyword_report(entry: ArchivedResponse) -> KeywordReport:
+    """
+    Formats an archived keyword report, from the raw responses it was built from.
+
+    Args:
+        entry (ArchivedResponse): The index entry of the archived keyword report.
+
+    Returns:
+        KeywordReport: The formatted keyword report.
+    """
+    return format_get_keyword_report(**json.loads(read_archived_response(entry)))
@@ -0,0 +1,96 @@
+from pathlib import Path
+import random
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+import inject
+
+from config.config import Config
+
+# The user agents rotated when USER_AGENTS_FILE is not set
+DEFAULT_USER_AGENTS_FILE = Path(__file__).resolve().parent / "user_agents.tsv"
+# How much the weight of a user agent shrinks each time it gets blocked
+BLOCKED_WEIGHT_DECAY = 0.5
+
+
+class UserAgentPool:
+    """
+    A weighted rotation of user agents, loaded once from USER_AGENTS_FILE, or the bundled list when not set.
+    Each proxy, or the direct connection, sticks to the same user agent until the pair gets blocked,
+    so a single IP doesn't look like many browsers at once.
+    Blocked pairs are recorded, and a user agent gets less likely to be picked each time it is blocked.
+    """
+
+    @inject.autoparams()
+    def __init__(self, config: Config):
+        entries = load_user_agents(config.USER_AGENTS_FILE or DEFAULT_USER_AGENTS_FILE)
+        self.user_agents = [user_agent for _, user_agent in entries]
+        self.weights = [weight for weight, _ in entries]
+        self.sticky_user_agents: Dict[Optional[str], str] = {}
+        self.blocked_pairs: Set[Tuple[str, Optional[str]]] = set()
+        self.lock = threading.Lock()
+
+    def pick(self, proxy: Optional[str] = None) -> str:
+        """
+        Picks the user agent to send a request with.
+        When every user agent got blocked with the proxy, its blocked pairs are forgotten and the rotation starts over.
+
+        Args:
+            proxy (Optional[str]): The proxy endpoint the request goes through, or None for a direct request.
+
+        Returns:
+            str: The user agent.
+        """
+        with self.lock:
+            sticky_user_agent = self.sticky_user_agents.get(proxy)
+            if sticky_user_agent and (sticky_user_agent, proxy) not in self.blocked_pairs:
+                return sticky_user_agent
+
+            candidates = [
+                i
+                for i, user_agent in enumerate(self.user_agents)
+                if (user_agent, proxy) not in self.blocked_pairs
+            ]
+            if not candidates:
+                self.blocked_pairs = {
+                    pair for pair in self.blocked_pairs if pair[1] != proxy
+                }
+                candidates = list(range(len(self.user_agents)))
+
+            i = random.choices(candidates, weights=[self.weights[i] for i in candidates])[0]
+            self.sticky_user_agents[proxy] = self.user_agents[i]
+            return self.user_agents[i]
+
+    def report_blocked(self, user_agent: str, proxy: Optional[str] = None) -> None:
+        """
+        Records that a request got blocked, so the pair is no longer picked and the user agent gets less likely.
+
+        Args:
+            user_agent (str): The user agent the request was sent with.
+            proxy (Optional[str]): The proxy endpoint the request went through, or None for a direct request.
+        """
+        with self.lock:
+            self.blocked_pairs.add((user_agent, proxy))
+            if user_agent in self.user_agents:
+                i = self.user_agents.index(user_agent)
+                self.weights[i] *= BLOCKED_WEIGHT_DECAY
+
+
+def load_user_agents(path: Path) -> List[Tuple[float, str]]:
+    """
+    Loads weighted user agents from a file with one per line, as the weight and the user agent separated by a tab.
+    Blank lines and lines starting with # are ignored.
+
+    Args:
+        path (Path): The path of the file.
+
+    Returns:
+        List[Tuple[float, str]]: The weight and the user agent of each line.
+    """
+    entries = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                weight, user_agent = line.split("\t", 1)
+                entries.append((float(weight), user_agent))
+    return entries